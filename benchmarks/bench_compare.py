@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for compare.py
+Generates synthetic PDF pairs offline and times each comparison stage
+
+Usage:
+  python benchmarks/bench_compare.py --quick
+  python benchmarks/bench_compare.py --save baseline.json
+  python benchmarks/bench_compare.py --compare baseline.json --threshold 1.25
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import compare  # noqa: E402
+
+DEFAULT_SIZES = (10, 100, 500, 2000)
+QUICK_SIZES = (10, 100)
+DEFAULT_CHANGES = (0.0, 0.01, 0.30)
+CORPUS_DIR = Path(__file__).resolve().parent / ".corpus"
+
+# Stages faster than this are too noisy to gate on
+MIN_GATED_SECONDS = 0.005
+
+WORDS = ("account balance statement payment interest date amount total fee credit "
+         "debit transfer opening closing available pending posted reference branch "
+         "customer summary period charges deposit withdrawal").split()
+
+def _pdf_string(text: str) -> str:
+    """Escape text for a PDF literal string"""
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def write_pdf(path: Path, pages: List[List[str]]):
+    """Write a minimal text-only PDF with one Helvetica line per entry"""
+    count = len(pages)
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(count))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {count} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, lines in enumerate(pages):
+        content = ("BT /F1 9 Tf 12 TL 40 800 Td "
+                   + " ".join(f"({_pdf_string(line)}) '" for line in lines)
+                   + " ET").encode('latin-1')
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> "
+                       f"/Contents {5 + 2 * i} 0 R >>".encode())
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+    
+    data = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        data += b"%010d 00000 n \n" % offset
+    data += (b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+             % (len(objects) + 1, xref))
+    path.write_bytes(bytes(data))
+
+def _statement_line(rng: random.Random) -> str:
+    """One line of plausible statement text"""
+    return (f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d} "
+            + " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 9)))
+            + f" {rng.randint(0, 99999) / 100:,.2f}")
+
+def generate_pair(pages: int, change: float, lines_per_page: int = 45,
+                  seed: int = 1) -> Tuple[Path, Path]:
+    """Generate (or reuse) a baseline PDF and a copy with a fraction of lines changed"""
+    CORPUS_DIR.mkdir(exist_ok=True)
+    stem = f"p{pages}-c{int(change * 100)}-s{seed}"
+    pdf1 = CORPUS_DIR / f"{stem}-struts.pdf"
+    pdf2 = CORPUS_DIR / f"{stem}-angular.pdf"
+    if pdf1.exists() and pdf2.exists():
+        return pdf1, pdf2
+    
+    rng = random.Random(seed)
+    baseline = [[_statement_line(rng) for _ in range(lines_per_page)] for _ in range(pages)]
+    
+    # Changes are spread evenly over the document with a separate stream
+    rng = random.Random(seed + 1)
+    candidate = [[_statement_line(rng) if rng.random() < change else line for line in page]
+                 for page in baseline]
+    
+    write_pdf(pdf1, baseline)
+    write_pdf(pdf2, candidate)
+    return pdf1, pdf2
+
+def _best_of(repeat: int, func: Callable):
+    """Run func repeat times, returning its last result and the fastest wall time"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+def bench_pair(pdf1: Path, pdf2: Path, repeat: int, engine: str = 'char',
+               align: str = 'sequence',
+               backend: Optional['compare.ExtractorBackend'] = None) -> Dict[str, float]:
+    """Time each comparison stage on one PDF pair"""
+    timings = {}
+    keep_lines = engine == 'line'
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        (pages1, pages2), timings['extract'] = _best_of(repeat, lambda: (
+            compare.extract_pages_from_pdf(str(pdf1), workers=1, backend=backend),
+            compare.extract_pages_from_pdf(str(pdf2), workers=1, backend=backend)))
+        
+        (norm1, norm2), timings['normalize'] = _best_of(repeat, lambda: (
+            [compare.normalize_text(page, keep_lines) for page in pages1],
+            [compare.normalize_text(page, keep_lines) for page in pages2]))
+        
+        def similarity():
+            deltas = []
+            hashes1, hashes2 = compare.page_text_hashes(norm1), compare.page_text_hashes(norm2)
+            if align == 'minhash':
+                opcodes = compare.align_pages_minhash(norm1, norm2, hashes1, hashes2)
+            else:
+                opcodes = compare.align_pages(hashes1, hashes2)
+            score = compare.calculate_page_aligned_similarity(norm1, norm2, opcodes, deltas,
+                                                              compare.SimilarityEngine(engine))
+            return score, deltas
+        (score, deltas), timings['similarity'] = _best_of(repeat, similarity)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            report = str(Path(tmp) / "report.html")
+            _, timings['report'] = _best_of(repeat, lambda: compare.generate_html_report(
+                str(pdf1), str(pdf2), score, report,
+                pages1=pages1, pages2=pages2, page_deltas=deltas))
+    
+    timings['score'] = score
+    return timings
+
+def run_benchmarks(sizes, changes, repeat: int, engine: str = 'char',
+                   align: str = 'sequence', extractor: str = compare.DEFAULT_EXTRACTOR) -> dict:
+    """Benchmark every size/change combination"""
+    backend = compare.resolve_extractor(extractor)
+    results = []
+    print(f"{'Pages':>6} {'Change':>7} {'Extract':>9} {'Normalize':>10} "
+          f"{'Similarity':>11} {'Report':>9} {'Score':>8}")
+    for pages in sizes:
+        for change in changes:
+            pdf1, pdf2 = generate_pair(pages, change)
+            timings = bench_pair(pdf1, pdf2, repeat, engine, align, backend)
+            print(f"{pages:>6} {change:>7.0%} {timings['extract']:>9.3f} "
+                  f"{timings['normalize']:>10.3f} {timings['similarity']:>11.3f} "
+                  f"{timings['report']:>9.3f} {timings['score']:>7.2f}%")
+            sys.stdout.flush()
+            for stage in ('extract', 'normalize', 'similarity', 'report'):
+                results.append({'pages': pages, 'change': change, 'stage': stage,
+                                'seconds': round(timings[stage], 6)})
+    
+    return {
+        'meta': {
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'extractor': backend.key,
+            'repeat': repeat,
+            'engine': engine,
+            'align': align,
+        },
+        'results': results,
+    }
+
+def find_regressions(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """List stages that got slower than threshold times their baseline"""
+    previous = {(r['pages'], r['change'], r['stage']): r['seconds'] for r in baseline['results']}
+    regressions = []
+    for r in current['results']:
+        before = previous.get((r['pages'], r['change'], r['stage']))
+        if before is None or max(before, r['seconds']) < MIN_GATED_SECONDS:
+            continue
+        ratio = r['seconds'] / before if before else float('inf')
+        if ratio > threshold:
+            regressions.append(f"{r['stage']} @ {r['pages']} pages / {r['change']:.0%} changed: "
+                               f"{before:.3f}s -> {r['seconds']:.3f}s ({ratio:.2f}x)")
+    return regressions
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark compare.py on synthetic PDF pairs")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        metavar='PAGES', help="page counts to generate (default: %(default)s)")
+    parser.add_argument('--changes', type=float, nargs='+', default=list(DEFAULT_CHANGES),
+                        metavar='FRACTION', help="fraction of changed lines (default: %(default)s)")
+    parser.add_argument('--quick', action='store_true',
+                        help=f"only run {', '.join(map(str, QUICK_SIZES))} page documents")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="runs per stage, the fastest is kept (default: %(default)s)")
+    parser.add_argument('--engine', choices=compare.SimilarityEngine.NAMES, default='char',
+                        help="similarity engine to time (default: %(default)s)")
+    parser.add_argument('--align', choices=compare.ALIGN_MODES, default='sequence',
+                        help="page alignment to time (default: %(default)s)")
+    parser.add_argument('--extractor', choices=compare.EXTRACTOR_CHOICES,
+                        default=compare.DEFAULT_EXTRACTOR,
+                        help="text extraction backend to time (default: %(default)s)")
+    parser.add_argument('--save', metavar='FILE', help="write results as JSON")
+    parser.add_argument('--compare', metavar='FILE', help="baseline JSON to check for regressions")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="fail when a stage is this many times slower than baseline "
+                             "(default: %(default)s)")
+    args = parser.parse_args()
+    
+    sizes = QUICK_SIZES if args.quick else args.sizes
+    current = run_benchmarks(sizes, args.changes, max(1, args.repeat), args.engine,
+                             args.align, args.extractor)
+    
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+        print(f"\n💾 Results saved to: {args.save}")
+    
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = find_regressions(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.2f}x:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print(f"\n✅ No regressions beyond {args.threshold:.2f}x against {args.compare}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for compare.py
+Times trivial invocations in fresh interpreters, where import cost dominates
+
+Usage:
+  python benchmarks/bench_startup.py
+  python benchmarks/bench_startup.py --save startup.json
+  python benchmarks/bench_startup.py --compare startup.json --threshold 1.25
+"""
+import argparse
+import json
+import platform
+import py_compile
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+COMPARE_SCRIPT = REPO_DIR / "compare.py"
+sys.path.insert(0, str(REPO_DIR))
+from bench_compare import generate_pair  # noqa: E402
+
+# Startup overhead, on top of a bare interpreter, that trivial runs must stay under
+DEFAULT_BUDGET_MS = 100.0
+# Invocations faster than this are too noisy to gate on
+MIN_GATED_MS = 20.0
+
+# Modules only specific stages need; importing compare must not load them
+LAZY_MODULES = ('PyPDF2', 'difflib', 'asyncio', 'concurrent.futures', 'subprocess',
+                'tempfile', 'cProfile', 'pstats', 'tracemalloc',
+                'xml.etree.ElementTree', 'csv', 'uuid', 'http', 'numpy', 'PIL',
+                'compare_layout', 'compare_visual', 'compare_report', 'compare_matrix',
+                'compare_service')
+
+def invocations(pdf1: Path, pdf2: Path, results_db: Path) -> Dict[str, List[str]]:
+    """Command lines to time, by name; the -m forms are the ones under budget"""
+    hash_only = [str(pdf1), str(pdf2), '--no-cache', '--results-db', str(results_db)]
+    return {
+        'interpreter': [sys.executable, '-c', 'pass'],
+        'import': [sys.executable, '-c', 'import compare'],
+        'help': [sys.executable, '-m', 'compare', '--help'],
+        'hash-only': [sys.executable, '-m', 'compare'] + hash_only,
+        'help (script)': [sys.executable, str(COMPARE_SCRIPT), '--help'],
+        'hash-only (script)': [sys.executable, str(COMPARE_SCRIPT)] + hash_only,
+    }
+
+BUDGETED = ('import', 'help', 'hash-only')
+
+def time_command(command: List[str], repeat: int) -> float:
+    """Fastest wall time of a command in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=REPO_DIR, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def eagerly_imported() -> List[str]:
+    """Lazy modules that a plain import of compare loads anyway"""
+    probe = ("import sys, compare; "
+             f"print(' '.join(m for m in {LAZY_MODULES!r} if m in sys.modules))")
+    output = subprocess.run([sys.executable, '-c', probe], cwd=REPO_DIR, check=True,
+                            capture_output=True, text=True).stdout
+    return output.split()
+
+def run_benchmarks(repeat: int) -> dict:
+    """Time every invocation against a fresh interpreter"""
+    # A stale or missing .pyc would time compilation instead of startup
+    for module in REPO_DIR.glob("compare*.py"):
+        py_compile.compile(str(module), doraise=True)
+    pdf1, _ = generate_pair(1, 0.0)
+    
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # Byte-identical inputs are decided by the file hash without extraction
+        pdf2 = Path(tmp) / "copy.pdf"
+        pdf2.write_bytes(pdf1.read_bytes())
+        commands = invocations(pdf1, pdf2, Path(tmp) / "results.sqlite3")
+        
+        print(f"{'Invocation':<20} {'Best':>9} {'Overhead':>9}")
+        interpreter = None
+        for name, command in commands.items():
+            ms = time_command(command, repeat)
+            if interpreter is None:
+                interpreter = ms
+            overhead = ms - interpreter
+            print(f"{name:<20} {ms:>7.1f}ms {overhead:>7.1f}ms")
+            sys.stdout.flush()
+            results.append({'invocation': name, 'ms': round(ms, 2),
+                            'overhead_ms': round(overhead, 2)})
+    
+    return {
+        'meta': {
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': repeat,
+        },
+        'eager_modules': eagerly_imported(),
+        'results': results,
+    }
+
+def find_regressions(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """List invocations that got slower than threshold times their baseline"""
+    previous = {r['invocation']: r['overhead_ms'] for r in baseline['results']}
+    regressions = []
+    for r in current['results']:
+        before = previous.get(r['invocation'])
+        if before is None or max(before, r['overhead_ms']) < MIN_GATED_MS:
+            continue
+        ratio = r['overhead_ms'] / before if before > 0 else float('inf')
+        if ratio > threshold:
+            regressions.append(f"{r['invocation']}: {before:.1f}ms -> {r['overhead_ms']:.1f}ms "
+                               f"({ratio:.2f}x)")
+    return regressions
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark compare.py startup time")
+    parser.add_argument('--repeat', type=int, default=10,
+                        help="runs per invocation, the fastest is kept (default: %(default)s)")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help="fail when a trivial -m invocation takes longer than this on top "
+                             "of a bare interpreter (default: %(default)s)")
+    parser.add_argument('--save', metavar='FILE', help="write results as JSON")
+    parser.add_argument('--compare', metavar='FILE', help="baseline JSON to check for regressions")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="fail when startup overhead is this many times the baseline "
+                             "(default: %(default)s)")
+    args = parser.parse_args()
+    
+    current = run_benchmarks(max(1, args.repeat))
+    failures = []
+    
+    if current['eager_modules']:
+        failures.append(f"importing compare loads {', '.join(current['eager_modules'])}")
+    for r in current['results']:
+        if r['invocation'] in BUDGETED and r['overhead_ms'] > args.budget_ms:
+            failures.append(f"{r['invocation']} takes {r['overhead_ms']:.1f}ms over the "
+                            f"interpreter, budget {args.budget_ms:.0f}ms")
+    
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+        print(f"\n💾 Results saved to: {args.save}")
+    
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        failures.extend(find_regressions(current, baseline, args.threshold))
+    
+    if failures:
+        print(f"\n❌ {len(failures)} startup problem(s):")
+        for line in failures:
+            print(f"  - {line}")
+        sys.exit(1)
+    print(f"\n✅ Trivial runs start within {args.budget_ms:.0f}ms of a bare interpreter")
+
+if __name__ == "__main__":
+    main()
@@ -3,567 +3,1564 @@
 PDF Comparison Tool - Struts vs Angular
 Compare two PDFs to check if contents are identical
 """
-import PyPDF2
-import difflib
 from pathlib import Path
 import sys
-from typing import Tuple
+from typing import Callable, Tuple, List, Optional, Dict, Iterator, Sequence, TYPE_CHECKING
 import re
+import os
+import hashlib
+import mmap
+from array import array
+import unicodedata
+import sqlite3
+import zlib
+import io
+import json
+import time
+import argparse
+import abc
+import bisect
+import functools
+from collections import deque
+import contextlib
+from dataclasses import dataclass, field, asdict, replace
 from datetime import datetime
 
-def extract_text_from_pdf(pdf_path: str) -> str:
-    """Extract text content from PDF file"""
-    try:
+# PyPDF2, difflib, the process pool, temporary files, the service, profiling and JUnit
+# modules are imported by the stages that use them, so --help and hash-only runs start
+# quickly. So are the stage modules: compare_layout (--structure), compare_visual
+# (--visual), compare_report (HTML reports and dashboards), compare_matrix (--matrix)
+# and compare_service (--serve).
+if TYPE_CHECKING:
+    import cProfile
+
+# Public names of the stage modules, still reachable as compare.<name>
+STAGE_MODULES = {
+    'compare_layout': ('LAYOUT_POSITION_TOLERANCE', 'LAYOUT_EXTRACTOR', 'extract_page_layout',
+                       'load_page_layouts', 'layout_fingerprint', 'compare_page_layouts',
+                       'has_layout_changes', 'describe_layout_delta',
+                       'calculate_layout_similarity'),
+    'compare_visual': ('VISUAL_TILE_SIZE', 'DECIDED_BY_VISUAL', 'rasterize_pdf',
+                       'collect_images', 'compare_page_images', 'calculate_visual_similarity',
+                       'compare_images'),
+    'compare_report': ('PAGE_FRAGMENT_STYLE', 'write_page_fragment', 'iter_changed_page_sections',
+                       'layout_report_section', 'visual_report_section', 'REPORT_STYLE',
+                       'generate_html_report', 'DASHBOARD_STYLESHEET', 'DASHBOARD_STYLE',
+                       'DASHBOARD_SCRIPT', 'pair_report_name', 'prepare_dashboard',
+                       'write_dashboard'),
+    'compare_matrix': ('PreparedDocument', 'prepare_document', 'compare_prepared', 'run_matrix',
+                       'build_matrix_summary', 'print_matrix', 'MATRIX_CELL_COLORS',
+                       'generate_matrix_report'),
+    'compare_service': ('MAX_REQUEST_BYTES', 'REQUEST_TIMEOUT_SECONDS', 'FINISHED_JOBS_KEPT',
+                        'ComparisonService', 'run_service'),
+}
+_STAGE_NAMES = {name: module for module, names in STAGE_MODULES.items() for name in names}
+
+def __getattr__(name: str):
+    """Import a stage module the first time one of its names is looked up here"""
+    module = _STAGE_NAMES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    return getattr(importlib.import_module(module), name)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Smallest page range worth shipping to a worker process
+MIN_PAGES_PER_WORKER = 32
+
+@contextlib.contextmanager
+def open_pdf_reader(pdf_path: str, module: str = 'PyPDF2'):
+    """Open a PDF reader backed by a read-only memory map of the file
+    
+    PyPDF2 (or pypdf, which shares its API) seeks and reads straight from the mapping,
+    so the OS pages the file in on demand and shares it between processes instead of
+    each holding a copy.
+    """
+    import importlib
+    reader_class = importlib.import_module(module).PdfReader
+    
+    with open(pdf_path, 'rb') as file:
+        try:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped; let the reader report them
+            yield reader_class(file)
+            return
+        with buffer:
+            yield reader_class(buffer)
+
+class ExtractorBackend(abc.ABC):
+    """One way of turning PDF pages into text
+    
+    Backends need either a Python module or external executables, checked without
+    importing or running anything. Scores are only comparable between pages extracted
+    by the same backend, so its key goes into every cache and result key.
+    """
+    
+    name = ''
+    label = ''
+    module: Optional[str] = None
+    executables: Tuple[str, ...] = ()
+    install_hint = ''
+    # Bump when this backend's output changes for the same input
+    revision = 1
+    
+    def available(self) -> bool:
+        """Whether the backend's module or executables are installed"""
+        if self.module is not None:
+            import importlib.util
+            return importlib.util.find_spec(self.module) is not None
+        import shutil
+        return all(shutil.which(executable) for executable in self.executables)
+    
+    @functools.cached_property
+    def version(self) -> str:
+        """Version of the underlying library or tool"""
+        import importlib
+        return getattr(importlib.import_module(self.module), '__version__', 'unknown')
+    
+    @property
+    def key(self) -> str:
+        """Identify the backend and its version in cache and result keys"""
+        return f"{self.label}-{self.version}/{self.revision}"
+    
+    @abc.abstractmethod
+    def page_count(self, pdf_path: str) -> int:
+        """Number of pages in the PDF"""
+    
+    @abc.abstractmethod
+    def iter_pages(self, pdf_path: str, start: int, stop: int) -> Iterator[str]:
+        """Yield the text of pages [start, stop), reading them as they are consumed"""
+
+class PyPDF2Extractor(ExtractorBackend):
+    """Pure-Python extraction with PyPDF2, the original backend"""
+    
+    name = 'pypdf2'
+    label = 'PyPDF2'
+    module = 'PyPDF2'
+    install_hint = "pip install PyPDF2"
+    
+    def page_count(self, pdf_path: str) -> int:
+        with open_pdf_reader(pdf_path, self.module) as pdf_reader:
+            return len(pdf_reader.pages)
+    
+    def iter_pages(self, pdf_path: str, start: int, stop: int) -> Iterator[str]:
+        with open_pdf_reader(pdf_path, self.module) as pdf_reader:
+            for index in range(start, stop):
+                yield pdf_reader.pages[index].extract_text()
+
+class PypdfExtractor(PyPDF2Extractor):
+    """PyPDF2's maintained successor, with a much faster text extractor"""
+    
+    name = 'pypdf'
+    label = 'pypdf'
+    module = 'pypdf'
+    install_hint = "pip install pypdf"
+
+class PdfminerExtractor(ExtractorBackend):
+    """pdfminer.six, slower but careful about reading order and spacing"""
+    
+    name = 'pdfminer'
+    label = 'pdfminer.six'
+    module = 'pdfminer'
+    install_hint = "pip install pdfminer.six"
+    
+    def page_count(self, pdf_path: str) -> int:
+        from pdfminer.pdfpage import PDFPage
         with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            text = ""
-            
-            print(f"📄 Reading {Path(pdf_path).name}...")
-            print(f"   Total pages: {len(pdf_reader.pages)}")
-            
-            for page_num, page in enumerate(pdf_reader.pages, 1):
-                text += page.extract_text()
-                print(f"   Extracted page {page_num}/{len(pdf_reader.pages)}", end='\r')
+            return sum(1 for _ in PDFPage.get_pages(file))
+    
+    def iter_pages(self, pdf_path: str, start: int, stop: int) -> Iterator[str]:
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LTTextContainer
+        for layout in extract_pages(pdf_path, page_numbers=range(start, stop)):
+            yield ''.join(element.get_text() for element in layout
+                          if isinstance(element, LTTextContainer))
+
+class PdftotextExtractor(ExtractorBackend):
+    """Poppler's pdftotext, native code run over a few pages per process"""
+    
+    name = 'pdftotext'
+    label = 'pdftotext'
+    executables = ('pdftotext', 'pdfinfo')
+    install_hint = "install poppler-utils for pdftotext and pdfinfo"
+    # Pages per pdftotext run, so lazy readers such as the gate do not convert everything
+    chunk_pages = 32
+    
+    @functools.cached_property
+    def version(self) -> str:
+        import subprocess
+        output = subprocess.run(['pdftotext', '-v'], capture_output=True, text=True)
+        match = re.search(r'version (\S+)', output.stderr + output.stdout)
+        return match.group(1) if match else 'unknown'
+    
+    def page_count(self, pdf_path: str) -> int:
+        import subprocess
+        try:
+            output = subprocess.run(['pdfinfo', pdf_path], capture_output=True, text=True,
+                                    check=True).stdout
+        except subprocess.CalledProcessError as e:
+            raise ValueError(e.stderr.strip() or f"pdfinfo exited with {e.returncode}") from e
+        match = re.search(r'^Pages:\s+(\d+)', output, re.MULTILINE)
+        if match is None:
+            raise ValueError("pdfinfo reported no page count")
+        return int(match.group(1))
+    
+    def iter_pages(self, pdf_path: str, start: int, stop: int) -> Iterator[str]:
+        import subprocess
+        for first in range(start, stop, self.chunk_pages):
+            last = min(first + self.chunk_pages, stop)
+            try:
+                output = subprocess.run(
+                    ['pdftotext', '-enc', 'UTF-8', '-f', str(first + 1), '-l', str(last),
+                     pdf_path, '-'], capture_output=True, check=True).stdout
+            except subprocess.CalledProcessError as e:
+                message = e.stderr.decode('utf-8', 'replace').strip()
+                raise ValueError(message or f"pdftotext exited with {e.returncode}") from e
+            # Every page ends with a form feed, so the last piece is empty
+            texts = output.decode('utf-8', 'replace').split('\f')[:-1]
+            if len(texts) != last - first:
+                raise ValueError(f"pdftotext returned {len(texts)} page(s) for pages "
+                                 f"{first + 1}-{last}")
+            yield from texts
+
+# Fastest first: auto mode picks the first one installed
+EXTRACTORS: Dict[str, ExtractorBackend] = {backend.name: backend for backend in (
+    PdftotextExtractor(), PypdfExtractor(), PyPDF2Extractor(), PdfminerExtractor())}
+EXTRACTOR_CHOICES = ('auto',) + tuple(EXTRACTORS)
+# Scores depend on the extractor, so the default stays the original backend and auto
+# is opt-in
+DEFAULT_EXTRACTOR = 'pypdf2'
+
+def resolve_extractor(name: str = DEFAULT_EXTRACTOR) -> ExtractorBackend:
+    """Pick the named backend, or the fastest installed one for 'auto'"""
+    if name == 'auto':
+        for backend in EXTRACTORS.values():
+            if backend.available():
+                if backend.name != DEFAULT_EXTRACTOR:
+                    print(f"⚠️  Extracting text with {backend.label} instead of PyPDF2; "
+                          f"scores may differ from runs with the default extractor")
+                return backend
+        print("❌ Error: No PDF text extractor installed - pip install PyPDF2")
+        sys.exit(1)
+    backend = EXTRACTORS[name]
+    if not backend.available():
+        print(f"❌ Error: The {name} extractor is not installed - {backend.install_hint}")
+        sys.exit(1)
+    return backend
+
+class PageStore(Sequence):
+    """Page texts kept in memory up to a byte budget and spilled to a temporary file beyond it"""
+    
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self.resident_bytes = 0
+        self.spilled_pages = 0
+        self._pages: List[Optional[str]] = []
+        self._offsets: List[Optional[Tuple[int, int]]] = []
+        self._spill = None
+    
+    def append(self, text: str):
+        """Add the next page, spilling it to disk once the budget is used up"""
+        size = sys.getsizeof(text)
+        if self.resident_bytes + size <= self.budget_bytes:
+            self._pages.append(text)
+            self._offsets.append(None)
+            self.resident_bytes += size
+            return
+        
+        if self._spill is None:
+            import tempfile
+            self._spill = tempfile.TemporaryFile(prefix="pdf-compare-pages-")
+        data = text.encode('utf-8')
+        offset = self._spill.seek(0, os.SEEK_END)
+        self._spill.write(data)
+        self._pages.append(None)
+        self._offsets.append((offset, len(data)))
+        self.spilled_pages += 1
+    
+    def extend(self, texts):
+        for text in texts:
+            self.append(text)
+    
+    def __len__(self) -> int:
+        return len(self._pages)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        text = self._pages[index]
+        if text is None:
+            offset, size = self._offsets[index]
+            self._spill.seek(offset)
+            text = self._spill.read(size).decode('utf-8')
+        return text
+    
+    def close(self):
+        """Delete the spill file"""
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+def _timed_pages(texts: Iterator[str], times: List[float]) -> Iterator[str]:
+    """Pass page texts through, appending the time each one took to produce"""
+    while True:
+        page_start = time.perf_counter()
+        try:
+            text = next(texts)
+        except StopIteration:
+            return
+        times.append(time.perf_counter() - page_start)
+        yield text
+
+def _extract_page_range(pdf_path: str, start: int, stop: int,
+                        extractor: str = DEFAULT_EXTRACTOR) -> Tuple[List[str], List[float]]:
+    """Extract text and per-page timings for pages [start, stop) in a worker process"""
+    times = []
+    pages = list(_timed_pages(EXTRACTORS[extractor].iter_pages(pdf_path, start, stop), times))
+    return pages, times
+
+def extract_pages_from_pdf(pdf_path: str, workers: Optional[int] = None,
+                           page_times: Optional[List[float]] = None,
+                           store: Optional[PageStore] = None,
+                           backend: Optional[ExtractorBackend] = None) -> Sequence[str]:
+    """Extract text content from PDF file as a list of pages, in page order
+    
+    When a page_times list is given, the extraction time of each page is appended to it.
+    When a store is given, pages stream into it instead of an in-memory list. Without
+    a backend, the default PyPDF2 one is used; only --extractor auto picks the fastest
+    installed backend.
+    """
+    if page_times is None:
+        page_times = []
+    if backend is None:
+        backend = resolve_extractor()
+    try:
+        page_count = backend.page_count(pdf_path)
+        
+        print(f"📄 Reading {Path(pdf_path).name}...")
+        print(f"   Total pages: {page_count}")
+        
+        workers = min(workers or os.cpu_count() or 1,
+                      max(1, page_count // MIN_PAGES_PER_WORKER))
+        if workers <= 1:
+            pages = store if store is not None else []
+            texts = _timed_pages(backend.iter_pages(pdf_path, 0, page_count), page_times)
+            for page_num, text in enumerate(texts, 1):
+                pages.append(text)
+                print(f"   Extracted page {page_num}/{page_count}", end='\r')
             
             print()  # New line after progress
-            return text
+            return pages
+        
+        # Several chunks per worker keeps the pool busy when some pages are slower
+        chunk_size = max(MIN_PAGES_PER_WORKER, -(-page_count // (workers * 4)))
+        ranges = [(start, min(start + chunk_size, page_count))
+                  for start in range(0, page_count, chunk_size)]
+        
+        from concurrent.futures import ProcessPoolExecutor
+        
+        pages = store if store is not None else []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_extract_page_range, pdf_path, start, stop, backend.name)
+                       for start, stop in ranges]
+            for future in futures:
+                chunk_pages, chunk_times = future.result()
+                pages.extend(chunk_pages)
+                page_times.extend(chunk_times)
+                print(f"   Extracted page {len(pages)}/{page_count} "
+                      f"({workers} workers)", end='\r')
+        
+        print()  # New line after progress
+        return pages
     except Exception as e:
         print(f"❌ Error reading {pdf_path}: {e}")
         sys.exit(1)
 
-def normalize_text(text: str) -> str:
-    """Normalize text for comparison (remove extra spaces, newlines)"""
+def extract_text_from_pdf(pdf_path: str, workers: Optional[int] = None,
+                          backend: Optional[ExtractorBackend] = None) -> str:
+    """Extract text content from PDF file"""
+    return "".join(extract_pages_from_pdf(pdf_path, workers, backend=backend))
+
+_WORD_RE = re.compile(r'\S+')
+# Every separator str.splitlines() breaks on
+_LINE_BREAK_RE = re.compile(r'\r\n|[\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]')
+
+@dataclass
+class DocumentStats:
+    """Character, word and line counts of an extracted document, with per-page counts"""
+    chars: int = 0
+    words: int = 0
+    lines: int = 0
+    # (chars, words, lines) for every page
+    per_page: List[Tuple[int, int, int]] = field(default_factory=list)
+    
+    @classmethod
+    def from_pages(cls, pages: List[str]) -> 'DocumentStats':
+        """Count everything in one pass per page, without building word or line lists
+        
+        Totals match len(text.split()) and len(text.splitlines()) of the joined text:
+        a word or line running across a page boundary is counted once.
+        """
+        stats = cls()
+        previous = ''
+        for page in pages:
+            words = sum(1 for _ in _WORD_RE.finditer(page))
+            breaks = sum(1 for _ in _LINE_BREAK_RE.finditer(page))
+            lines = breaks + (1 if page and not _LINE_BREAK_RE.match(page[-1]) else 0)
+            stats.per_page.append((len(page), words, lines))
+            
+            stats.chars += len(page)
+            stats.words += words
+            stats.lines += lines
+            if page and previous:
+                # Pages are joined without a separator, so boundaries can merge
+                if not previous[-1].isspace() and not page[0].isspace():
+                    stats.words -= 1
+                if not _LINE_BREAK_RE.match(previous[-1]):
+                    stats.lines -= 1
+                elif previous[-1] == '\r' and page[0] == '\n':
+                    # A CRLF split across pages is a single line break
+                    stats.lines -= 1
+                previous = page
+            elif page:
+                previous = page
+        return stats
+    
+    def totals(self) -> dict:
+        """Document-level counts"""
+        return {'chars': self.chars, 'words': self.words, 'lines': self.lines}
+
+DEFAULT_CACHE_DIR = Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')) / 'pdf-compare'
+DEFAULT_CACHE_SIZE_MB = 512
+
+class ExtractionCache:
+    """On-disk LRU cache of extracted page text, keyed by PDF content hash"""
+    
+    def __init__(self, cache_dir: str = str(DEFAULT_CACHE_DIR),
+                 max_mb: int = DEFAULT_CACHE_SIZE_MB):
+        self.cache_dir = Path(cache_dir)
+        self.db_path = self.cache_dir / 'extracted-text.sqlite3'
+        self.max_bytes = max_mb * 1024 * 1024
+    
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call keeps instances picklable for workers
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""CREATE TABLE IF NOT EXISTS pages (
+                            content_hash TEXT NOT NULL,
+                            extractor TEXT NOT NULL,
+                            data BLOB NOT NULL,
+                            size INTEGER NOT NULL,
+                            last_access REAL NOT NULL,
+                            PRIMARY KEY (content_hash, extractor))""")
+        return conn
+    
+    def get(self, content_hash: str, extractor: str) -> Optional[list]:
+        """Return cached pages for a PDF, or None on a miss
+        
+        The extractor is the backend key, plus a variant suffix for other per-page
+        data such as layouts, so entries from different backends never mix.
+        """
+        with contextlib.closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT data FROM pages WHERE content_hash = ? AND extractor = ?",
+                               (content_hash, extractor)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE pages SET last_access = ? WHERE content_hash = ? AND extractor = ?",
+                         (time.time(), content_hash, extractor))
+        return json.loads(zlib.decompress(row[0]).decode('utf-8'))
+    
+    def put(self, content_hash: str, pages: list, extractor: str):
+        """Store pages for a PDF, evicting least recently used entries over the size limit"""
+        data = zlib.compress(json.dumps(pages).encode('utf-8'))
+        if len(data) > self.max_bytes:
+            return
+        with contextlib.closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+                         (content_hash, extractor, data, len(data), time.time()))
+            kept = 0
+            evict = []
+            for key, extractor, size in conn.execute(
+                    "SELECT content_hash, extractor, size FROM pages ORDER BY last_access DESC"):
+                kept += size
+                if kept > self.max_bytes:
+                    evict.append((key, extractor))
+            conn.executemany("DELETE FROM pages WHERE content_hash = ? AND extractor = ?", evict)
+    
+    def clear(self):
+        """Drop every cached entry"""
+        if self.db_path.exists():
+            with contextlib.closing(self._connect()) as conn, conn:
+                conn.execute("DELETE FROM pages")
+            with contextlib.closing(sqlite3.connect(self.db_path)) as conn:
+                conn.execute("VACUUM")
+
+def load_pages(pdf_path: str, content_hash: str, workers: Optional[int] = None,
+               cache: Optional[ExtractionCache] = None,
+               page_times: Optional[List[float]] = None,
+               store: Optional[PageStore] = None,
+               backend: Optional[ExtractorBackend] = None) -> Sequence[str]:
+    """Extract pages from a PDF, going through the extraction cache when enabled
+    
+    Pages streamed into a store bypass the cache, which would hold them all in memory.
+    """
+    if backend is None:
+        backend = resolve_extractor()
+    if store is not None:
+        pages = extract_pages_from_pdf(pdf_path, workers, page_times, store, backend)
+        if store.spilled_pages:
+            print(f"   {store.spilled_pages} page(s) spilled to disk to stay within the memory budget")
+        return pages
+    
+    if cache is not None:
+        try:
+            pages = cache.get(content_hash, backend.key)
+        except sqlite3.Error as e:
+            print(f"⚠️  Extraction cache unavailable ({e}), extracting directly")
+            cache = pages = None
+        if pages is not None:
+            print(f"📄 Reading {Path(pdf_path).name}... {len(pages)} page(s) from cache")
+            return pages
+    
+    pages = extract_pages_from_pdf(pdf_path, workers, page_times, backend=backend)
+    
+    if cache is not None:
+        try:
+            cache.put(content_hash, pages, backend.key)
+        except sqlite3.Error as e:
+            print(f"⚠️  Could not update extraction cache: {e}")
+    return pages
+
+# Cache and result key suffix of page layouts, compared by compare_layout for --structure
+LAYOUT_CACHE_VARIANT = "/layout-1"
+
+# Visual comparison settings; compare_visual does the rasterizing and tile diffs
+VISUAL_DPI = 100
+VISUAL_TOLERANCE = 8
+
+@dataclass
+class VisualOptions:
+    """Settings of the rasterized visual comparison"""
+    dpi: int = VISUAL_DPI
+    tolerance: int = VISUAL_TOLERANCE
+    
+    def key(self) -> str:
+        """Part of the result store key, since both settings change the score"""
+        return f"/visual-{self.dpi}-{self.tolerance}"
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def normalize_text(text: str, keep_lines: bool = False) -> str:
+    """Normalize text for comparison (remove extra spaces, newlines)
+    
+    With keep_lines, whitespace is collapsed within each line and blank lines are
+    dropped, but line breaks survive for line-level comparison.
+    """
+    if keep_lines:
+        lines = (_WHITESPACE_RE.sub(' ', line).strip() for line in text.splitlines())
+        return '\n'.join(line for line in lines if line)
     # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text)
+    text = _WHITESPACE_RE.sub(' ', text)
     # Strip leading/trailing whitespace
     text = text.strip()
     return text
 
+class NormalizationPipeline:
+    """Configurable text normalization, with every rule compiled once up front
+    
+    Rules run per page in this order: Unicode normalization, header/footer line
+    stripping, dropping lines that match any drop_lines pattern, masking, then the
+    whitespace collapse of normalize_text. All drop_lines patterns share one
+    regex, and all masks share one alternation scanned in a single pass, with the
+    matching rule's replacement picked by group name. Mask patterns must not use
+    numbered backreferences, since group numbers shift inside the combined pattern.
+    """
+    
+    UNICODE_FORMS = ('NFC', 'NFD', 'NFKC', 'NFKD')
+    
+    def __init__(self, unicode_form: Optional[str] = None, header_lines: int = 0,
+                 footer_lines: int = 0, drop_lines: Sequence[str] = (),
+                 masks: Sequence[dict] = ()):
+        if unicode_form is not None and unicode_form not in self.UNICODE_FORMS:
+            raise ValueError(f"unicode must be one of {', '.join(self.UNICODE_FORMS)}")
+        if header_lines < 0 or footer_lines < 0:
+            raise ValueError("header_lines and footer_lines cannot be negative")
+        
+        self.unicode_form = unicode_form
+        self.header_lines = header_lines
+        self.footer_lines = footer_lines
+        self.config = {
+            'unicode': unicode_form,
+            'header_lines': header_lines,
+            'footer_lines': footer_lines,
+            'drop_lines': list(drop_lines),
+            'masks': [dict(mask) for mask in masks],
+        }
+        
+        self._drop_re = None
+        if drop_lines:
+            for pattern in drop_lines:
+                re.compile(pattern)
+            combined = '|'.join(f'(?:{pattern})' for pattern in drop_lines)
+            self._drop_re = re.compile(rf'^[^\n]*?(?:{combined})[^\n]*(?:\n|\Z)', re.MULTILINE)
+        
+        self._mask_re = None
+        self._replacements = {}
+        if masks:
+            groups = []
+            for index, mask in enumerate(masks):
+                if 'pattern' not in mask:
+                    raise ValueError(f"mask {index + 1} has no pattern")
+                re.compile(mask['pattern'])
+                group = f'_mask{index}'
+                groups.append(f'(?P<{group}>{mask["pattern"]})')
+                self._replacements[group] = mask.get('replace', '')
+            self._mask_re = re.compile('|'.join(groups))
+    
+    @classmethod
+    def from_file(cls, config_path: str) -> 'NormalizationPipeline':
+        """Load rules from a JSON config file"""
+        try:
+            with open(config_path, encoding='utf-8') as f:
+                config = json.load(f)
+            return cls(unicode_form=config.get('unicode'),
+                       header_lines=int(config.get('header_lines', 0)),
+                       footer_lines=int(config.get('footer_lines', 0)),
+                       drop_lines=config.get('drop_lines', []),
+                       masks=config.get('masks', []))
+        except (OSError, ValueError, TypeError, re.error) as e:
+            print(f"❌ Error loading normalization config {config_path}: {e}")
+            sys.exit(1)
+    
+    def fingerprint(self) -> str:
+        """Short hash identifying these rules, for keying stored results"""
+        data = json.dumps(self.config, sort_keys=True).encode('utf-8')
+        return hashlib.sha256(data).hexdigest()[:16]
+    
+    def normalize(self, text: str, keep_lines: bool = False) -> str:
+        """Normalize one page of text"""
+        if self.unicode_form:
+            text = unicodedata.normalize(self.unicode_form, text)
+        if self.header_lines or self.footer_lines:
+            lines = text.splitlines()
+            text = '\n'.join(lines[self.header_lines:len(lines) - self.footer_lines])
+        if self._drop_re is not None:
+            text = self._drop_re.sub('', text)
+        if self._mask_re is not None:
+            replacements = self._replacements
+            text = self._mask_re.sub(lambda match: replacements[match.lastgroup], text)
+        return normalize_text(text, keep_lines)
+
 def calculate_similarity(text1: str, text2: str) -> float:
     """Calculate similarity percentage between two texts"""
+    import difflib
     # Use SequenceMatcher for similarity
     matcher = difflib.SequenceMatcher(None, text1, text2)
     return matcher.ratio() * 100
 
-def get_detailed_diff(text1: str, text2: str):
-    """Generate detailed line-by-line differences"""
-    lines1 = text1.splitlines()
-    lines2 = text2.splitlines()
+def file_sha256(path: str) -> str:
+    """Hash raw file bytes in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def page_text_hashes(norm_pages: List[str]) -> List[str]:
+    """Hash the already-normalized text of every page"""
+    return [hashlib.sha256(page.encode('utf-8')).hexdigest() for page in norm_pages]
+
+def align_pages(hashes1: List[str], hashes2: List[str]) -> List[Tuple[str, int, int, int, int]]:
+    """Align two documents page by page using their page hashes"""
+    import difflib
+    # Page hashes are cheap tokens; junk heuristics would drop repeated blank pages
+    aligner = difflib.SequenceMatcher(None, hashes1, hashes2, autojunk=False)
+    return aligner.get_opcodes()
+
+# MinHash page matching: 64 one-permutation bins over 3-word shingles, split into
+# 16 LSH bands of 4, which makes pages above ~50% Jaccard likely to share a bucket
+MINHASH_BINS = 64
+MINHASH_BANDS = 16
+MINHASH_SHINGLE_WORDS = 3
+MINHASH_MATCH_THRESHOLD = 0.5
+ALIGN_MODES = ('sequence', 'minhash')
+
+def minhash_signature(text: str, bins: int = MINHASH_BINS) -> Optional[Tuple[int, ...]]:
+    """Sketch a normalized page as a one-permutation MinHash signature
+
+    Every word shingle is hashed once: the low bits pick its bin and the rest is the
+    value whose minimum the bin keeps. Empty bins borrow from the next filled one, so
+    short pages still get a full signature. Blank pages have none.
+    """
+    words = text.split()
+    if not words:
+        return None
+    width = MINHASH_SHINGLE_WORDS
+    mins: List[Optional[int]] = [None] * bins
+    for start in range(max(1, len(words) - width + 1)):
+        digest = zlib.crc32(' '.join(words[start:start + width]).encode('utf-8'))
+        slot, value = digest % bins, digest // bins
+        if mins[slot] is None or value < mins[slot]:
+            mins[slot] = value
+
+    signature = []
+    for slot in range(bins):
+        distance = 0
+        while mins[(slot + distance) % bins] is None:
+            distance += 1
+        # Tag borrowed values with the distance so they rarely collide by accident
+        signature.append(mins[(slot + distance) % bins] + (distance << 32))
+    return tuple(signature)
+
+def _signature_similarity(signature1: Tuple[int, ...], signature2: Tuple[int, ...]) -> float:
+    """Estimate Jaccard similarity as the share of agreeing bins"""
+    return sum(a == b for a, b in zip(signature1, signature2)) / len(signature1)
+
+def match_pages_minhash(norm_pages1: Sequence[str], norm_pages2: Sequence[str],
+                        hashes1: List[str], hashes2: List[str]) -> Dict[int, int]:
+    """Pair each page with its most similar counterpart in the other document
+
+    Pages with identical hashes pair first, in order. The rest are bucketed by LSH
+    band, so only pages that share a bucket are ever scored against each other, and
+    pairs are then taken best first above MINHASH_MATCH_THRESHOLD.
+    """
+    pairs: Dict[int, int] = {}
+    by_hash: Dict[str, deque] = {}
+    for j, page_hash in enumerate(hashes2):
+        by_hash.setdefault(page_hash, deque()).append(j)
+    for i, page_hash in enumerate(hashes1):
+        if by_hash.get(page_hash):
+            pairs[i] = by_hash[page_hash].popleft()
+    taken = set(pairs.values())
+
+    rows = MINHASH_BINS // MINHASH_BANDS
+    buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+    signatures2 = {}
+    for j, page in enumerate(norm_pages2):
+        if j in taken:
+            continue
+        signature = minhash_signature(page)
+        if signature is None:
+            continue
+        signatures2[j] = signature
+        for band in range(MINHASH_BANDS):
+            buckets.setdefault((band, signature[band * rows:(band + 1) * rows]), []).append(j)
+
+    candidates = []
+    for i, page in enumerate(norm_pages1):
+        if i in pairs:
+            continue
+        signature = minhash_signature(page)
+        if signature is None:
+            continue
+        seen = set()
+        for band in range(MINHASH_BANDS):
+            for j in buckets.get((band, signature[band * rows:(band + 1) * rows]), ()):
+                if j not in seen:
+                    seen.add(j)
+                    score = _signature_similarity(signature, signatures2[j])
+                    if score >= MINHASH_MATCH_THRESHOLD:
+                        candidates.append((score, i, j))
+
+    # Best pairs first; ties go to the pages closest in position
+    candidates.sort(key=lambda item: (-item[0], abs(item[1] - item[2]), item[1]))
+    for score, i, j in candidates:
+        if i not in pairs and j not in taken:
+            pairs[i] = j
+            taken.add(j)
+    return pairs
+
+def _in_order_pairs(pairs: Dict[int, int]) -> List[Tuple[int, int]]:
+    """Longest run of pairs increasing on both sides; the other pairs are moves"""
+    ordered = sorted(pairs.items())
+    tails: List[int] = []
+    tail_index: List[int] = []
+    previous = [-1] * len(ordered)
+    for index, (_, j) in enumerate(ordered):
+        position = bisect.bisect_left(tails, j)
+        if position == len(tails):
+            tails.append(j)
+            tail_index.append(index)
+        else:
+            tails[position] = j
+            tail_index[position] = index
+        previous[index] = tail_index[position - 1] if position else -1
+
+    chain = []
+    index = tail_index[-1] if tail_index else -1
+    while index != -1:
+        chain.append(ordered[index])
+        index = previous[index]
+    return chain[::-1]
+
+def align_pages_minhash(norm_pages1: Sequence[str], norm_pages2: Sequence[str],
+                        hashes1: List[str], hashes2: List[str]) -> List[Tuple[str, int, int, int, int]]:
+    """Align two documents by page content, so reordered and inserted pages stay paired
+
+    Returns opcodes like align_pages, plus 'move' entries for matched pages that left
+    their relative order. Between two in-order pairs, unmatched pages are paired by
+    position as replacements, like the sequence alignment would, and whatever is left
+    over on either side was inserted or deleted.
+    """
+    pairs = match_pages_minhash(norm_pages1, norm_pages2, hashes1, hashes2)
+    anchors = _in_order_pairs(pairs)
+    moved = dict(pairs)
+    for i, _ in anchors:
+        del moved[i]
+    moved_targets = set(moved.values())
+
+    opcodes = []
+
+    def emit(tag: str, i: int, j: int, pages1: int = 1, pages2: int = 1):
+        # Runs of the same kind merge into one range
+        if opcodes and opcodes[-1][0] == tag and tag != 'move':
+            _, i1, i2, j1, j2 = opcodes[-1]
+            if i2 == i and j2 == j:
+                opcodes[-1] = (tag, i1, i + pages1, j1, j + pages2)
+                return
+        opcodes.append((tag, i, i + pages1, j, j + pages2))
+
+    start1 = start2 = 0
+    for anchor1, anchor2 in anchors + [(len(hashes1), len(hashes2))]:
+        unmatched1 = []
+        for i in range(start1, anchor1):
+            if i in moved:
+                emit('move', i, moved[i])
+            else:
+                unmatched1.append(i)
+        unmatched2 = [j for j in range(start2, anchor2) if j not in moved_targets]
+        for i, j in zip(unmatched1, unmatched2):
+            emit('replace', i, j)
+        for i in unmatched1[len(unmatched2):]:
+            emit('delete', i, anchor2, pages2=0)
+        for j in unmatched2[len(unmatched1):]:
+            emit('insert', anchor1, j, pages1=0)
+        if anchor1 < len(hashes1):
+            emit('equal' if hashes1[anchor1] == hashes2[anchor2] else 'replace', anchor1, anchor2)
+        start1, start2 = anchor1 + 1, anchor2 + 1
+    return opcodes
+
+def split_replace_block(norm_pages1: Sequence[str], norm_pages2: Sequence[str],
+                        i1: int, i2: int, j1: int, j2: int) -> List[Tuple[str, int, int, int, int]]:
+    """Break a replaced run with different page counts on each side into page pairs
+    
+    Pages pair up by MinHash similarity, keeping only pairs that stay in document
+    order, and the pages between two such pairs are paired by position. What one side
+    has left over in a gap was deleted or inserted. Every diff then stays one page
+    against one page, however long the run is.
+    """
+    pages1, pages2 = norm_pages1[i1:i2], norm_pages2[j1:j2]
+    pairs = match_pages_minhash(pages1, pages2, page_text_hashes(pages1),
+                                page_text_hashes(pages2))
+    opcodes = []
+    start1 = start2 = 0
+    for anchor1, anchor2 in _in_order_pairs(pairs) + [(len(pages1), len(pages2))]:
+        common = min(anchor1 - start1, anchor2 - start2)
+        if common:
+            opcodes.append(('replace', i1 + start1, i1 + start1 + common,
+                            j1 + start2, j1 + start2 + common))
+        if anchor1 - start1 > common:
+            opcodes.append(('delete', i1 + start1 + common, i1 + anchor1,
+                            j1 + anchor2, j1 + anchor2))
+        if anchor2 - start2 > common:
+            opcodes.append(('insert', i1 + anchor1, i1 + anchor1,
+                            j1 + start2 + common, j1 + anchor2))
+        if anchor1 < len(pages1):
+            opcodes.append(('replace', i1 + anchor1, i1 + anchor1 + 1,
+                            j1 + anchor2, j1 + anchor2 + 1))
+        start1, start2 = anchor1 + 1, anchor2 + 1
+    return opcodes
+
+def split_replace_blocks(norm_pages1: Sequence[str], norm_pages2: Sequence[str],
+                         opcodes: List[Tuple[str, int, int, int, int]]
+                         ) -> List[Tuple[str, int, int, int, int]]:
+    """Opcodes with every uneven replaced run split by split_replace_block"""
+    split = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == 'replace' and i2 - i1 != j2 - j1:
+            split.extend(split_replace_block(norm_pages1, norm_pages2, i1, i2, j1, j2))
+        else:
+            split.append((tag, i1, i2, j1, j2))
+    return split
+
+def _matched_chars(text1: str, text2: str) -> int:
+    """Count characters SequenceMatcher matches between two texts
     
-    diff = difflib.HtmlDiff(wrapcolumn=80)
-    return diff, lines1, lines2
+    Autojunk stays off: on a page of text it would drop common characters such as the
+    space from matching and understate the score.
+    """
+    import difflib
+    matcher = difflib.SequenceMatcher(None, text1, text2, autojunk=False)
+    return sum(block.size for block in matcher.get_matching_blocks())
 
-def generate_html_report(pdf1_path: str, pdf2_path: str, text1: str, text2: str, 
-                        similarity: float, diff_html: str, output_file: str):
-    """Generate beautiful HTML comparison report"""
+def myers_matched(seq1: Sequence[int], seq2: Sequence[int]) -> int:
+    """Count tokens in a longest common subsequence with Myers' O(ND) diff
     
-    # Get file names
-    pdf1_name = Path(pdf1_path).name
-    pdf2_name = Path(pdf2_path).name
+    Only the edit distance D is needed for the count, so just the furthest-reaching
+    path per diagonal is kept, never the edit script.
+    """
+    n, m = len(seq1), len(seq2)
+    # Matching ends cost nothing to strip and shrink N for the main loop
+    prefix = 0
+    while prefix < n and prefix < m and seq1[prefix] == seq2[prefix]:
+        prefix += 1
+    suffix = 0
+    while (suffix < n - prefix and suffix < m - prefix
+           and seq1[n - 1 - suffix] == seq2[m - 1 - suffix]):
+        suffix += 1
+    common = prefix + suffix
+    seq1 = seq1[prefix:n - suffix]
+    seq2 = seq2[prefix:m - suffix]
+    # Tokens missing from the other side can never match, and dropping them keeps D small
+    shared = set(seq1).intersection(seq2)
+    seq1 = [token for token in seq1 if token in shared]
+    seq2 = [token for token in seq2 if token in shared]
+    n, m = len(seq1), len(seq2)
+    if not n or not m:
+        return common
     
-    # Calculate stats
-    stats1 = {
-        'chars': len(text1),
-        'words': len(text1.split()),
-        'lines': len(text1.splitlines())
-    }
+    offset = n + m + 1
+    furthest = array('i', bytes(4 * (2 * offset + 1)))
+    for d in range(n + m + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and furthest[offset + k - 1] < furthest[offset + k + 1]):
+                x = furthest[offset + k + 1]
+            else:
+                x = furthest[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and seq1[x] == seq2[y]:
+                x += 1
+                y += 1
+            furthest[offset + k] = x
+            if x >= n and y >= m:
+                return common + (n + m - d) // 2
+    return common
+
+class SimilarityEngine:
+    """Scores normalized pages in characters, words or lines
+    
+    The char engine is SequenceMatcher over characters. The word and line engines
+    intern each token to an integer id shared by both documents, hold pages as
+    compact int arrays and count matches with myers_matched.
+    """
+    
+    NAMES = ('char', 'word', 'line')
+    
+    def __init__(self, name: str = 'char'):
+        if name not in self.NAMES:
+            raise ValueError(f"engine must be one of {', '.join(self.NAMES)}")
+        self.name = name
+        # Line tokens need the line breaks that normalization removes by default
+        self.keep_lines = name == 'line'
+        self._ids: Dict[str, int] = {}
+    
+    @property
+    def label(self) -> str:
+        """How the score was decided, for reports"""
+        if self.name == 'char':
+            return DECIDED_BY_MATCHER
+        return f"page-aligned {self.name} diff"
+    
+    def _split(self, text: str) -> List[str]:
+        if self.keep_lines:
+            return text.split('\n') if text else []
+        return text.split()
     
-    stats2 = {
-        'chars': len(text2),
-        'words': len(text2.split()),
-        'lines': len(text2.splitlines())
+    def tokens(self, text: str) -> array:
+        """Intern the page's tokens as integer ids"""
+        ids = self._ids
+        return array('i', [ids.setdefault(token, len(ids)) for token in self._split(text)])
+    
+    def size(self, text: str) -> int:
+        """Length of a normalized page in this engine's units"""
+        if self.name == 'char':
+            return len(text)
+        if self.keep_lines:
+            return text.count('\n') + 1 if text else 0
+        return len(text.split())
+    
+    def matched(self, text1: str, text2: str) -> int:
+        """Count units two normalized pages have in common"""
+        if self.name == 'char':
+            return _matched_chars(text1, text2)
+        return myers_matched(self.tokens(text1), self.tokens(text2))
+
+def _page_delta(change: str, i1: int, i2: int, j1: int, j2: int,
+                matched: int = 0, size: int = 0) -> dict:
+    """Describe one changed page range with 1-based inclusive page numbers"""
+    return {
+        'change': change,
+        'pages1': [i1 + 1, i2] if i2 > i1 else None,
+        'pages2': [j1 + 1, j2] if j2 > j1 else None,
+        'similarity': round(2.0 * matched / size * 100, 4) if size else 0.0,
     }
+
+def calculate_page_aligned_similarity(norm_pages1: List[str], norm_pages2: List[str],
+                                      opcodes: List[Tuple[str, int, int, int, int]],
+                                      deltas: Optional[List[dict]] = None,
+                                      engine: Optional[SimilarityEngine] = None) -> float:
+    """Calculate similarity percentage, diffing only the aligned pages that differ
+    
+    When a deltas list is given, one entry per changed page range is appended to it.
+    Scores are counted in the engine's units (characters by default). Pages the
+    opcodes mark as moved are scored against their counterpart wherever it ended up.
+    Replaced runs with more pages on one side are split into page pairs first, so the
+    cost stays per page even when no page of the run matched exactly.
+    """
+    matched = 0
+    total = 0
+    if deltas is None:
+        deltas = []
+    if engine is None:
+        engine = SimilarityEngine()
+    size_of = engine.size
     
-    char_diff = abs(stats1['chars'] - stats2['chars'])
-    word_diff = abs(stats1['words'] - stats2['words'])
+    for tag, i1, i2, j1, j2 in split_replace_blocks(norm_pages1, norm_pages2, opcodes):
+        if tag == 'equal':
+            size = sum(size_of(page) for page in norm_pages1[i1:i2])
+            matched += size
+            total += 2 * size
+        elif tag == 'replace':
+            # Same number of pages on both sides: diff them pairwise
+            for offset, (page1, page2) in enumerate(zip(norm_pages1[i1:i2], norm_pages2[j1:j2])):
+                page_matched = engine.matched(page1, page2)
+                page_size = size_of(page1) + size_of(page2)
+                matched += page_matched
+                total += page_size
+                deltas.append(_page_delta('changed', i1 + offset, i1 + offset + 1,
+                                          j1 + offset, j1 + offset + 1, page_matched, page_size))
+        elif tag == 'move':
+            page1, page2 = norm_pages1[i1], norm_pages2[j1]
+            page_size = size_of(page1) + size_of(page2)
+            page_matched = page_size // 2 if page1 == page2 else engine.matched(page1, page2)
+            matched += page_matched
+            total += page_size
+            deltas.append(_page_delta('moved', i1, i2, j1, j2, page_matched, page_size))
+        else:
+            # Inserted or deleted pages have nothing to match against
+            total += sum(size_of(page) for page in norm_pages1[i1:i2])
+            total += sum(size_of(page) for page in norm_pages2[j1:j2])
+            deltas.append(_page_delta('removed' if tag == 'delete' else 'added', i1, i2, j1, j2))
     
-    # Determine status
-    if similarity == 100.0:
-        status_class = "identical"
-        status_text = "✅ IDENTICAL"
-        status_desc = "PDFs contain exactly the same content"
+    if total == 0:
+        return 100.0
+    return 2.0 * matched / total * 100
+
+# Layers that can decide a comparison, cheapest first
+DECIDED_BY_FILE_HASH = "file hash"
+DECIDED_BY_PAGE_HASH = "page text hash"
+DECIDED_BY_MATCHER = "page-aligned sequence matcher"
+
+# Caps that keep the report small enough for a browser to open
+MAX_INLINE_HUNKS = 500
+
+def pages_reordered(page_deltas: Optional[List[dict]]) -> bool:
+    """Whether the page alignment found pages that left their place in the document"""
+    return any(delta['change'] == 'moved' for delta in page_deltas or ())
+
+def classify_similarity(similarity: float, page_deltas: Optional[List[dict]] = None) -> str:
+    """Map a similarity score to its status tier
+    
+    Reordered pages can match in full, but the documents are not identical then, so
+    they rank as ALMOST IDENTICAL at best.
+    """
+    if similarity == 100.0 and not pages_reordered(page_deltas):
+        return "IDENTICAL"
     elif similarity >= 95.0:
-        status_class = "almost-identical"
-        status_text = "✨ ALMOST IDENTICAL"
-        status_desc = "PDFs are very similar with minor differences"
+        return "ALMOST IDENTICAL"
     elif similarity >= 80.0:
-        status_class = "similar"
-        status_text = "⚠️ SIMILAR"
-        status_desc = "PDFs have noticeable differences"
-    else:
-        status_class = "different"
-        status_text = "❌ DIFFERENT"
-        status_desc = "PDFs have significant differences"
-    
-    html_content = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>PDF Comparison Report - {pdf1_name} vs {pdf2_name}</title>
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-        
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, Cantarell, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            padding: 20px;
-            color: #333;
-        }}
-        
-        .container {{
-            max-width: 1400px;
-            margin: 0 auto;
-            background: white;
-            border-radius: 20px;
-            box-shadow: 0 20px 60px rgba(0,0,0,0.3);
-            overflow: hidden;
-        }}
-        
-        .header {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 40px;
-            text-align: center;
-        }}
-        
-        .header h1 {{
-            font-size: 2.5em;
-            margin-bottom: 10px;
-            font-weight: 700;
-        }}
-        
-        .header p {{
-            font-size: 1.1em;
-            opacity: 0.95;
-        }}
-        
-        .timestamp {{
-            background: rgba(255,255,255,0.2);
-            display: inline-block;
-            padding: 8px 16px;
-            border-radius: 20px;
-            margin-top: 15px;
-            font-size: 0.9em;
-        }}
-        
-        .content {{
-            padding: 40px;
-        }}
-        
-        .status-banner {{
-            text-align: center;
-            padding: 30px;
-            border-radius: 15px;
-            margin-bottom: 40px;
-            box-shadow: 0 4px 15px rgba(0,0,0,0.1);
-        }}
-        
-        .status-banner.identical {{
-            background: linear-gradient(135deg, #11998e 0%, #38ef7d 100%);
-            color: white;
-        }}
-        
-        .status-banner.almost-identical {{
-            background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
-            color: white;
-        }}
-        
-        .status-banner.similar {{
-            background: linear-gradient(135deg, #fa709a 0%, #fee140 100%);
-            color: white;
-        }}
-        
-        .status-banner.different {{
-            background: linear-gradient(135deg, #ff6b6b 0%, #ee5a6f 100%);
-            color: white;
-        }}
-        
-        .status-banner h2 {{
-            font-size: 2.5em;
-            margin-bottom: 10px;
-        }}
-        
-        .status-banner p {{
-            font-size: 1.2em;
-            opacity: 0.95;
-        }}
-        
-        .similarity-score {{
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            gap: 20px;
-            margin: 30px 0;
-            padding: 30px;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            border-radius: 15px;
-            color: white;
-        }}
-        
-        .score-number {{
-            font-size: 4em;
-            font-weight: 700;
-        }}
-        
-        .progress-bar {{
-            flex: 1;
-            max-width: 600px;
-        }}
-        
-        .progress-bar-bg {{
-            width: 100%;
-            height: 30px;
-            background: rgba(255,255,255,0.3);
-            border-radius: 15px;
-            overflow: hidden;
-        }}
-        
-        .progress-bar-fill {{
-            height: 100%;
-            background: linear-gradient(90deg, #11998e 0%, #38ef7d 100%);
-            border-radius: 15px;
-            transition: width 1s ease;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            color: white;
-            font-weight: 600;
-        }}
-        
-        .stats-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-            gap: 20px;
-            margin: 40px 0;
-        }}
-        
-        .stat-card {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            padding: 25px;
-            border-radius: 15px;
-            color: white;
-            box-shadow: 0 4px 15px rgba(0,0,0,0.1);
-        }}
-        
-        .stat-card h3 {{
-            font-size: 1.1em;
-            margin-bottom: 15px;
-            opacity: 0.9;
-        }}
-        
-        .stat-value {{
-            font-size: 2em;
-            font-weight: 700;
-            margin-bottom: 5px;
-        }}
-        
-        .stat-label {{
-            font-size: 0.9em;
-            opacity: 0.8;
-        }}
-        
-        .file-comparison {{
-            display: grid;
-            grid-template-columns: 1fr 1fr;
-            gap: 20px;
-            margin: 40px 0;
-        }}
-        
-        .file-info {{
-            background: #f8f9fa;
-            padding: 25px;
-            border-radius: 15px;
-            border: 2px solid #e9ecef;
-        }}
-        
-        .file-info.pdf1 {{
-            border-color: #667eea;
-        }}
-        
-        .file-info.pdf2 {{
-            border-color: #764ba2;
-        }}
-        
-        .file-info h3 {{
-            color: #667eea;
-            margin-bottom: 15px;
-            font-size: 1.3em;
-        }}
-        
-        .file-info.pdf2 h3 {{
-            color: #764ba2;
-        }}
-        
-        .file-name {{
-            background: white;
-            padding: 15px;
-            border-radius: 10px;
-            margin-bottom: 15px;
-            font-weight: 600;
-            word-break: break-all;
-        }}
-        
-        .file-stats {{
-            display: flex;
-            flex-direction: column;
-            gap: 10px;
-        }}
-        
-        .file-stat {{
-            display: flex;
-            justify-content: space-between;
-            padding: 10px;
-            background: white;
-            border-radius: 8px;
-        }}
-        
-        .file-stat-label {{
-            color: #6c757d;
-        }}
-        
-        .file-stat-value {{
-            font-weight: 600;
-            color: #495057;
-        }}
-        
-        .diff-section {{
-            margin-top: 50px;
-        }}
-        
-        .diff-section h2 {{
-            font-size: 2em;
-            margin-bottom: 20px;
-            color: #333;
-        }}
-        
-        .diff-container {{
-            background: #f8f9fa;
-            border-radius: 15px;
-            padding: 20px;
-            overflow-x: auto;
-            box-shadow: inset 0 2px 10px rgba(0,0,0,0.05);
-        }}
-        
-        table.diff {{
-            width: 100%;
-            border-collapse: collapse;
-            font-family: 'Courier New', monospace;
-            font-size: 0.9em;
-            background: white;
-        }}
-        
-        table.diff td {{
-            padding: 8px;
-            border: 1px solid #dee2e6;
-            vertical-align: top;
-            line-height: 1.6;
-        }}
-        
-        table.diff th {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 12px;
-            font-weight: 600;
-            text-align: left;
-        }}
-        
-        .diff_add {{
-            background: #d4edda;
-            color: #155724;
-        }}
-        
-        .diff_sub {{
-            background: #f8d7da;
-            color: #721c24;
-        }}
-        
-        .diff_chg {{
-            background: #fff3cd;
-            color: #856404;
-        }}
-        
-        .diff_next {{
-            background: #e7f3ff;
-        }}
-        
-        .footer {{
-            text-align: center;
-            padding: 30px;
-            background: #f8f9fa;
-            color: #6c757d;
-            border-top: 2px solid #e9ecef;
-        }}
-        
-        @media (max-width: 768px) {{
-            .file-comparison {{
-                grid-template-columns: 1fr;
-            }}
-            
-            .similarity-score {{
-                flex-direction: column;
-            }}
-            
-            .score-number {{
-                font-size: 3em;
-            }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>📊 PDF Comparison Report</h1>
-            <p>Struts vs Angular - Detailed Content Analysis</p>
-            <div class="timestamp">
-                Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}
-            </div>
-        </div>
-        
-        <div class="content">
-            <div class="status-banner {status_class}">
-                <h2>{status_text}</h2>
-                <p>{status_desc}</p>
-            </div>
-            
-            <div class="similarity-score">
-                <div class="score-number">{similarity:.1f}%</div>
-                <div class="progress-bar">
-                    <div class="progress-bar-bg">
-                        <div class="progress-bar-fill" style="width: {similarity}%;">
-                            {similarity:.1f}% Match
-                        </div>
-                    </div>
-                </div>
-            </div>
-            
-            <div class="file-comparison">
-                <div class="file-info pdf1">
-                    <h3>📄 PDF 1 (Struts)</h3>
-                    <div class="file-name">{pdf1_name}</div>
-                    <div class="file-stats">
-                        <div class="file-stat">
-                            <span class="file-stat-label">Characters</span>
-                            <span class="file-stat-value">{stats1['chars']:,}</span>
-                        </div>
-                        <div class="file-stat">
-                            <span class="file-stat-label">Words</span>
-                            <span class="file-stat-value">{stats1['words']:,}</span>
-                        </div>
-                        <div class="file-stat">
-                            <span class="file-stat-label">Lines</span>
-                            <span class="file-stat-value">{stats1['lines']:,}</span>
-                        </div>
-                    </div>
-                </div>
-                
-                <div class="file-info pdf2">
-                    <h3>📄 PDF 2 (Angular)</h3>
-                    <div class="file-name">{pdf2_name}</div>
-                    <div class="file-stats">
-                        <div class="file-stat">
-                            <span class="file-stat-label">Characters</span>
-                            <span class="file-stat-value">{stats2['chars']:,}</span>
-                        </div>
-                        <div class="file-stat">
-                            <span class="file-stat-label">Words</span>
-                            <span class="file-stat-value">{stats2['words']:,}</span>
-                        </div>
-                        <div class="file-stat">
-                            <span class="file-stat-label">Lines</span>
-                            <span class="file-stat-value">{stats2['lines']:,}</span>
-                        </div>
-                    </div>
-                </div>
-            </div>
-            
-            <div class="stats-grid">
-                <div class="stat-card">
-                    <h3>📏 Character Difference</h3>
-                    <div class="stat-value">{char_diff:,}</div>
-                    <div class="stat-label">characters difference</div>
-                </div>
-                
-                <div class="stat-card">
-                    <h3>📝 Word Difference</h3>
-                    <div class="stat-value">{word_diff:,}</div>
-                    <div class="stat-label">words difference</div>
-                </div>
-                
-                <div class="stat-card">
-                    <h3>🎯 Match Quality</h3>
-                    <div class="stat-value">{similarity:.1f}%</div>
-                    <div class="stat-label">similarity score</div>
-                </div>
-            </div>
-            
-            {f'''
-            <div class="diff-section">
-                <h2>🔍 Detailed Line-by-Line Comparison</h2>
-                <div class="diff-container">
-                    {diff_html}
-                </div>
-            </div>
-            ''' if similarity < 100.0 else '<div class="diff-section"><h2>🎉 No Differences Found!</h2><p style="text-align:center; font-size:1.2em; color:#6c757d;">Both PDFs contain identical content.</p></div>'}
-        </div>
+        return "SIMILAR"
+    return "DIFFERENT"
+
+def _peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far, in MB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def _active_tracemalloc():
+    """The tracemalloc module if something in this process is tracing, else None"""
+    tracemalloc = sys.modules.get('tracemalloc')
+    return tracemalloc if tracemalloc is not None and tracemalloc.is_tracing() else None
+
+class StageTimer:
+    """Records wall time, CPU time and memory peaks for consecutive pipeline stages"""
+    
+    def __init__(self, trace_memory: bool = False):
+        self.stages: Dict[str, dict] = {}
+        self.page_times: Dict[str, List[float]] = {}
+        self.started = time.perf_counter()
+        # tracemalloc slows Python allocations noticeably, so it is opt-in
+        self._owns_tracing = False
+        if trace_memory:
+            import tracemalloc
+            self._owns_tracing = not tracemalloc.is_tracing()
+            if self._owns_tracing:
+                tracemalloc.start()
+        self.restart()
+    
+    def restart(self):
+        """Start measuring the next stage from now"""
+        tracemalloc = _active_tracemalloc()
+        if tracemalloc is not None:
+            tracemalloc.reset_peak()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+    
+    def end_stage(self, name: str):
+        """Record everything since the last mark as one stage"""
+        stats = self.stages.setdefault(name, {'wall': 0.0, 'cpu': 0.0})
+        stats['wall'] += time.perf_counter() - self._wall
+        stats['cpu'] += time.process_time() - self._cpu
+        stats['peak_rss_mb'] = _peak_rss_mb()
+        tracemalloc = _active_tracemalloc()
+        if tracemalloc is not None:
+            traced_peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            stats['traced_peak_mb'] = max(stats.get('traced_peak_mb', 0.0), traced_peak)
+        self.restart()
+    
+    def stop(self) -> Dict[str, float]:
+        """Finish measuring and return wall time per stage, plus the total"""
+        if self._owns_tracing:
+            sys.modules['tracemalloc'].stop()
+            self._owns_tracing = False
+        timings = {name: stats['wall'] for name, stats in self.stages.items()}
+        timings['total'] = time.perf_counter() - self.started
+        return timings
+
+# Bump when a scoring change makes previously stored results stale
+RESULT_STORE_VERSION = 5
+DEFAULT_RESULTS_DB = DEFAULT_CACHE_DIR / 'comparison-results.sqlite3'
+
+def result_config_key(engine: str = 'char',
+                      normalizer: Optional[NormalizationPipeline] = None,
+                      structure: bool = False,
+                      visual: Optional[VisualOptions] = None,
+                      align: str = 'sequence',
+                      extractor: Optional[str] = None) -> str:
+    """Identify everything besides the inputs that a stored result depends on
+    
+    The extractor is the backend key. Byte-identical inputs score the same with any
+    backend, so they pass none and looking them up never loads an extractor.
+    """
+    rules = normalizer.fingerprint() if normalizer is not None else 'default'
+    extractor = extractor or 'any-extractor'
+    key = f"{extractor}|results-{RESULT_STORE_VERSION}|{engine}|{rules}"
+    if structure:
+        key += LAYOUT_CACHE_VARIANT
+    if visual is not None:
+        key += visual.key()
+    if align != 'sequence':
+        key += f"/align-{align}"
+    return key
+
+class ResultStore:
+    """SQLite store of comparison results, keyed by both input hashes and the config key
+    
+    Every comparison, whether computed or reused, is also appended to a history table
+    so scores can be followed over time.
+    """
+    
+    # Per-run details that mean nothing once the result is reused
+    VOLATILE_FIELDS = ('timings', 'stages', 'page_timings', 'report_file', 'stored_at')
+    
+    def __init__(self, db_path: str = str(DEFAULT_RESULTS_DB)):
+        self.db_path = Path(db_path)
+    
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call keeps instances picklable for workers
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""CREATE TABLE IF NOT EXISTS results (
+                            hash1 TEXT NOT NULL,
+                            hash2 TEXT NOT NULL,
+                            config TEXT NOT NULL,
+                            result TEXT NOT NULL,
+                            stored_at TEXT NOT NULL,
+                            PRIMARY KEY (hash1, hash2, config))""")
+        conn.execute("""CREATE TABLE IF NOT EXISTS history (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            recorded_at TEXT NOT NULL,
+                            pdf1 TEXT NOT NULL,
+                            pdf2 TEXT NOT NULL,
+                            hash1 TEXT NOT NULL,
+                            hash2 TEXT NOT NULL,
+                            config TEXT NOT NULL,
+                            similarity REAL NOT NULL,
+                            status TEXT NOT NULL,
+                            decided_by TEXT NOT NULL,
+                            reused INTEGER NOT NULL)""")
+        return conn
+    
+    def get(self, hash1: str, hash2: str, config: str) -> Optional[Tuple[dict, str]]:
+        """Return a stored result and when it was stored, or None on a miss"""
+        with contextlib.closing(self._connect()) as conn:
+            row = conn.execute("SELECT result, stored_at FROM results "
+                               "WHERE hash1 = ? AND hash2 = ? AND config = ?",
+                               (hash1, hash2, config)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+    
+    def put(self, hash1: str, hash2: str, config: str, result: dict):
+        """Store a freshly computed result and record it in the history"""
+        kept = {key: value for key, value in result.items() if key not in self.VOLATILE_FIELDS}
+        now = datetime.now().isoformat(timespec='seconds')
+        with contextlib.closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                         (hash1, hash2, config, json.dumps(kept), now))
+            self._record(conn, now, hash1, hash2, config, result, reused=False)
+    
+    def record_reuse(self, hash1: str, hash2: str, config: str, result: dict):
+        """Record a result served from the store in the history"""
+        now = datetime.now().isoformat(timespec='seconds')
+        with contextlib.closing(self._connect()) as conn, conn:
+            self._record(conn, now, hash1, hash2, config, result, reused=True)
+    
+    @staticmethod
+    def _record(conn: sqlite3.Connection, now: str, hash1: str, hash2: str, config: str,
+                result: dict, reused: bool):
+        conn.execute("INSERT INTO history (recorded_at, pdf1, pdf2, hash1, hash2, config, "
+                     "similarity, status, decided_by, reused) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                     (now, result['pdf1'], result['pdf2'], hash1, hash2, config,
+                      result['similarity'], result['status'], result['decided_by'], int(reused)))
+    
+    def history(self, name: Optional[str] = None, limit: int = 20) -> List[dict]:
+        """Most recent history entries, optionally only pairs whose paths contain name"""
+        query = ("SELECT recorded_at, pdf1, pdf2, similarity, status, decided_by, reused, "
+                 "hash1, hash2, config FROM history")
+        params = []
+        if name:
+            query += " WHERE pdf1 LIKE ? OR pdf2 LIKE ?"
+            params += [f"%{name}%", f"%{name}%"]
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
         
-        <div class="footer">
-            <p>PDF Comparison Tool | Generated with Python & PyPDF2</p>
-            <p style="margin-top: 10px; font-size: 0.9em;">
-                Color Legend: 
-                <span style="background:#f8d7da; padding:4px 8px; border-radius:4px; margin:0 5px;">Removed</span>
-                <span style="background:#d4edda; padding:4px 8px; border-radius:4px; margin:0 5px;">Added</span>
-                <span style="background:#fff3cd; padding:4px 8px; border-radius:4px; margin:0 5px;">Changed</span>
-            </p>
-        </div>
-    </div>
-</body>
-</html>"""
-    
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(html_content)
-    
-    print(f"💾 HTML report saved to: {output_file}")
-
-def compare_pdfs(pdf1_path: str, pdf2_path: str, save_diff: bool = False):
-    """Main function to compare two PDFs"""
+        columns = ('recorded_at', 'pdf1', 'pdf2', 'similarity', 'status', 'decided_by',
+                   'reused', 'hash1', 'hash2', 'config')
+        if not self.db_path.exists():
+            return []
+        with contextlib.closing(self._connect()) as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [dict(zip(columns, row), reused=bool(row[6])) for row in rows]
+
+@dataclass
+class ComparisonResult:
+    """Structured outcome of one PDF comparison"""
+    pdf1: str
+    pdf2: str
+    similarity: float
+    status: str
+    decided_by: str
+    engine: str = 'char'
+    align: str = 'sequence'
+    extractor: Optional[str] = None
+    pages1: Optional[int] = None
+    pages2: Optional[int] = None
+    page_deltas: List[dict] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)
+    stages: Dict[str, dict] = field(default_factory=dict)
+    page_timings: Dict[str, List[float]] = field(default_factory=dict)
+    report_file: Optional[str] = None
+    stats1: Optional[dict] = None
+    stats2: Optional[dict] = None
+    score_bounds: Optional[List[float]] = None
+    pages_read: Optional[int] = None
+    stored_at: Optional[str] = None
+    layout_similarity: Optional[float] = None
+    layout_deltas: List[dict] = field(default_factory=list)
+    visual_similarity: Optional[float] = None
+    visual_deltas: List[dict] = field(default_factory=list)
+    
+    def to_dict(self) -> dict:
+        """Plain dict for JSON output, with rounded scores and timings"""
+        data = asdict(self)
+        data['similarity'] = round(self.similarity, 4)
+        data['timings'] = {stage: round(seconds, 4) for stage, seconds in self.timings.items()}
+        data['stages'] = {stage: {key: round(value, 4) if value is not None else None
+                                  for key, value in stats.items()}
+                          for stage, stats in self.stages.items()}
+        data['page_timings'] = {doc: [round(seconds, 5) for seconds in times]
+                                for doc, times in self.page_timings.items()}
+        if self.score_bounds is not None:
+            data['score_bounds'] = [round(bound, 4) for bound in self.score_bounds]
+        if self.layout_similarity is not None:
+            data['layout_similarity'] = round(self.layout_similarity, 4)
+        if self.visual_similarity is not None:
+            data['visual_similarity'] = round(self.visual_similarity, 4)
+        return data
+
+def reuse_stored_result(result_store: ResultStore, pdf1_path: str, pdf2_path: str,
+                        file_hash1: str, file_hash2: str, config_key: str,
+                        timer: StageTimer, report_file: Optional[str] = None,
+                        report_key: Optional[str] = None) -> Optional[ComparisonResult]:
+    """The stored result for unchanged inputs and config, with the reuse recorded
+    
+    Returns None when nothing is stored, or when a report_file is given that is not
+    a current report for report_key and the stored result. Raises sqlite3.Error when
+    the store cannot be read, so the caller can fall back to comparing.
+    """
+    stored = result_store.get(file_hash1, file_hash2, config_key)
+    if stored is None:
+        return None
+    
+    data, stored_at = stored
+    result = ComparisonResult(**{key: value for key, value in data.items()
+                                 if key in ComparisonResult.__dataclass_fields__})
+    if report_file is not None and not html_report_is_current(report_file, report_key, result):
+        return None
+    print(f"♻️  Inputs unchanged since {stored_at}, reusing the stored result")
+    result.pdf1, result.pdf2 = pdf1_path, pdf2_path
+    result.stored_at = stored_at
+    result.timings = timer.stop()
+    result.stages = timer.stages
+    print(f"\n📊 Similarity Score: {result.similarity:.2f}% ({result.status})")
+    print(f"   Decided by: {result.decided_by}")
+    print("="*70 + "\n")
+    try:
+        result_store.record_reuse(file_hash1, file_hash2, config_key, result.to_dict())
+    except sqlite3.Error as e:
+        print(f"⚠️  Could not update result history: {e}")
+    return result
+
+REPORT_KEY_META = "pdf-compare-key"
+
+def html_report_key(pdf1_path: str, pdf2_path: str, file_hash1: str, file_hash2: str,
+                    config_key: str, max_hunks: int, stylesheet: Optional[str]) -> str:
+    """Identify everything an HTML report's content depends on"""
+    parts = (Path(pdf1_path).name, Path(pdf2_path).name, file_hash1, file_hash2, config_key,
+             str(max_hunks), stylesheet or '')
+    return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()[:32]
+
+def html_report_is_current(output_file: str, report_key: str,
+                           result: ComparisonResult) -> bool:
+    """Whether output_file is a report written for exactly this report key
+    
+    The report is only current while the page fragments and visual overlays it links
+    to for the result's deltas are still in its "<report>_pages" directory.
+    """
+    try:
+        with open(output_file, 'rb') as f:
+            head = f.read(4096)
+    except OSError:
+        return False
+    if f'<meta name="{REPORT_KEY_META}" content="{report_key}">'.encode('ascii') not in head:
+        return False
+    assets = [f"change-{number:04d}.html" for number in range(1, len(result.page_deltas) + 1)]
+    assets += [f"visual-{delta['page']:04d}.png" for delta in result.visual_deltas
+               if delta['change'] == 'changed']
+    asset_dir = Path(output_file).with_name(Path(output_file).stem + "_pages")
+    return all((asset_dir / name).is_file() for name in assets)
+
+def compare_pdfs(pdf1_path: str, pdf2_path: str, save_diff: bool = False,
+                 extract_workers: Optional[int] = None,
+                 cache: Optional[ExtractionCache] = None,
+                 max_hunks: int = MAX_INLINE_HUNKS,
+                 trace_memory: bool = False,
+                 memory_budget_mb: Optional[int] = None,
+                 normalizer: Optional[NormalizationPipeline] = None,
+                 output_file: str = "pdf_comparison_report.html",
+                 engine: str = 'char',
+                 result_store: Optional[ResultStore] = None,
+                 structure: bool = False,
+                 visual: Optional[VisualOptions] = None,
+                 align: str = 'sequence',
+                 extractor: str = DEFAULT_EXTRACTOR,
+                 report_stylesheet: Optional[str] = None) -> ComparisonResult:
+    """Main function to compare two PDFs
+    
+    With a memory budget, raw and normalized page text of both PDFs share it equally
+    and pages beyond it are spilled to temporary files. The engine picks the unit the
+    score counts: characters, words or lines. With a result store, a pair whose inputs
+    and config are unchanged since a stored run is not compared again, unless an HTML
+    report is requested and output_file is not that run's report. With structure, page
+    layouts (text run positions, fonts and images) are compared too and scored
+    separately, and with visual options so are the rasterized pages. The minhash align mode pairs pages by content instead of order,
+    so reordered pages are reported as moved rather than as a long run of changes.
+    Both PDFs are always extracted by the one backend the extractor names. The HTML
+    report links to report_stylesheet when given, instead of embedding its styles.
+    """
     
     print("\n" + "="*70)
     print("📊 PDF COMPARISON TOOL - Struts vs Angular")
     print("="*70 + "\n")
     
-    # Extract text from both PDFs
-    print("Step 1: Extracting text from PDFs...")
-    text1 = extract_text_from_pdf(pdf1_path)
-    text2 = extract_text_from_pdf(pdf2_path)
+    timer = StageTimer(trace_memory)
+    page_counts = (None, None)
+    page_deltas = []
+    opcodes = None
+    # Resolved once for the pair, so both sides can never use different backends
+    backend = resolve_extractor(extractor)
+    stores = []
+    similarity_engine = SimilarityEngine(engine)
+    keep_lines = similarity_engine.keep_lines
+    normalize = normalizer.normalize if normalizer is not None else normalize_text
     
-    # Statistics
-    print("\n" + "-"*70)
-    print("📈 STATISTICS")
-    print("-"*70)
-    print(f"PDF 1 (Struts):")
-    print(f"  - Characters: {len(text1):,}")
-    print(f"  - Words: {len(text1.split()):,}")
-    print(f"  - Lines: {len(text1.splitlines()):,}")
+    def new_store() -> Optional[PageStore]:
+        if memory_budget_mb is None:
+            return None
+        stores.append(PageStore(memory_budget_mb * 1024 * 1024 // 4))
+        return stores[-1]
+    
+    # Byte-identical files need no extraction at all
+    print("Step 1: Checking file hashes...")
+    file_hash1 = file_sha256(pdf1_path)
+    file_hash2 = file_sha256(pdf2_path)
+    files_identical = file_hash1 == file_hash2
+    timer.end_stage('hash')
+    
+    config_key = result_config_key(engine, normalizer, structure, visual, align,
+                                   None if files_identical else backend.key)
+    report_key = (html_report_key(pdf1_path, pdf2_path, file_hash1, file_hash2, config_key,
+                                  max_hunks, report_stylesheet) if save_diff else None)
+    if result_store is not None:
+        try:
+            stored = reuse_stored_result(result_store, pdf1_path, pdf2_path,
+                                         file_hash1, file_hash2, config_key, timer,
+                                         output_file if save_diff else None, report_key)
+        except sqlite3.Error as e:
+            print(f"⚠️  Result store unavailable ({e}), comparing directly")
+            result_store = stored = None
+        if stored is not None:
+            if save_diff:
+                stored.report_file = output_file
+                print(f"💾 HTML report is up to date: {output_file}")
+            return stored
+    
+    if files_identical:
+        print("   Files are byte-identical")
+        # The report still needs the statistics, but one extraction serves both sides
+        timer.page_times['pdf1'] = []
+        if save_diff:
+            pages1 = pages2 = load_pages(pdf1_path, file_hash1, extract_workers, cache,
+                                         timer.page_times['pdf1'], backend=backend)
+            stats1 = stats2 = DocumentStats.from_pages(pages1)
+        else:
+            pages1 = pages2 = stats1 = stats2 = None
+        timer.end_stage('extract')
+        similarity = 100.0
+        decided_by = DECIDED_BY_FILE_HASH
+    else:
+        # Extract text from both PDFs
+        print(f"\nStep 2: Extracting text from PDFs with {backend.label}...")
+        timer.page_times['pdf1'] = []
+        timer.page_times['pdf2'] = []
+        pages1 = load_pages(pdf1_path, file_hash1, extract_workers, cache,
+                            timer.page_times['pdf1'], new_store(), backend)
+        pages2 = load_pages(pdf2_path, file_hash2, extract_workers, cache,
+                            timer.page_times['pdf2'], new_store(), backend)
+        page_counts = (len(pages1), len(pages2))
+        timer.end_stage('extract')
+        
+        # Counted once here, then reused by the console and the HTML report
+        stats1 = DocumentStats.from_pages(pages1)
+        stats2 = DocumentStats.from_pages(pages2)
+        timer.end_stage('stats')
+    
+    if stats1 is not None:
+        # Statistics
+        print("\n" + "-"*70)
+        print("📈 STATISTICS")
+        print("-"*70)
+        print(f"PDF 1 (Struts):")
+        print(f"  - Characters: {stats1.chars:,}")
+        print(f"  - Words: {stats1.words:,}")
+        print(f"  - Lines: {stats1.lines:,}")
+        
+        print(f"\nPDF 2 (Angular):")
+        print(f"  - Characters: {stats2.chars:,}")
+        print(f"  - Words: {stats2.words:,}")
+        print(f"  - Lines: {stats2.lines:,}")
     
-    print(f"\nPDF 2 (Angular):")
-    print(f"  - Characters: {len(text2):,}")
-    print(f"  - Words: {len(text2.split()):,}")
-    print(f"  - Lines: {len(text2.splitlines()):,}")
+    if not files_identical:
+        # Normalize texts
+        print("\nStep 3: Normalizing text and hashing pages...")
+        if memory_budget_mb is None:
+            norm_pages1 = [normalize(page, keep_lines) for page in pages1]
+            norm_pages2 = [normalize(page, keep_lines) for page in pages2]
+        else:
+            norm_pages1 = new_store()
+            norm_pages1.extend(normalize(page, keep_lines) for page in pages1)
+            norm_pages2 = new_store()
+            norm_pages2.extend(normalize(page, keep_lines) for page in pages2)
+        hashes1 = page_text_hashes(norm_pages1)
+        hashes2 = page_text_hashes(norm_pages2)
+        timer.end_stage('normalize')
+        
+        # Identical normalized pages settle the score without SequenceMatcher
+        if hashes1 == hashes2:
+            print("   All pages match after normalization")
+            similarity = 100.0
+            decided_by = DECIDED_BY_PAGE_HASH
+        else:
+            # Calculate similarity
+            print(f"Step 4: Calculating {engine}-level similarity on changed pages...")
+            if align == 'minhash':
+                opcodes = align_pages_minhash(norm_pages1, norm_pages2, hashes1, hashes2)
+            else:
+                opcodes = align_pages(hashes1, hashes2)
+            # Layouts are paired with the same page pairs the text is scored on
+            opcodes = split_replace_blocks(norm_pages1, norm_pages2, opcodes)
+            changed = sum(max(i2 - i1, j2 - j1) for tag, i1, i2, j1, j2 in opcodes
+                          if tag != 'equal')
+            print(f"   {changed} of {max(len(pages1), len(pages2))} page(s) differ")
+            similarity = calculate_page_aligned_similarity(norm_pages1, norm_pages2, opcodes,
+                                                           page_deltas, similarity_engine)
+            moves = {change: sum(delta[f'pages{side}'][1] - delta[f'pages{side}'][0] + 1
+                                 for delta in page_deltas if delta['change'] == change)
+                     for change, side in (('moved', 1), ('added', 2), ('removed', 1))}
+            if any(moves.values()):
+                print("   " + ", ".join(f"{count} {change}" for change, count in moves.items()
+                                        if count))
+            decided_by = similarity_engine.label
+            if align == 'minhash':
+                decided_by += " (minhash page matching)"
+            timer.end_stage('similarity')
     
-    # Normalize texts
-    print("\nStep 2: Normalizing text for comparison...")
-    norm_text1 = normalize_text(text1)
-    norm_text2 = normalize_text(text2)
+    layout_similarity = None
+    layout_deltas = []
+    if structure:
+        from compare_layout import (calculate_layout_similarity, describe_layout_delta,
+                                    load_page_layouts)
+        print("\nStep 5: Comparing page layouts...")
+        if files_identical:
+            layout_similarity = 100.0
+        else:
+            layouts1 = load_page_layouts(pdf1_path, file_hash1, extract_workers, cache)
+            layouts2 = load_page_layouts(pdf2_path, file_hash2, extract_workers, cache)
+            # Pages are paired the same way the text alignment paired them
+            layout_similarity = calculate_layout_similarity(
+                layouts1, layouts2, opcodes if opcodes is not None else align_pages(hashes1, hashes2),
+                layout_deltas)
+        timer.end_stage('layout')
     
-    # Calculate similarity
-    print("Step 3: Calculating similarity...")
-    similarity = calculate_similarity(norm_text1, norm_text2)
+    visual_similarity = None
+    visual_deltas = []
+    overlay_dir = Path(output_file).with_name(Path(output_file).stem + "_pages")
+    if visual is not None:
+        print("\nStep 6: Rasterizing and comparing pages visually...")
+        if files_identical:
+            visual_similarity = 100.0
+        else:
+            import tempfile
+            from compare_visual import calculate_visual_similarity, rasterize_pdf
+            with tempfile.TemporaryDirectory(prefix='pdf-compare-') as tmp:
+                images1 = rasterize_pdf(pdf1_path, Path(tmp), visual.dpi)
+                (Path(tmp) / 'b').mkdir()
+                images2 = rasterize_pdf(pdf2_path, Path(tmp) / 'b', visual.dpi)
+                visual_similarity = calculate_visual_similarity(
+                    images1, images2, overlay_dir if save_diff else None,
+                    visual.tolerance, visual_deltas)
+        timer.end_stage('visual')
     
     # Results
     print("\n" + "="*70)
@@ -571,6 +1568,17 @@ def compare_pdfs(pdf1_path: str, pdf2_path: str, save_diff: bool = False):
     print("="*70)
     
     print(f"\n📊 Similarity Score: {similarity:.2f}%")
+    print(f"   Decided by: {decided_by}")
+    if layout_similarity is not None:
+        print(f"🧱 Layout Similarity: {layout_similarity:.2f}% "
+              f"({len(layout_deltas)} page(s) with layout changes)")
+        for delta in layout_deltas[:10]:
+            print(f"   - {describe_layout_delta(delta)}")
+        if len(layout_deltas) > 10:
+            print(f"   … {len(layout_deltas) - 10} more")
+    if visual_similarity is not None:
+        print(f"🖼️  Visual Similarity: {visual_similarity:.2f}% "
+              f"({len(visual_deltas)} page(s) look different)")
     
     # Progress bar visualization
     bar_length = 50
@@ -578,8 +1586,10 @@ def compare_pdfs(pdf1_path: str, pdf2_path: str, save_diff: bool = False):
     bar = '█' * filled + '░' * (bar_length - filled)
     print(f"[{bar}] {similarity:.2f}%")
     
-    if similarity == 100.0:
+    if similarity == 100.0 and not pages_reordered(page_deltas):
         print("\n✅ PDFs are IDENTICAL! Content matches 100%")
+    elif similarity == 100.0:
+        print("\n✨ PDFs are ALMOST IDENTICAL: same content, but pages were reordered")
     elif similarity >= 95.0:
         print("\n✨ PDFs are ALMOST IDENTICAL (>95% match)")
     elif similarity >= 80.0:
@@ -588,26 +1598,30 @@ def compare_pdfs(pdf1_path: str, pdf2_path: str, save_diff: bool = False):
         print("\n❌ PDFs have SIGNIFICANT DIFFERENCES (<80% match)")
     
     # Character and word differences
-    char_diff = abs(len(text1) - len(text2))
-    word_diff = abs(len(text1.split()) - len(text2.split()))
+    if stats1 is not None:
+        char_diff = abs(stats1.chars - stats2.chars)
+        word_diff = abs(stats1.words - stats2.words)
+    else:
+        char_diff = word_diff = 0
     
     print(f"\n📏 Differences:")
     print(f"  - Character difference: {char_diff:,}")
     print(f"  - Word difference: {word_diff:,}")
     
     # Generate HTML report if requested
+    report_file = None
     if save_diff:
-        print("\nStep 4: Generating HTML report...")
-        diff_generator, lines1, lines2 = get_detailed_diff(text1, text2)
-        diff_html = diff_generator.make_table(lines1, lines2, 
-                                              fromdesc='PDF 1 (Struts)', 
-                                              todesc='PDF 2 (Angular)',
-                                              context=True,
-                                              numlines=3)
-        
-        output_file = "pdf_comparison_report.html"
-        generate_html_report(pdf1_path, pdf2_path, text1, text2, 
-                           similarity, diff_html, output_file)
+        from compare_report import generate_html_report
+        print("\nGenerating HTML report...")
+        timer.restart()
+        report_file = output_file
+        # Only the pages the similarity stage flagged are diffed
+        generate_html_report(pdf1_path, pdf2_path, similarity, output_file, decided_by, max_hunks,
+                             stats1, stats2, pages1, pages2, page_deltas,
+                             layout_similarity, layout_deltas,
+                             visual_similarity, visual_deltas, report_stylesheet,
+                             report_key=report_key)
+        timer.end_stage('report')
         
         print(f"\n🌐 Open the HTML file in your browser to view the detailed report!")
     else:
@@ -616,21 +1630,874 @@ def compare_pdfs(pdf1_path: str, pdf2_path: str, save_diff: bool = False):
     print("\n" + "="*70)
     print("✅ Comparison completed!")
     print("="*70 + "\n")
+    
+    for store in stores:
+        store.close()
+    
+    timings = timer.stop()
+    result = ComparisonResult(
+        pdf1=pdf1_path,
+        pdf2=pdf2_path,
+        similarity=similarity,
+        status=classify_similarity(similarity, page_deltas),
+        decided_by=decided_by,
+        engine=engine,
+        align=align,
+        extractor=backend.name,
+        pages1=page_counts[0],
+        pages2=page_counts[1],
+        page_deltas=page_deltas,
+        timings=timings,
+        stages=timer.stages,
+        page_timings={doc: times for doc, times in timer.page_times.items() if times},
+        report_file=report_file,
+        stats1=stats1.totals() if stats1 is not None else None,
+        stats2=stats2.totals() if stats2 is not None else None,
+        layout_similarity=layout_similarity,
+        layout_deltas=layout_deltas,
+        visual_similarity=visual_similarity,
+        visual_deltas=visual_deltas,
+    )
+    
+    if result_store is not None:
+        try:
+            result_store.put(file_hash1, file_hash2, config_key, result.to_dict())
+        except sqlite3.Error as e:
+            print(f"⚠️  Could not update result store: {e}")
+    return result
+
+DECIDED_BY_GATE = "page gate"
+
+def gate_pdfs(pdf1_path: str, pdf2_path: str, threshold: float,
+              trace_memory: bool = False,
+              normalizer: Optional[NormalizationPipeline] = None,
+              engine: str = 'char',
+              extractor: str = DEFAULT_EXTRACTOR) -> ComparisonResult:
+    """Decide whether two PDFs reach a similarity threshold, reading as few pages as possible
+    
+    Pages are read lazily in lockstep and page i is compared with page i. The gate
+    score weighs every page slot equally (pages missing from the shorter PDF score 0),
+    which is what makes its bounds provable after each page: unread pages can add at
+    most 100% each. Reading stops as soon as the bounds settle which side of the
+    threshold the score falls on.
+    """
+    print("\n" + "="*70)
+    print(f"🚦 PDF SIMILARITY GATE - threshold {threshold:.2f}%")
+    print("="*70 + "\n")
+    
+    timer = StageTimer(trace_memory)
+    page_deltas = []
+    similarity_engine = SimilarityEngine(engine)
+    normalize = normalizer.normalize if normalizer is not None else normalize_text
+    backend = resolve_extractor(extractor)
+    
+    if file_sha256(pdf1_path) == file_sha256(pdf2_path):
+        print("   Files are byte-identical")
+        timer.end_stage('hash')
+        return ComparisonResult(pdf1=pdf1_path, pdf2=pdf2_path, similarity=100.0,
+                                status=classify_similarity(100.0),
+                                decided_by=DECIDED_BY_FILE_HASH, engine=engine,
+                                extractor=backend.name, timings=timer.stop(),
+                                stages=timer.stages, score_bounds=[100.0, 100.0], pages_read=0)
+    timer.end_stage('hash')
+    
+    try:
+        count1, count2 = backend.page_count(pdf1_path), backend.page_count(pdf2_path)
+        with contextlib.closing(backend.iter_pages(pdf1_path, 0, count1)) as reader1, \
+                contextlib.closing(backend.iter_pages(pdf2_path, 0, count2)) as reader2:
+            slots = max(count1, count2)
+            common = min(count1, count2)
+            print(f"   Pages: {count1} vs {count2}")
+            
+            score_sum = 0.0
+            pages_read = 0
+            lower = upper = 100.0
+            timer.page_times['pdf1'] = []
+            timer.page_times['pdf2'] = []
+            
+            for index in range(common):
+                texts = []
+                for reader, times in ((reader1, timer.page_times['pdf1']),
+                                      (reader2, timer.page_times['pdf2'])):
+                    page_start = time.perf_counter()
+                    texts.append(normalize(next(reader), similarity_engine.keep_lines))
+                    times.append(time.perf_counter() - page_start)
+                page1, page2 = texts
+                pages_read += 1
+                
+                if page1 != page2:
+                    size = similarity_engine.size(page1) + similarity_engine.size(page2)
+                    matched = similarity_engine.matched(page1, page2)
+                    score_sum += 2.0 * matched / size if size else 1.0
+                    page_deltas.append(_page_delta('changed', index, index + 1,
+                                                   index, index + 1, matched, size))
+                else:
+                    score_sum += 1.0
+                
+                lower = score_sum / slots * 100
+                upper = (score_sum + common - pages_read) / slots * 100
+                print(f"   Page {pages_read}/{common}: score between "
+                      f"{lower:.2f}% and {upper:.2f}%", end='\r')
+                if lower >= threshold or upper < threshold:
+                    break
+            
+            print()  # New line after progress
+            if slots == 0:
+                lower = upper = 100.0
+            elif pages_read == common:
+                # Every page was read, so the bounds have collapsed onto the exact score
+                lower = upper = score_sum / slots * 100
+                if count1 != count2:
+                    page_deltas.append(_page_delta('removed' if count1 > count2 else 'added',
+                                                   common, count1, common, count2))
+    except Exception as e:
+        print(f"❌ Error reading PDFs: {e}")
+        sys.exit(1)
+    timer.end_stage('gate')
+    
+    passed = lower >= threshold
+    # Report the bound on the decided side of the threshold
+    similarity = lower if passed else upper
+    print(f"\n{'✅ PASS' if passed else '❌ FAIL'}: similarity "
+          f"{'≥' if passed else '<'} {threshold:.2f}% after reading {pages_read} of {slots} page(s)")
+    print("="*70 + "\n")
+    
+    return ComparisonResult(
+        pdf1=pdf1_path,
+        pdf2=pdf2_path,
+        similarity=similarity,
+        status=classify_similarity(similarity),
+        decided_by=DECIDED_BY_GATE,
+        engine=engine,
+        extractor=backend.name,
+        pages1=count1,
+        pages2=count2,
+        page_deltas=page_deltas,
+        timings=timer.stop(),
+        stages=timer.stages,
+        page_timings=timer.page_times,
+        score_bounds=[lower, upper],
+        pages_read=pages_read,
+    )
+
+def print_profile_summary(result: ComparisonResult, profiler: 'cProfile.Profile',
+                          profile_file: str, top: int = 10):
+    """Print per-stage measurements, the slowest pages and the hottest functions"""
+    print("\n" + "-"*70)
+    print("⏱️  PROFILE")
+    print("-"*70)
+    print(f"{'Stage':<12} {'Wall (s)':>10} {'CPU (s)':>10} {'Peak RSS (MB)':>14} {'Traced (MB)':>12}")
+    for stage, stats in result.stages.items():
+        rss = f"{stats['peak_rss_mb']:.1f}" if stats.get('peak_rss_mb') is not None else "-"
+        traced = f"{stats['traced_peak_mb']:.1f}" if 'traced_peak_mb' in stats else "-"
+        print(f"{stage:<12} {stats['wall']:>10.3f} {stats['cpu']:>10.3f} {rss:>14} {traced:>12}")
+    print(f"{'total':<12} {result.timings['total']:>10.3f}")
+    
+    for doc, times in result.page_timings.items():
+        slowest = sorted(range(len(times)), key=times.__getitem__, reverse=True)[:5]
+        pages = ", ".join(f"p{i + 1} {times[i] * 1000:.1f}ms" for i in slowest)
+        print(f"\nSlowest pages in {doc}: {pages}")
+    
+    print(f"\nTop {top} functions by cumulative time:")
+    stream = io.StringIO()
+    import pstats
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(top)
+    print(stream.getvalue().rstrip())
+    print(f"\n💾 Profile saved to: {profile_file} (open with python -m pstats)")
+
+def write_json_results(data: dict, output: str = '-'):
+    """Write results as JSON to a file, or stdout for '-'"""
+    text = json.dumps(data, indent=2)
+    if output == '-':
+        print(text)
+    else:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+
+def print_history(entries: List[dict]):
+    """Print recorded scores as a table, newest first"""
+    if not entries:
+        print("No recorded comparisons yet")
+        return
+    print(f"{'Recorded':<20} {'Score':>8}  {'Status':<16} {'Reused':<6}  Pair")
+    for entry in entries:
+        name = f"{Path(entry['pdf1']).name} vs {Path(entry['pdf2']).name}"
+        print(f"{entry['recorded_at']:<20} {entry['similarity']:>7.2f}%  {entry['status']:<16} "
+              f"{'yes' if entry['reused'] else 'no':<6}  {name}")
+
+def write_junit_results(results: List[dict], output: str = '-',
+                        fail_under: float = 80.0, elapsed: Optional[float] = None):
+    """Write results as a JUnit XML test suite, one test case per PDF pair"""
+    def seconds(r: dict) -> float:
+        return r.get('seconds', r.get('timings', {}).get('total', 0.0))
+    
+    failures = sum(1 for r in results if not r.get('error') and r['similarity'] < fail_under)
+    errors = sum(1 for r in results if r.get('error'))
+    if elapsed is None:
+        elapsed = sum(seconds(r) for r in results)
+    
+    import xml.etree.ElementTree as ET
+    
+    suite = ET.Element('testsuite', name="pdf-comparison", tests=str(len(results)),
+                       failures=str(failures), errors=str(errors), time=f"{elapsed:.3f}")
+    for r in results:
+        case = ET.SubElement(suite, 'testcase', classname="pdf-comparison",
+                             name=f"{Path(r['pdf1']).name} vs {Path(r['pdf2']).name}",
+                             time=f"{seconds(r):.3f}")
+        properties = ET.SubElement(case, 'properties')
+        for key in ('similarity', 'status', 'decided_by', 'pdf1', 'pdf2'):
+            if r.get(key) is not None:
+                ET.SubElement(properties, 'property', name=key, value=str(r[key]))
+        
+        if r.get('error'):
+            ET.SubElement(case, 'error', message=r['error'])
+        elif r['similarity'] < fail_under:
+            failure = ET.SubElement(case, 'failure',
+                                    message=f"Similarity {r['similarity']:.2f}% is below "
+                                            f"{fail_under:.2f}% ({r['status']})")
+            failure.text = "\n".join(
+                f"{d['change']}: PDF 1 pages {d['pages1']} / PDF 2 pages {d['pages2']} "
+                f"({d['similarity']:.2f}%)" for d in r.get('page_deltas', []))
+        ET.SubElement(case, 'system-out').text = json.dumps(r, indent=2)
+    
+    ET.indent(suite)
+    xml = ET.tostring(suite, encoding='unicode', xml_declaration=True)
+    if output == '-':
+        print(xml)
+    else:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(xml + "\n")
+
+def collect_directory_pairs(dir1: str, dir2: str) -> List[Tuple[str, str]]:
+    """Pair PDFs with the same file name in two directories"""
+    for directory in (dir1, dir2):
+        if not Path(directory).is_dir():
+            print(f"❌ Error: Directory not found - {directory}")
+            sys.exit(1)
+    
+    candidates = {p.name.lower(): p for p in Path(dir2).iterdir()
+                  if p.is_file() and p.suffix.lower() == '.pdf'}
+    pairs = []
+    for pdf1 in sorted(Path(dir1).iterdir()):
+        if not pdf1.is_file() or pdf1.suffix.lower() != '.pdf':
+            continue
+        pdf2 = candidates.pop(pdf1.name.lower(), None)
+        if pdf2 is None:
+            print(f"⚠️  No match in {dir2} for {pdf1.name}, skipping")
+            continue
+        pairs.append((str(pdf1), str(pdf2)))
+    
+    for name in sorted(candidates):
+        print(f"⚠️  No match in {dir1} for {candidates[name].name}, skipping")
+    
+    return pairs
+
+def load_manifest(manifest_path: str) -> List[Tuple[str, str]]:
+    """Read PDF pairs from a two-column CSV manifest (relative paths resolve against it)"""
+    import csv
+    
+    base_dir = Path(manifest_path).parent
+    pairs = []
+    try:
+        with open(manifest_path, newline='', encoding='utf-8') as file:
+            for line_num, row in enumerate(csv.reader(file), 1):
+                row = [cell.strip() for cell in row]
+                if not row or not row[0] or row[0].startswith('#'):
+                    continue
+                if len(row) < 2:
+                    print(f"⚠️  Manifest line {line_num} needs two paths, skipping")
+                    continue
+                pairs.append((str(base_dir / row[0]), str(base_dir / row[1])))
+    except OSError as e:
+        print(f"❌ Error reading {manifest_path}: {e}")
+        sys.exit(1)
+    return pairs
+
+@dataclass
+class CompareOptions:
+    """Settings shared by every pair of a batch, watch, matrix or service run
+    
+    Pool workers get one of these instead of a growing list of positional arguments,
+    so a new setting only needs a field here and a use in the worker.
+    """
+    cache: Optional[ExtractionCache] = None
+    normalizer: Optional[NormalizationPipeline] = None
+    engine: str = 'char'
+    result_store: Optional[ResultStore] = None
+    structure: bool = False
+    visual: Optional[VisualOptions] = None
+    align: str = 'sequence'
+    extractor: str = DEFAULT_EXTRACTOR
+    # Detail pages link to this stylesheet instead of embedding their styles
+    report_stylesheet: Optional[str] = None
+
+def _compare_pair_worker(pair: Tuple[str, str], options: CompareOptions,
+                         report_file: Optional[str] = None) -> dict:
+    """Compare one pair inside a pool worker, capturing its console output
+    
+    An HTML report is written only when a report_file is given.
+    """
+    # The batch pool already uses every core, so extract pages serially
+    return _captured_pair_result(pair, lambda: compare_pdfs(
+        pair[0], pair[1], save_diff=report_file is not None, extract_workers=1,
+        cache=options.cache, normalizer=options.normalizer,
+        output_file=report_file or "pdf_comparison_report.html", engine=options.engine,
+        result_store=options.result_store, structure=options.structure,
+        visual=options.visual, align=options.align, extractor=options.extractor,
+        report_stylesheet=options.report_stylesheet))
+
+def _captured_pair_result(pair: Tuple[str, str],
+                          compare: Callable[[], ComparisonResult]) -> dict:
+    """Run one pair's comparison with its console output captured, as a batch result
+    
+    Errors end up in the result instead of escaping the pool worker.
+    """
+    pdf1_path, pdf2_path = pair
+    result = {
+        'pdf1': pdf1_path,
+        'pdf2': pdf2_path,
+        'similarity': None,
+        'status': 'ERROR',
+        'error': None,
+    }
+    
+    start = time.perf_counter()
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            comparison = compare()
+        result.update(comparison.to_dict())
+    except SystemExit:
+        # Extraction reports read errors on stdout before exiting
+        lines = [line for line in output.getvalue().splitlines() if line.strip()]
+        result['error'] = lines[-1].lstrip('❌ ') if lines else 'comparison aborted'
+    except Exception as e:
+        result['error'] = str(e)
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    
+    return result
+
+def run_batch(pairs: List[Tuple[str, str]], options: Optional[CompareOptions] = None,
+              workers: Optional[int] = None,
+              summary_file: str = "pdf_batch_summary.json",
+              dashboard_dir: Optional[str] = None) -> dict:
+    """Compare many PDF pairs in a process pool and write an aggregate summary
+    
+    With a dashboard directory, the workers also write a detail page per pair into it,
+    and an index.html dashboard of all pairs is written at the end.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    
+    workers = workers or os.cpu_count() or 1
+    options = _dashboard_options(options, dashboard_dir)
+    
+    print("\n" + "="*70)
+    print("📊 PDF COMPARISON TOOL - Batch Mode")
+    print("="*70 + "\n")
+    print(f"Comparing {len(pairs)} pair(s) with {workers} worker(s)...\n")
+    
+    start = time.perf_counter()
+    results = []
+    
+    # Workers stay alive across pairs, so PyPDF2 is imported once per process
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_compare_pair_worker, pair, options,
+                                   _dashboard_report_file(dashboard_dir, pair))
+                   for pair in pairs]
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            results.append(result)
+            _print_pair_result(result, f"[{done}/{len(pairs)}]")
+    
+    return _finish_batch(results, workers, time.perf_counter() - start, summary_file,
+                         dashboard_dir)
+
+def _dashboard_report_file(dashboard_dir: Optional[str], pair: Tuple[str, str]) -> Optional[str]:
+    """Where a pair's detail page goes in the dashboard, or None without one"""
+    if dashboard_dir is None:
+        return None
+    from compare_report import pair_report_name
+    return str(Path(dashboard_dir) / pair_report_name(*pair))
+
+def _dashboard_options(options: Optional[CompareOptions],
+                       dashboard_dir: Optional[str]) -> CompareOptions:
+    """Prepare the dashboard directory, if any, and link detail pages to its stylesheet"""
+    options = options or CompareOptions()
+    if dashboard_dir is None:
+        return options
+    from compare_report import DASHBOARD_STYLESHEET, prepare_dashboard
+    prepare_dashboard(dashboard_dir)
+    return replace(options, report_stylesheet=DASHBOARD_STYLESHEET)
+
+def _print_pair_result(result: dict, prefix: str):
+    """Print one streamed batch result line"""
+    name = f"{Path(result['pdf1']).name} vs {Path(result['pdf2']).name}"
+    if result['error']:
+        print(f"{prefix} ❌ {name}: {result['error']}")
+    else:
+        reused = " ♻️  unchanged" if result.get('stored_at') else ""
+        print(f"{prefix} {result['similarity']:6.2f}% "
+              f"{result['status']:<16} {name} ({result['seconds']:.2f}s){reused}")
+    sys.stdout.flush()
+
+def _finish_batch(results: List[dict], workers: int, elapsed: float,
+                  summary_file: str, dashboard_dir: Optional[str] = None) -> dict:
+    """Write the aggregate summary of a batch or watch run and print its totals"""
+    scored = [r['similarity'] for r in results if r['error'] is None]
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+    
+    summary = {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'pairs': len(results),
+        'workers': workers,
+        'elapsed_seconds': round(elapsed, 3),
+        'status_counts': counts,
+        'reused': sum(1 for r in results if r.get('stored_at')),
+        'mean_similarity': round(sum(scored) / len(scored), 4) if scored else None,
+        'min_similarity': min(scored) if scored else None,
+        'results': sorted(results, key=lambda r: (r['pdf1'], r['pdf2'])),
+    }
+    
+    with open(summary_file, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+    
+    print("\n" + "-"*70)
+    print("📈 BATCH SUMMARY")
+    print("-"*70)
+    for status in ("IDENTICAL", "ALMOST IDENTICAL", "SIMILAR", "DIFFERENT", "ERROR"):
+        if status in counts:
+            print(f"  - {status}: {counts[status]}")
+    if scored:
+        print(f"  - Mean similarity: {summary['mean_similarity']:.2f}%")
+    if summary['reused']:
+        print(f"  - Reused unchanged results: {summary['reused']}")
+    print(f"  - Elapsed: {elapsed:.2f}s")
+    print(f"\n💾 Batch summary saved to: {summary_file}")
+    if dashboard_dir is not None:
+        from compare_report import write_dashboard
+        write_dashboard(summary, dashboard_dir)
+    print("="*70 + "\n")
+    
+    return summary
+
+def _ignore_sigint():
+    """Pool initializer: leave Ctrl+C to the parent, which shuts the pool down"""
+    import signal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _scan_pdfs(directory: str, pair_key) -> Dict[str, Tuple[Path, float, int]]:
+    """Map pairing keys to (path, mtime, size) for the PDFs directly inside a directory"""
+    found = {}
+    try:
+        entries = list(Path(directory).iterdir())
+    except OSError:
+        return found
+    for path in entries:
+        if path.suffix.lower() != '.pdf':
+            continue
+        try:
+            stat = path.stat()
+        except OSError:
+            # Deleted or renamed between listing and stat
+            continue
+        if path.is_file():
+            found[pair_key(path)] = (path, stat.st_mtime, stat.st_size)
+    return found
+
+def watch_directories(baseline_dir: str, downloads_dir: str,
+                      options: Optional[CompareOptions] = None,
+                      workers: Optional[int] = None,
+                      summary_file: str = "pdf_batch_summary.json",
+                      pair_key_pattern: Optional[str] = None,
+                      poll_interval: float = 1.0,
+                      idle_exit: Optional[float] = None,
+                      dashboard_dir: Optional[str] = None) -> dict:
+    """Compare PDFs as soon as both sides of a pair exist, until interrupted or idle
+    
+    Files pair up by lower-cased file stem, after removing pair_key_pattern matches.
+    A pair is compared once its files look the same on two consecutive scans, so a
+    download still being written is not picked up, and compared again whenever
+    either file changes. One process pool and the extraction cache stay warm for
+    the whole run. A dashboard gets each pair's latest detail page as it is compared,
+    and its index when the run ends.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    
+    for directory in (baseline_dir, downloads_dir):
+        if not Path(directory).is_dir():
+            print(f"❌ Error: Directory not found - {directory}")
+            sys.exit(1)
+    
+    key_re = re.compile(pair_key_pattern) if pair_key_pattern else None
+    
+    def pair_key(path: Path) -> str:
+        stem = key_re.sub('', path.stem) if key_re else path.stem
+        return stem.lower()
+    
+    workers = workers or os.cpu_count() or 1
+    options = _dashboard_options(options, dashboard_dir)
+    
+    print("\n" + "="*70)
+    print("👀 PDF COMPARISON TOOL - Watch Mode")
+    print("="*70 + "\n")
+    print(f"Watching {downloads_dir} against {baseline_dir} with {workers} worker(s)")
+    print("Press Ctrl+C to stop and write the summary\n")
+    
+    start = time.perf_counter()
+    last_activity = time.monotonic()
+    previous = {}
+    compared = {}
+    pending = {}
+    results = {}
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=_ignore_sigint) as executor:
+        try:
+            while True:
+                baseline = _scan_pdfs(baseline_dir, pair_key)
+                downloads = _scan_pdfs(downloads_dir, pair_key)
+                
+                current = {}
+                for key in sorted(baseline.keys() & downloads.keys()):
+                    pdf1, mtime1, size1 = baseline[key]
+                    pdf2, mtime2, size2 = downloads[key]
+                    signature = (mtime1, size1, mtime2, size2)
+                    current[key] = signature
+                    
+                    if previous.get(key) == signature and compared.get(key) != signature:
+                        compared[key] = signature
+                        pair = (str(pdf1), str(pdf2))
+                        future = executor.submit(_compare_pair_worker, pair, options,
+                                                 _dashboard_report_file(dashboard_dir, pair))
+                        pending[future] = key
+                        last_activity = time.monotonic()
+                previous = current
+                
+                for future in [f for f in pending if f.done()]:
+                    key = pending.pop(future)
+                    results[key] = future.result()
+                    _print_pair_result(results[key], f"[{datetime.now():%H:%M:%S}]")
+                    last_activity = time.monotonic()
+                
+                if (idle_exit is not None and not pending
+                        and time.monotonic() - last_activity >= idle_exit):
+                    print(f"\n💤 No new PDFs for {idle_exit:g}s, stopping")
+                    break
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            print("\n🛑 Stopping, waiting for running comparisons...")
+            for future in pending:
+                future.cancel()
+    
+    for future, key in pending.items():
+        if future.done() and not future.cancelled():
+            results[key] = future.result()
+    
+    return _finish_batch(list(results.values()), workers,
+                         time.perf_counter() - start, summary_file, dashboard_dir)
+
+# Default port of compare_service, kept here for the --port default
+DEFAULT_SERVICE_PORT = 8765
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    """Build the command line parser"""
+    parser = argparse.ArgumentParser(
+        prog="compare.py",
+        description="PDF Comparison Tool - Struts vs Angular",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""Examples:
+  python compare.py struts.pdf angular.pdf
+  python compare.py struts.pdf angular.pdf --save-diff
+  python compare.py --batch struts/ angular/ --workers 8
+  python compare.py --manifest pairs.csv --summary nightly.json --dashboard nightly-report/
+  python compare.py --matrix struts.pdf angular-en.pdf angular-de.pdf angular-fr.pdf
+  python compare.py --watch baselines/ cypress/downloads/ --idle-exit 120
+  python compare.py --serve --port 8765 --workers 4
+  python compare.py --history statement --history-limit 50
+  python compare.py baselines/images/ cypress/downloads/images/ --visual --save-diff
+  python compare.py struts.pdf angular.pdf --align minhash
+  python compare.py struts.pdf angular.pdf --format junit --output allure-results/pdf-compare.xml
+
+For many short runs, use "python -m compare" from this directory: Python caches the
+module's bytecode, but recompiles a script given by path on every start.""")
+    parser.add_argument('pdf1_path', nargs='?', help="PDF 1 (Struts)")
+    parser.add_argument('pdf2_path', nargs='?', help="PDF 2 (Angular)")
+    parser.add_argument('--save-diff', action='store_true',
+                        help="generate an HTML report")
+    parser.add_argument('--max-hunks', type=int, default=MAX_INLINE_HUNKS, metavar='N',
+                        help="cap on change hunks rendered inline in the HTML report (default: %(default)s)")
+    parser.add_argument('--extract-workers', type=int, default=None, metavar='N',
+                        help="processes used to extract pages of large PDFs (default: CPU count)")
+    parser.add_argument('--normalize-config', metavar='FILE',
+                        help="JSON file with normalization rules: unicode form, header/footer "
+                             "lines, drop_lines patterns and masks (see normalize.example.json)")
+    parser.add_argument('--engine', choices=SimilarityEngine.NAMES, default='char',
+                        help="unit the similarity score counts: characters (SequenceMatcher), "
+                             "or words / lines diffed as interned token ids with Myers' "
+                             "O(ND) algorithm, which is much faster (default: %(default)s)")
+    parser.add_argument('--extractor', choices=EXTRACTOR_CHOICES, default=DEFAULT_EXTRACTOR,
+                        help="text extraction backend: pdftotext (poppler), pypdf, PyPDF2 or "
+                             "pdfminer.six; auto picks the fastest one installed, in that "
+                             "order, though scores can differ between backends "
+                             "(default: %(default)s)")
+    parser.add_argument('--align', choices=ALIGN_MODES, default='sequence',
+                        help="pair pages in document order (sequence), or by content with "
+                             "MinHash/LSH so moved, inserted and deleted pages are reported "
+                             "as such (minhash)")
+    parser.add_argument('--structure', action='store_true',
+                        help="also compare page layouts: text run positions, fonts and "
+                             "image hashes, reported per page with a layout similarity score")
+    parser.add_argument('--visual', action='store_true',
+                        help="also compare rendered pages in tiles (needs numpy and Pillow, "
+                             "plus pdftoppm for PDFs); PNG files or directories of PNGs "
+                             "are compared directly")
+    parser.add_argument('--visual-dpi', type=int, default=VISUAL_DPI, metavar='DPI',
+                        help="resolution PDFs are rasterized at (default: %(default)s)")
+    parser.add_argument('--visual-tolerance', type=int, default=VISUAL_TOLERANCE, metavar='N',
+                        help="per-channel difference a pixel may have and still match "
+                             "(default: %(default)s)")
+    parser.add_argument('--memory-budget', type=int, default=None, metavar='MB',
+                        help="keep at most MB of extracted page text in memory and spill "
+                             "the rest to temporary files (bypasses the extraction cache)")
+    parser.add_argument('--profile', metavar='FILE',
+                        help="dump cProfile stats to FILE and print per-stage timing and "
+                             "memory (pages extracted in worker processes are timed but not profiled)")
+    
+    results = parser.add_argument_group("results output")
+    results.add_argument('--format', choices=('text', 'json', 'junit'), default='text',
+                         help="text console report, or machine-readable JSON / JUnit XML")
+    results.add_argument('--output', default='-', metavar='FILE',
+                         help="where to write JSON / JUnit results (default: stdout, "
+                              "with the console report moved to stderr)")
+    results.add_argument('--gate', type=float, default=None, metavar='PCT',
+                         help="pass/fail mode: read pages lazily and stop as soon as the "
+                              "score is provably above or below PCT (implies --fail-under PCT)")
+    results.add_argument('--fail-under', type=float, default=None, metavar='PCT',
+                         help="exit with status 1 when a similarity score is below PCT; "
+                              "JUnit failures use this threshold too (default: 80)")
+    
+    caching = parser.add_argument_group("extraction cache")
+    caching.add_argument('--no-cache', action='store_true',
+                         help="bypass the extracted-text cache")
+    caching.add_argument('--clear-cache', action='store_true',
+                         help="empty the extracted-text cache before running")
+    caching.add_argument('--cache-dir', default=str(DEFAULT_CACHE_DIR), metavar='DIR',
+                         help="cache location (default: %(default)s)")
+    caching.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE_MB, metavar='MB',
+                         help="evict least recently used entries beyond this size (default: %(default)s)")
+    
+    stored = parser.add_argument_group("result store")
+    stored.add_argument('--no-store', action='store_true',
+                        help="always compare, without reusing or recording stored results")
+    stored.add_argument('--results-db', default=str(DEFAULT_RESULTS_DB), metavar='FILE',
+                        help="SQLite store of results keyed by input hashes and config "
+                             "(default: %(default)s)")
+    stored.add_argument('--history', nargs='?', const='', default=None, metavar='NAME',
+                        help="print recorded scores, newest first, optionally only for "
+                             "pairs whose paths contain NAME, and exit")
+    stored.add_argument('--history-limit', type=int, default=20, metavar='N',
+                        help="history entries to show (default: %(default)s)")
+    
+    batch = parser.add_argument_group("batch mode")
+    batch.add_argument('--batch', nargs=2, metavar=('STRUTS_DIR', 'ANGULAR_DIR'),
+                       help="compare every PDF in two directories, paired by file name")
+    batch.add_argument('--manifest', metavar='FILE',
+                       help="CSV file with one 'pdf1,pdf2' pair per line")
+    batch.add_argument('--watch', nargs=2, metavar=('STRUTS_DIR', 'DOWNLOADS_DIR'),
+                       help="keep running and compare PDFs as they appear in DOWNLOADS_DIR")
+    batch.add_argument('--matrix', nargs='+', metavar='PDF',
+                       help="compare the first PDF (the baseline) against each of the others "
+                            "in parallel, preparing the baseline only once, and rank them; "
+                            "--save-diff writes the matrix as pdf_matrix_report.html")
+    batch.add_argument('--all-pairs', action='store_true',
+                       help="matrix mode: compare every PDF against every other instead")
+    batch.add_argument('--pair-key', metavar='REGEX',
+                       help="watch mode: remove REGEX matches from file stems before pairing, "
+                            "e.g. '[-_](struts|angular)$'")
+    batch.add_argument('--poll-interval', type=float, default=1.0, metavar='SECONDS',
+                       help="watch mode: seconds between directory scans (default: %(default)s)")
+    batch.add_argument('--idle-exit', type=float, default=None, metavar='SECONDS',
+                       help="watch mode: stop after SECONDS without new PDFs or running comparisons")
+    batch.add_argument('--dashboard', metavar='DIR',
+                       help="write an index.html dashboard of all pairs, sortable by score, "
+                            "status and time, to DIR, with a detail page per pair (batch, "
+                            "manifest and watch mode) sharing one stylesheet")
+    batch.add_argument('--workers', type=int, default=None,
+                       help="worker processes for batch and matrix mode (default: CPU count)")
+    batch.add_argument('--summary', default="pdf_batch_summary.json", metavar='FILE',
+                       help="aggregate JSON summary for batch mode")
+    
+    service = parser.add_argument_group("service mode")
+    service.add_argument('--serve', action='store_true',
+                         help="run a local HTTP service that queues comparison jobs for a "
+                              "warm pool of --workers processes")
+    service.add_argument('--host', default="127.0.0.1",
+                         help="address to listen on (default: %(default)s)")
+    service.add_argument('--port', type=int, default=DEFAULT_SERVICE_PORT,
+                         help="port to listen on (default: %(default)s)")
+    service.add_argument('--queue-size', type=int, default=100, metavar='N',
+                         help="jobs waiting beyond N are rejected with 503 (default: %(default)s)")
+    service.add_argument('--report-dir', default="pdf-reports", metavar='DIR',
+                         help="where HTML reports of save_diff jobs are written "
+                              "(default: %(default)s); --save-diff makes that the default")
+    return parser
 
 def main():
     """Main entry point"""
     
-    # Check command line arguments
-    if len(sys.argv) < 3:
-        print("Usage: python pdf_compare.py <pdf1_path> <pdf2_path> [--save-diff]")
-        print("\nExample:")
-        print("  python pdf_compare.py struts.pdf angular.pdf")
-        print("  python pdf_compare.py struts.pdf angular.pdf --save-diff")
+    parser = build_arg_parser()
+    args = parser.parse_args()
+    
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.extract_workers is not None and args.extract_workers < 1:
+        parser.error("--extract-workers must be at least 1")
+    if args.max_hunks < 0:
+        parser.error("--max-hunks cannot be negative")
+    if args.memory_budget is not None and args.memory_budget < 1:
+        parser.error("--memory-budget must be at least 1 MB")
+    
+    cache = None if args.no_cache else ExtractionCache(args.cache_dir, args.cache_size)
+    normalizer = (NormalizationPipeline.from_file(args.normalize_config)
+                  if args.normalize_config else None)
+    # Keep stdout clean when it carries machine-readable results
+    if args.format != 'text' and args.output == '-':
+        console = contextlib.redirect_stdout(sys.stderr)
+    else:
+        console = contextlib.nullcontext()
+    if args.clear_cache:
+        ExtractionCache(args.cache_dir, args.cache_size).clear()
+        with console:
+            print(f"🧹 Extraction cache cleared: {args.cache_dir}")
+        if not (args.pdf1_path or args.batch or args.manifest or args.watch or args.serve
+                or args.matrix):
+            sys.exit(0)
+    if args.gate is not None:
+        if args.batch or args.manifest or args.watch or args.matrix:
+            parser.error("--gate only applies to a single PDF pair")
+        if args.structure or args.visual or args.align != 'sequence':
+            parser.error("--structure, --visual and --align cannot be combined with --gate")
+        args.fail_under = args.gate
+    junit_threshold = args.fail_under if args.fail_under is not None else 80.0
+    result_store = None if args.no_store else ResultStore(args.results_db)
+    if args.visual_dpi < 1 or not 0 <= args.visual_tolerance <= 255:
+        parser.error("--visual-dpi must be positive and --visual-tolerance within 0-255")
+    visual = VisualOptions(args.visual_dpi, args.visual_tolerance) if args.visual else None
+    
+    if args.history is not None:
+        if args.history_limit < 1:
+            parser.error("--history-limit must be at least 1")
+        if args.format == 'junit':
+            parser.error("--history supports --format text or json")
+        try:
+            entries = ResultStore(args.results_db).history(args.history or None,
+                                                           args.history_limit)
+        except sqlite3.Error as e:
+            print(f"❌ Error reading result history {args.results_db}: {e}")
+            sys.exit(1)
+        if args.format == 'json':
+            write_json_results({'history': entries}, args.output)
+        else:
+            print_history(entries)
+        sys.exit(0)
+    
+    # Settle 'auto' once so every worker and pair uses the same backend
+    with console:
+        extractor = resolve_extractor(args.extractor).name
+    options = CompareOptions(cache, normalizer, args.engine, result_store, args.structure,
+                             visual, args.align, extractor)
+    
+    if args.serve:
+        if (args.pdf1_path or args.batch or args.manifest or args.watch or args.matrix
+                or args.gate is not None):
+            parser.error("--serve takes no PDF paths and no other mode")
+        if args.queue_size < 1:
+            parser.error("--queue-size must be at least 1")
+        from compare_service import run_service
+        run_service(args.host, args.port, options, args.workers, args.queue_size,
+                    args.report_dir, args.save_diff)
+        sys.exit(0)
+    
+    if args.all_pairs and not args.matrix:
+        parser.error("--all-pairs only applies to --matrix")
+    if args.dashboard and not (args.batch or args.manifest or args.watch):
+        parser.error("--dashboard only applies to --batch, --manifest and --watch; "
+                     "use --save-diff for a --matrix report")
+    if args.matrix:
+        if args.pdf1_path or args.batch or args.manifest or args.watch:
+            parser.error("--matrix takes its PDFs as arguments and no other mode")
+        if len(args.matrix) < 2 or len(set(args.matrix)) < len(args.matrix):
+            parser.error("--matrix needs at least two different PDFs")
+        if args.structure or args.visual or args.memory_budget is not None:
+            parser.error("--structure, --visual and --memory-budget cannot be combined "
+                         "with --matrix")
+        from compare_matrix import generate_matrix_report, run_matrix
+        with console:
+            if args.profile:
+                print("⚠️  --profile is not supported in matrix mode, ignoring it")
+            summary = run_matrix(args.matrix, options, args.all_pairs, args.workers,
+                                 args.extract_workers)
+            if args.save_diff:
+                generate_matrix_report(summary)
+        results = summary['results']
+        
+        if args.format == 'json':
+            write_json_results(summary, args.output)
+        elif args.format == 'junit':
+            write_junit_results(results, args.output, junit_threshold, summary['elapsed_seconds'])
+        
+        failed = args.fail_under is not None and any(
+            r['similarity'] < args.fail_under for r in results if not r['error'])
+        sys.exit(1 if failed or any(r['error'] for r in results) else 0)
+    
+    if args.batch or args.manifest or args.watch:
+        if sum(1 for mode in (args.batch, args.manifest, args.watch) if mode) > 1:
+            parser.error("use only one of --batch, --manifest or --watch")
+        if args.pair_key:
+            try:
+                re.compile(args.pair_key)
+            except re.error as e:
+                parser.error(f"--pair-key is not a valid regex: {e}")
+        if args.watch:
+            pairs = None
+        else:
+            pairs = (collect_directory_pairs(*args.batch) if args.batch
+                     else load_manifest(args.manifest))
+            if not pairs:
+                print("❌ Error: No PDF pairs to compare")
+                sys.exit(1)
+        with console:
+            if args.save_diff:
+                print("⚠️  --save-diff is not supported in batch mode, use --dashboard DIR "
+                      "for HTML reports")
+            if args.profile:
+                print("⚠️  --profile is not supported in batch mode, ignoring it")
+            if args.watch:
+                summary = watch_directories(*args.watch, options, args.workers, args.summary,
+                                            args.pair_key, args.poll_interval,
+                                            args.idle_exit, args.dashboard)
+            else:
+                summary = run_batch(pairs, options, args.workers, args.summary,
+                                    args.dashboard)
+        results = summary['results']
+        
+        if args.format == 'json':
+            write_json_results(summary, args.output)
+        elif args.format == 'junit':
+            write_junit_results(results, args.output, junit_threshold, summary['elapsed_seconds'])
+        
+        failed = args.fail_under is not None and any(
+            r['similarity'] < args.fail_under for r in results if not r['error'])
+        sys.exit(1 if failed or any(r['error'] for r in results) else 0)
+    
+    if not args.pdf1_path or not args.pdf2_path:
+        parser.print_usage()
         sys.exit(1)
     
-    pdf1_path = sys.argv[1]
-    pdf2_path = sys.argv[2]
-    save_diff = '--save-diff' in sys.argv
+    pdf1_path = args.pdf1_path
+    pdf2_path = args.pdf2_path
+    save_diff = args.save_diff
     
     # Check if files exist
     if not Path(pdf1_path).exists():
@@ -642,7 +2509,44 @@ def main():
         sys.exit(1)
     
     # Run comparison
-    compare_pdfs(pdf1_path, pdf2_path, save_diff)
+    with console:
+        profiler = None
+        if args.profile:
+            import cProfile
+            profiler = cProfile.Profile()
+        if profiler:
+            profiler.enable()
+        if visual is not None and any(Path(path).is_dir() or Path(path).suffix.lower() == '.png'
+                                      for path in (pdf1_path, pdf2_path)):
+            from compare_visual import compare_images
+            result = compare_images(pdf1_path, pdf2_path, save_diff, visual=visual)
+        elif args.gate is not None:
+            result = gate_pdfs(pdf1_path, pdf2_path, args.gate,
+                               trace_memory=profiler is not None, normalizer=normalizer,
+                               engine=args.engine, extractor=extractor)
+        else:
+            result = compare_pdfs(pdf1_path, pdf2_path, save_diff, args.extract_workers,
+                                  cache, args.max_hunks, trace_memory=profiler is not None,
+                                  memory_budget_mb=args.memory_budget,
+                                  normalizer=normalizer, engine=args.engine,
+                                  result_store=result_store, structure=args.structure,
+                                  visual=visual, align=args.align,
+                                  extractor=extractor)
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            print_profile_summary(result, profiler, args.profile)
+    
+    if args.format == 'json':
+        write_json_results(result.to_dict(), args.output)
+    elif args.format == 'junit':
+        write_junit_results([result.to_dict()], args.output, junit_threshold)
+    
+    if args.fail_under is not None and result.similarity < args.fail_under:
+        sys.exit(1)
 
 if __name__ == "__main__":
+    # The stage modules import compare by name; let them find this running copy instead
+    # of loading the file a second time
+    sys.modules.setdefault('compare', sys.modules[__name__])
     main()
\ No newline at end of file
@@ -0,0 +1,318 @@
+"""
+PDF Comparison Tool - page layout comparison
+Text run positions, fonts and images of each page, compared for --structure
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from compare import (EXTRACTORS, LAYOUT_CACHE_VARIANT, MIN_PAGES_PER_WORKER, ExtractionCache,
+                     open_pdf_reader)
+
+# Text runs that moved less than this many points are considered in place
+LAYOUT_POSITION_TOLERANCE = 2.0
+# Layouts come from PyPDF2's content stream visitor, whichever backend extracts text
+LAYOUT_EXTRACTOR = EXTRACTORS['pypdf2']
+_TEXT_SHOW_OPS = (b'Tj', b'TJ', b"'", b'"')
+
+def _resource_dict(obj) -> dict:
+    """Resolve an optional PDF dictionary entry"""
+    return obj.get_object() if obj is not None else {}
+
+def _collect_resources(resources, fonts: Dict[str, str], images: List[dict], seen: set):
+    """Gather font names and image hashes, descending into form XObjects once each"""
+    resources = _resource_dict(resources)
+    for name, font in _resource_dict(resources.get('/Font')).items():
+        fonts.setdefault(name, str(font.get_object().get('/BaseFont', name)).lstrip('/'))
+    for xobject in _resource_dict(resources.get('/XObject')).values():
+        key = (xobject.idnum, xobject.generation) if hasattr(xobject, 'idnum') else id(xobject)
+        if key in seen:
+            continue
+        seen.add(key)
+        xobject = xobject.get_object()
+        subtype = xobject.get('/Subtype')
+        if subtype == '/Image':
+            try:
+                data = xobject.get_data()
+            except Exception:
+                # Filters PyPDF2 cannot decode still hash consistently as raw bytes
+                data = getattr(xobject, '_data', b'')
+            images.append({'hash': hashlib.sha256(data).hexdigest()[:16],
+                           'width': int(xobject.get('/Width', 0)),
+                           'height': int(xobject.get('/Height', 0))})
+        elif subtype == '/Form':
+            _collect_resources(xobject.get('/Resources'), fonts, images, seen)
+
+def extract_page_layout(page) -> dict:
+    """Extract one page's layout: text runs, font names and image hashes
+    
+    Each text run is [text, font, size, x, y]: its origin in user space after the text
+    and transformation matrices, and the effective font size. Positions are tracked per
+    text-showing operator, because the matrices PyPDF2 passes to visitor_text lag
+    behind line moves such as T* and '.
+    """
+    fonts: Dict[str, str] = {}
+    images: List[dict] = []
+    _collect_resources(page.get('/Resources'), fonts, images, set())
+    
+    runs = []
+    state = {'font': '', 'size': 0.0}
+    
+    def visit(operator, operands, cm, tm):
+        if operator == b'Tf':
+            state['font'] = fonts.get(operands[0], str(operands[0]).lstrip('/'))
+            state['size'] = float(operands[1])
+            return
+        if operator not in _TEXT_SHOW_OPS:
+            return
+        shown = operands[-1]
+        parts = shown if isinstance(shown, list) else [shown]
+        text = ''.join(part.decode('latin-1') if isinstance(part, bytes) else part
+                       for part in parts if isinstance(part, (str, bytes))).strip()
+        if not text:
+            return
+        # Combined text-to-user-space matrix: tm x cm
+        a = tm[0] * cm[0] + tm[1] * cm[2]
+        b = tm[0] * cm[1] + tm[1] * cm[3]
+        c = tm[2] * cm[0] + tm[3] * cm[2]
+        d = tm[2] * cm[1] + tm[3] * cm[3]
+        x = tm[4] * cm[0] + tm[5] * cm[2] + cm[4]
+        y = tm[4] * cm[1] + tm[5] * cm[3] + cm[5]
+        size = state['size'] * abs(a * d - b * c) ** 0.5
+        runs.append([text, state['font'], round(size, 1), round(x, 1), round(y, 1)])
+    
+    page.extract_text(visitor_operand_after=visit)
+    return {
+        'runs': runs,
+        'fonts': sorted(set(fonts.values())),
+        'images': sorted(images, key=lambda image: image['hash']),
+    }
+
+def _extract_layout_range(pdf_path: str, start: int, stop: int) -> List[dict]:
+    """Extract page layouts for pages [start, stop) in a worker process"""
+    with open_pdf_reader(pdf_path) as pdf_reader:
+        return [extract_page_layout(pdf_reader.pages[i]) for i in range(start, stop)]
+
+def load_page_layouts(pdf_path: str, content_hash: str, workers: Optional[int] = None,
+                      cache: Optional[ExtractionCache] = None) -> List[dict]:
+    """Extract the layout of every page, going through the extraction cache when enabled"""
+    if cache is not None:
+        try:
+            layouts = cache.get(content_hash, LAYOUT_EXTRACTOR.key + LAYOUT_CACHE_VARIANT)
+        except sqlite3.Error:
+            cache = layouts = None
+        if layouts is not None:
+            return layouts
+    
+    try:
+        with open_pdf_reader(pdf_path) as pdf_reader:
+            page_count = len(pdf_reader.pages)
+            workers = min(workers or os.cpu_count() or 1,
+                          max(1, page_count // MIN_PAGES_PER_WORKER))
+            if workers <= 1:
+                layouts = [extract_page_layout(page) for page in pdf_reader.pages]
+        if workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            
+            chunk_size = max(MIN_PAGES_PER_WORKER, -(-page_count // (workers * 4)))
+            layouts = []
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_extract_layout_range, pdf_path, start,
+                                           min(start + chunk_size, page_count))
+                           for start in range(0, page_count, chunk_size)]
+                for future in futures:
+                    layouts.extend(future.result())
+    except Exception as e:
+        print(f"❌ Error reading layout of {pdf_path}: {e}")
+        sys.exit(1)
+    
+    if cache is not None:
+        try:
+            cache.put(content_hash, layouts, LAYOUT_EXTRACTOR.key + LAYOUT_CACHE_VARIANT)
+        except sqlite3.Error as e:
+            print(f"⚠️  Could not update extraction cache: {e}")
+    return layouts
+
+def layout_fingerprint(layout: dict) -> str:
+    """Hash a page layout, so unchanged pages skip run matching"""
+    return hashlib.sha256(json.dumps(layout, sort_keys=True).encode('utf-8')).hexdigest()
+
+def compare_page_layouts(layout1: dict, layout2: dict,
+                         tolerance: float = LAYOUT_POSITION_TOLERANCE) -> Tuple[int, int, dict]:
+    """Match two page layouts, returning (matched items, total items, delta counts)
+    
+    Text runs are looked up in an index by (text, font, size) and paired with the
+    nearest candidate, so matching is linear in the number of runs. Runs left over are
+    paired by text alone to find font or size changes, then by style and position to
+    find text-only edits, which are not layout changes. Fonts and images are compared
+    as sets and multisets.
+    """
+    runs1, runs2 = layout1['runs'], layout2['runs']
+    by_style: Dict[tuple, List[int]] = {}
+    for j, (text, font, size, _x, _y) in enumerate(runs2):
+        by_style.setdefault((text, font, size), []).append(j)
+    
+    unmatched2 = set(range(len(runs2)))
+    leftover1 = []
+    in_place = moved = 0
+    max_shift = 0.0
+    examples = []
+    for i, (text, font, size, x, y) in enumerate(runs1):
+        candidates = by_style.get((text, font, size))
+        if not candidates:
+            leftover1.append(i)
+            continue
+        j = min(candidates, key=lambda j: abs(runs2[j][3] - x) + abs(runs2[j][4] - y))
+        candidates.remove(j)
+        unmatched2.discard(j)
+        shift = max(abs(runs2[j][3] - x), abs(runs2[j][4] - y))
+        if shift <= tolerance:
+            in_place += 1
+        else:
+            moved += 1
+            max_shift = max(max_shift, shift)
+            if len(examples) < 3:
+                examples.append(f"moved {shift:.0f}pt: {text[:40]}")
+    
+    by_text: Dict[str, List[int]] = {}
+    for j in sorted(unmatched2):
+        by_text.setdefault(runs2[j][0], []).append(j)
+    restyled = 0
+    retext1 = []
+    for i in leftover1:
+        candidates = by_text.get(runs1[i][0])
+        if candidates:
+            j = candidates.pop(0)
+            unmatched2.discard(j)
+            restyled += 1
+            if len(examples) < 6:
+                examples.append(f"{runs1[i][1]} {runs1[i][2]:g}pt -> "
+                                f"{runs2[j][1]} {runs2[j][2]:g}pt: {runs1[i][0][:40]}")
+        else:
+            retext1.append(i)
+    
+    # Runs still left over that sit in place with the same style only had their text
+    # edited; the text score already covers that, so they count as matched layout
+    by_position: Dict[tuple, List[int]] = {}
+    for j in sorted(unmatched2):
+        by_position.setdefault((runs2[j][1], runs2[j][2]), []).append(j)
+    retexted = removed = 0
+    for i in retext1:
+        _text, font, size, x, y = runs1[i]
+        candidates = [j for j in by_position.get((font, size), ())
+                      if max(abs(runs2[j][3] - x), abs(runs2[j][4] - y)) <= tolerance]
+        if candidates:
+            j = min(candidates, key=lambda j: abs(runs2[j][3] - x) + abs(runs2[j][4] - y))
+            by_position[(font, size)].remove(j)
+            unmatched2.discard(j)
+            retexted += 1
+        else:
+            removed += 1
+    
+    fonts1, fonts2 = set(layout1['fonts']), set(layout2['fonts'])
+    images1 = [image['hash'] for image in layout1['images']]
+    images2 = [image['hash'] for image in layout2['images']]
+    remaining = list(images2)
+    images_kept = 0
+    for image in images1:
+        if image in remaining:
+            remaining.remove(image)
+            images_kept += 1
+    
+    matched = in_place + retexted + len(fonts1 & fonts2) + images_kept
+    total = (len(runs1) + len(runs2) + len(fonts1) + len(fonts2)
+             + len(images1) + len(images2))
+    counts = {
+        'runs_moved': moved,
+        'max_shift': round(max_shift, 1),
+        'runs_restyled': restyled,
+        'runs_retexted': retexted,
+        'runs_removed': removed,
+        'runs_added': len(unmatched2),
+        'fonts_removed': sorted(fonts1 - fonts2),
+        'fonts_added': sorted(fonts2 - fonts1),
+        'images_removed': len(images1) - images_kept,
+        'images_added': len(remaining),
+        'examples': examples,
+    }
+    return matched, total, counts
+
+def has_layout_changes(counts: dict) -> bool:
+    """Whether a page comparison found anything beyond text-only edits"""
+    return bool(counts['runs_moved'] or counts['runs_restyled'] or counts['runs_removed']
+                or counts['runs_added'] or counts['fonts_removed'] or counts['fonts_added']
+                or counts['images_removed'] or counts['images_added'])
+
+def describe_layout_delta(delta: dict) -> str:
+    """One-line summary of a page's layout changes"""
+    if delta['change'] != 'changed':
+        page = delta['page1'] or delta['page2']
+        return f"page {page} {delta['change']}"
+    parts = []
+    if delta['runs_moved']:
+        parts.append(f"{delta['runs_moved']} run(s) moved up to {delta['max_shift']:g}pt")
+    if delta['runs_restyled']:
+        parts.append(f"{delta['runs_restyled']} run(s) changed font or size")
+    if delta['runs_removed'] or delta['runs_added']:
+        parts.append(f"{delta['runs_removed']} run(s) removed, {delta['runs_added']} added")
+    if delta['fonts_removed'] or delta['fonts_added']:
+        parts.append(f"fonts -{','.join(delta['fonts_removed']) or '0'} "
+                     f"+{','.join(delta['fonts_added']) or '0'}")
+    if delta['images_removed'] or delta['images_added']:
+        parts.append(f"images -{delta['images_removed']} +{delta['images_added']}")
+    pages = (f"page {delta['page1']}" if delta['page1'] == delta['page2']
+             else f"page {delta['page1']} ↔ {delta['page2']}")
+    return f"{pages}: {'; '.join(parts) or 'layout reordered'}"
+
+def _layout_items(layout: dict) -> int:
+    return len(layout['runs']) + len(layout['fonts']) + len(layout['images'])
+
+def calculate_layout_similarity(layouts1: List[dict], layouts2: List[dict],
+                                opcodes: List[Tuple[str, int, int, int, int]],
+                                deltas: Optional[List[dict]] = None) -> float:
+    """Score layout agreement over pages paired by the text alignment
+    
+    Pages are paired within equal, replaced and moved ranges of the opcodes, and the
+    rest count as added or removed. When a deltas list is given, one entry per page
+    with layout changes is appended to it.
+    """
+    if deltas is None:
+        deltas = []
+    matched = total = 0
+    
+    for tag, i1, i2, j1, j2 in opcodes:
+        paired = min(i2 - i1, j2 - j1) if tag in ('equal', 'replace', 'move') else 0
+        for offset in range(paired):
+            layout1, layout2 = layouts1[i1 + offset], layouts2[j1 + offset]
+            if layout_fingerprint(layout1) == layout_fingerprint(layout2):
+                items = _layout_items(layout1)
+                matched += items
+                total += 2 * items
+                continue
+            page_matched, page_total, counts = compare_page_layouts(layout1, layout2)
+            matched += page_matched
+            total += page_total
+            if not has_layout_changes(counts):
+                continue
+            deltas.append({
+                'change': 'changed',
+                'page1': i1 + offset + 1,
+                'page2': j1 + offset + 1,
+                'similarity': round(2.0 * page_matched / page_total * 100, 4) if page_total else 100.0,
+                **counts,
+            })
+        for index in range(i1 + paired, i2):
+            total += _layout_items(layouts1[index])
+            deltas.append({'change': 'removed', 'page1': index + 1, 'page2': None,
+                           'similarity': 0.0})
+        for index in range(j1 + paired, j2):
+            total += _layout_items(layouts2[index])
+            deltas.append({'change': 'added', 'page1': None, 'page2': index + 1,
+                           'similarity': 0.0})
+    
+    if total == 0:
+        return 100.0
+    return 2.0 * matched / total * 100
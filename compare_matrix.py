@@ -0,0 +1,351 @@
+"""
+PDF Comparison Tool - matrix mode
+One baseline, or every PDF, compared against many from prepared documents
+"""
+import contextlib
+import functools
+import io
+import os
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from compare import (DECIDED_BY_FILE_HASH, DECIDED_BY_PAGE_HASH, CompareOptions,
+                     ComparisonResult, DocumentStats, ExtractionCache, ExtractorBackend,
+                     NormalizationPipeline, SimilarityEngine, StageTimer, _captured_pair_result,
+                     _print_pair_result, align_pages, align_pages_minhash,
+                     calculate_page_aligned_similarity, classify_similarity, file_sha256,
+                     load_pages, normalize_text, page_text_hashes, resolve_extractor,
+                     result_config_key, reuse_stored_result)
+
+@dataclass
+class PreparedDocument:
+    """One PDF extracted, normalized and page-hashed, ready to compare against many others"""
+    path: str
+    file_hash: str
+    norm_pages: List[str]
+    page_hashes: List[str]
+    stats: dict
+
+def prepare_document(pdf_path: str, cache: Optional[ExtractionCache] = None,
+                     normalizer: Optional[NormalizationPipeline] = None,
+                     engine: str = 'char',
+                     backend: Optional[ExtractorBackend] = None,
+                     extract_workers: Optional[int] = 1,
+                     file_hash: Optional[str] = None) -> PreparedDocument:
+    """Do all the work on one PDF that does not depend on what it is compared with"""
+    if file_hash is None:
+        file_hash = file_sha256(pdf_path)
+    pages = load_pages(pdf_path, file_hash, extract_workers, cache, backend=backend)
+    keep_lines = SimilarityEngine(engine).keep_lines
+    normalize = normalizer.normalize if normalizer is not None else normalize_text
+    norm_pages = [normalize(page, keep_lines) for page in pages]
+    return PreparedDocument(pdf_path, file_hash, norm_pages, page_text_hashes(norm_pages),
+                            DocumentStats.from_pages(pages).totals())
+
+def compare_prepared(doc1: PreparedDocument, doc2: PreparedDocument, engine: str = 'char',
+                     align: str = 'sequence', extractor: Optional[str] = None) -> ComparisonResult:
+    """Score two prepared documents the same way compare_pdfs scores their text"""
+    page_deltas = []
+    if doc1.file_hash == doc2.file_hash:
+        similarity, decided_by = 100.0, DECIDED_BY_FILE_HASH
+    elif doc1.page_hashes == doc2.page_hashes:
+        similarity, decided_by = 100.0, DECIDED_BY_PAGE_HASH
+    else:
+        similarity_engine = SimilarityEngine(engine)
+        if align == 'minhash':
+            opcodes = align_pages_minhash(doc1.norm_pages, doc2.norm_pages,
+                                          doc1.page_hashes, doc2.page_hashes)
+        else:
+            opcodes = align_pages(doc1.page_hashes, doc2.page_hashes)
+        similarity = calculate_page_aligned_similarity(doc1.norm_pages, doc2.norm_pages,
+                                                       opcodes, page_deltas, similarity_engine)
+        decided_by = similarity_engine.label
+        if align == 'minhash':
+            decided_by += " (minhash page matching)"
+    
+    return ComparisonResult(
+        pdf1=doc1.path,
+        pdf2=doc2.path,
+        similarity=similarity,
+        status=classify_similarity(similarity, page_deltas),
+        decided_by=decided_by,
+        engine=engine,
+        align=align,
+        extractor=extractor,
+        pages1=len(doc1.norm_pages),
+        pages2=len(doc2.norm_pages),
+        page_deltas=page_deltas,
+        stats1=doc1.stats,
+        stats2=doc2.stats,
+    )
+
+# Documents every matrix task compares against, set once per worker by the pool initializer
+_shared_documents: Dict[str, PreparedDocument] = {}
+
+def _init_matrix_worker(documents: Dict[str, PreparedDocument]):
+    """Pool initializer: keep the prepared documents shared by all of this worker's tasks"""
+    _shared_documents.update(documents)
+
+def _prepare_document_worker(pdf_path: str,
+                             options: CompareOptions) -> Optional[PreparedDocument]:
+    """Prepare one PDF inside a pool worker, or None when it cannot be read
+    
+    A PDF that fails here is prepared again by the pair tasks, which report the error.
+    """
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return prepare_document(pdf_path, options.cache, options.normalizer,
+                                    options.engine, resolve_extractor(options.extractor))
+    except (SystemExit, Exception):
+        return None
+
+def _compare_matrix_pair(pair: Tuple[str, str], options: CompareOptions) -> ComparisonResult:
+    """Compare one matrix pair, preparing only the side no shared document covers"""
+    timer = StageTimer()
+    backend = resolve_extractor(options.extractor)
+    result_store = options.result_store
+    shared = [_shared_documents.get(path) for path in pair]
+    file_hashes = [doc.file_hash if doc is not None else file_sha256(path)
+                   for doc, path in zip(shared, pair)]
+    files_identical = file_hashes[0] == file_hashes[1]
+    config_key = result_config_key(options.engine, options.normalizer, align=options.align,
+                                   extractor=None if files_identical else backend.key)
+    timer.end_stage('hash')
+    
+    if result_store is not None:
+        try:
+            stored = reuse_stored_result(result_store, *pair, *file_hashes, config_key, timer)
+        except sqlite3.Error as e:
+            print(f"⚠️  Result store unavailable ({e}), comparing directly")
+            result_store = stored = None
+        if stored is not None:
+            return stored
+    
+    documents = [doc if doc is not None else
+                 prepare_document(path, options.cache, options.normalizer, options.engine,
+                                  backend, file_hash=file_hash)
+                 for doc, path, file_hash in zip(shared, pair, file_hashes)]
+    timer.end_stage('extract')
+    result = compare_prepared(*documents, options.engine, options.align, backend.name)
+    timer.end_stage('similarity')
+    result.timings = timer.stop()
+    result.stages = timer.stages
+    
+    if result_store is not None:
+        try:
+            result_store.put(*file_hashes, config_key, result.to_dict())
+        except sqlite3.Error as e:
+            print(f"⚠️  Could not update result store: {e}")
+    return result
+
+def _matrix_pair_worker(pair: Tuple[str, str], options: CompareOptions) -> dict:
+    """Compare one matrix pair inside a pool worker, capturing its console output"""
+    return _captured_pair_result(pair, lambda: _compare_matrix_pair(pair, options))
+
+def run_matrix(pdf_paths: List[str], options: Optional[CompareOptions] = None,
+               all_pairs: bool = False,
+               workers: Optional[int] = None,
+               extract_workers: Optional[int] = None) -> dict:
+    """Compare the first PDF against every other one, or with all_pairs every PDF pair
+    
+    The baseline is extracted, normalized and page-hashed once, in this process, and
+    handed to each pool worker by its initializer, so tasks only prepare their
+    candidate. With all_pairs, every PDF is prepared once in the pool first and all of
+    them are shared. Scores are symmetric enough that each unordered pair is compared
+    once and mirrored in the matrix. Only the text settings of the options apply.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    
+    for path in pdf_paths:
+        if not Path(path).is_file():
+            print(f"❌ Error: File not found - {path}")
+            sys.exit(1)
+    
+    workers = workers or os.cpu_count() or 1
+    options = options or CompareOptions()
+    backend = resolve_extractor(options.extractor)
+    # Settle 'auto' here, so every worker prepares with the same backend
+    options = replace(options, extractor=backend.name)
+    
+    print("\n" + "="*70)
+    print("📊 PDF COMPARISON TOOL - Matrix Mode")
+    print("="*70 + "\n")
+    
+    start = time.perf_counter()
+    if all_pairs:
+        pairs = [(pdf_paths[i], pdf_paths[j])
+                 for i in range(len(pdf_paths)) for j in range(i + 1, len(pdf_paths))]
+        print(f"Preparing {len(pdf_paths)} PDF(s) with {workers} worker(s)...")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            prepare = functools.partial(_prepare_document_worker, options=options)
+            prepared = executor.map(prepare, pdf_paths)
+            shared = {doc.path: doc for doc in prepared if doc is not None}
+    else:
+        pairs = [(pdf_paths[0], candidate) for candidate in pdf_paths[1:]]
+        print(f"Preparing baseline {Path(pdf_paths[0]).name}...")
+        shared = {pdf_paths[0]: prepare_document(pdf_paths[0], options.cache,
+                                                 options.normalizer, options.engine,
+                                                 backend, extract_workers)}
+    print(f"\nComparing {len(pairs)} pair(s) with {workers} worker(s)...\n")
+    
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_matrix_worker,
+                             initargs=(shared,)) as executor:
+        futures = [executor.submit(_matrix_pair_worker, pair, options) for pair in pairs]
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            results.append(result)
+            _print_pair_result(result, f"[{done}/{len(pairs)}]")
+    
+    summary = build_matrix_summary(pdf_paths, results, all_pairs)
+    summary['workers'] = workers
+    summary['elapsed_seconds'] = round(time.perf_counter() - start, 3)
+    print_matrix(summary)
+    return summary
+
+def build_matrix_summary(pdf_paths: List[str], results: List[dict], all_pairs: bool) -> dict:
+    """Arrange pair results as a score matrix plus a ranking, best match first"""
+    scores = {(r['pdf1'], r['pdf2']): r['similarity'] for r in results}
+    scores.update({(pdf2, pdf1): score for (pdf1, pdf2), score in list(scores.items())})
+    rows = pdf_paths if all_pairs else pdf_paths[:1]
+    columns = pdf_paths if all_pairs else pdf_paths[1:]
+    # A PDF that could not be read is not even identical to itself
+    readable = {path for r in results if r['error'] is None for path in (r['pdf1'], r['pdf2'])}
+    matrix = [[(100.0 if row in readable else None) if row == column
+               else scores.get((row, column)) for column in columns]
+              for row in rows]
+    
+    scored = sorted((r for r in results if r['error'] is None),
+                    key=lambda r: (-r['similarity'], r['pdf1'], r['pdf2']))
+    ranking = [{'rank': rank, 'pdf1': r['pdf1'], 'pdf2': r['pdf2'],
+                'similarity': r['similarity'], 'status': r['status']}
+               for rank, r in enumerate(scored, 1)]
+    
+    return {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'mode': 'all-pairs' if all_pairs else 'baseline',
+        'baseline': None if all_pairs else pdf_paths[0],
+        'pairs': len(results),
+        'matrix': {'rows': rows, 'columns': columns, 'similarity': matrix},
+        'ranking': ranking,
+        'results': sorted(results, key=lambda r: (r['pdf1'], r['pdf2'])),
+    }
+
+def print_matrix(summary: dict):
+    """Print the ranking, and for all pairs the score grid"""
+    print("\n" + "-"*70)
+    print("🏆 RANKED SIMILARITY")
+    print("-"*70)
+    for entry in summary['ranking']:
+        name = (Path(entry['pdf2']).name if summary['mode'] == 'baseline'
+                else f"{Path(entry['pdf1']).name} vs {Path(entry['pdf2']).name}")
+        print(f"{entry['rank']:>3}. {entry['similarity']:6.2f}% {entry['status']:<16} {name}")
+    failed = [r for r in summary['results'] if r['error']]
+    for r in failed:
+        print(f"  ❌ {Path(r['pdf1']).name} vs {Path(r['pdf2']).name}: {r['error']}")
+    
+    if summary['mode'] == 'all-pairs':
+        matrix = summary['matrix']
+        print("\n" + " "*6 + "".join(f"{f'[{i}]':>9}" for i in range(1, len(matrix['columns']) + 1)))
+        for i, (row, scores) in enumerate(zip(matrix['rows'], matrix['similarity']), 1):
+            cells = "".join(f"{score:>8.2f}%" if score is not None else f"{'-':>9}"
+                            for score in scores)
+            print(f"{f'[{i}]':>5} {cells}  {Path(row).name}")
+    
+    print(f"\n  - Elapsed: {summary['elapsed_seconds']:.2f}s")
+    print("="*70 + "\n")
+
+# Status tiers colored like the report's diff legend
+MATRIX_CELL_COLORS = {
+    "IDENTICAL": "#d4edda",
+    "ALMOST IDENTICAL": "#e7f3ff",
+    "SIMILAR": "#fff3cd",
+    "DIFFERENT": "#f8d7da",
+}
+
+def generate_matrix_report(summary: dict, output_file: str = "pdf_matrix_report.html"):
+    """Write the ranked matrix as an HTML page styled like the pair reports"""
+    import html
+    from compare_report import REPORT_STYLE
+    
+    def cell(score: Optional[float]) -> str:
+        if score is None:
+            return '<td>-</td>'
+        color = MATRIX_CELL_COLORS[classify_similarity(score)]
+        return f'<td style="background:{color}; text-align:right;">{score:.2f}%</td>'
+    
+    ranking_rows = ''.join(
+        f"<tr><td>{entry['rank']}</td><td>{html.escape(Path(entry['pdf1']).name)}</td>"
+        f"<td>{html.escape(Path(entry['pdf2']).name)}</td>{cell(entry['similarity'])}"
+        f"<td>{entry['status']}</td></tr>" for entry in summary['ranking'])
+    error_rows = ''.join(
+        f"<tr><td>-</td><td>{html.escape(Path(r['pdf1']).name)}</td>"
+        f"<td>{html.escape(Path(r['pdf2']).name)}</td><td>-</td>"
+        f"<td>ERROR: {html.escape(r['error'])}</td></tr>"
+        for r in summary['results'] if r['error'])
+    
+    matrix = summary['matrix']
+    header = ''.join(f"<th>{html.escape(Path(column).name)}</th>" for column in matrix['columns'])
+    grid_rows = ''.join(
+        f"<tr><th>{html.escape(Path(row).name)}</th>{''.join(cell(score) for score in scores)}</tr>"
+        for row, scores in zip(matrix['rows'], matrix['similarity']))
+    title = ("Every PDF against every other" if summary['mode'] == 'all-pairs'
+             else f"Baseline {html.escape(Path(summary['baseline']).name)} against "
+                  f"{len(matrix['columns'])} candidate(s)")
+    
+    report = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>PDF Comparison Matrix</title>
+    <style>{REPORT_STYLE}    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>📊 PDF Comparison Matrix</h1>
+            <p>{title}</p>
+            <div class="timestamp">
+                Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}
+            </div>
+        </div>
+        
+        <div class="content">
+            <div class="diff-section">
+                <h2>🏆 Ranked Similarity</h2>
+                <div class="diff-container">
+                    <table class="diff">
+                        <tr><th>Rank</th><th>PDF 1</th><th>PDF 2</th><th>Similarity</th><th>Status</th></tr>
+                        {ranking_rows}{error_rows}
+                    </table>
+                </div>
+            </div>
+            
+            <div class="diff-section">
+                <h2>🧮 Similarity Matrix</h2>
+                <div class="diff-container">
+                    <table class="diff">
+                        <tr><th></th>{header}</tr>
+                        {grid_rows}
+                    </table>
+                </div>
+            </div>
+        </div>
+        
+        <div class="footer">
+            <p>PDF Comparison Tool | {summary['pairs']} pair(s) in {summary['elapsed_seconds']:.2f}s</p>
+        </div>
+    </div>
+</body>
+</html>"""
+    
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(report)
+    
+    print(f"💾 HTML report saved to: {output_file}")
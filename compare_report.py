@@ -0,0 +1,948 @@
+"""
+PDF Comparison Tool - HTML reports
+The per-pair HTML report with its page diffs, and the batch dashboard
+"""
+import hashlib
+import os
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from compare import (DECIDED_BY_MATCHER, MAX_INLINE_HUNKS, REPORT_KEY_META, DocumentStats,
+                     pages_reordered)
+
+# Standalone styles for page fragments, which load in iframes without the report's CSS
+PAGE_FRAGMENT_STYLE = """
+        body { margin: 0; padding: 10px; background: #f8f9fa;
+               font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; }
+        table.diff { width: 100%; border-collapse: collapse; font-family: 'Courier New', monospace;
+                     font-size: 0.9em; background: white; margin-bottom: 15px; }
+        table.diff td { padding: 8px; border: 1px solid #dee2e6; vertical-align: top; line-height: 1.6; }
+        table.diff th { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white;
+                        padding: 12px; font-weight: 600; text-align: left; }
+        .diff_add { background: #d4edda; color: #155724; }
+        .diff_sub { background: #f8d7da; color: #721c24; }
+        .diff_chg { background: #fff3cd; color: #856404; }
+        .diff_next { background: #e7f3ff; }
+        .diff-truncated { text-align: center; color: #6c757d; }
+"""
+
+def _page_range_label(page_range: Optional[List[int]]) -> str:
+    """Describe a 1-based inclusive page range from a page delta"""
+    if page_range is None:
+        return "no pages"
+    first, last = page_range
+    return f"page {first}" if first == last else f"pages {first}-{last}"
+
+def _page_range_lines(pages: Sequence[str], page_range: Optional[List[int]]) -> List[str]:
+    """Lines of the raw page text in a page delta's range"""
+    if page_range is None:
+        return []
+    first, last = page_range
+    return [line for page in pages[first - 1:last] for line in page.splitlines()]
+
+def write_page_fragment(fragment_file: Path, lines1: List[str], lines2: List[str],
+                        desc1: str, desc2: str, max_hunks: int = MAX_INLINE_HUNKS,
+                        context_lines: int = 3) -> int:
+    """Write the hunk tables of one changed page range as a standalone HTML file
+    
+    Returns the number of hunks written.
+    """
+    import difflib
+    
+    diff_generator = difflib.HtmlDiff(wrapcolumn=80)
+    matcher = difflib.SequenceMatcher(None, lines1, lines2)
+    shown = 0
+    hidden = 0
+    
+    with open(fragment_file, 'w', encoding='utf-8') as f:
+        f.write(f'<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="UTF-8">\n'
+                f'<style>{PAGE_FRAGMENT_STYLE}</style>\n</head>\n<body>\n')
+        for group in matcher.get_grouped_opcodes(context_lines):
+            if all(tag == 'equal' for tag, *_ in group):
+                continue
+            if shown == max_hunks:
+                hidden += 1
+                continue
+            i1, i2, j1, j2 = group[0][1], group[-1][2], group[0][3], group[-1][4]
+            f.write(diff_generator.make_table(lines1[i1:i2], lines2[j1:j2],
+                                              fromdesc=f'{desc1} · lines {i1 + 1}-{i2}',
+                                              todesc=f'{desc2} · lines {j1 + 1}-{j2}'))
+            shown += 1
+        if hidden:
+            f.write(f'<p class="diff-truncated">… {hidden:,} more change hunk(s) not shown '
+                    f'(raise --max-hunks to include them)</p>\n')
+        if not shown and not hidden:
+            # Pages that differ only in whitespace have no line-level hunks
+            f.write('<p class="diff-truncated">Only whitespace differs on these pages.</p>\n')
+        f.write('</body>\n</html>\n')
+    
+    return shown
+
+def iter_changed_page_sections(pages1: Sequence[str], pages2: Sequence[str],
+                               page_deltas: List[dict], fragment_dir: Path,
+                               max_hunks: int = MAX_INLINE_HUNKS):
+    """Yield a lazily loaded section per changed page range, writing its diff as a fragment
+    
+    Only the page ranges the similarity stage flagged are diffed. Each range's hunk
+    tables go to their own file in fragment_dir, and the report's iframe for it is
+    pointed at that file the first time its section is expanded.
+    """
+    fragment_dir.mkdir(parents=True, exist_ok=True)
+    # Fragments from an earlier report with the same name would be stale
+    for stale in fragment_dir.glob('change-*.html'):
+        stale.unlink()
+    
+    yield f"""
+            <div class="diff-section">
+                <h2>🔍 Changed Pages</h2>
+                <p class="diff-truncated">{len(page_deltas):,} changed page range(s) · expand one to load its line-by-line diff</p>
+"""
+    for number, delta in enumerate(page_deltas, 1):
+        label1 = _page_range_label(delta['pages1'])
+        label2 = _page_range_label(delta['pages2'])
+        fragment_file = fragment_dir / f"change-{number:04d}.html"
+        write_page_fragment(fragment_file,
+                            _page_range_lines(pages1, delta['pages1']),
+                            _page_range_lines(pages2, delta['pages2']),
+                            f"PDF 1 (Struts) · {label1}", f"PDF 2 (Angular) · {label2}",
+                            max_hunks)
+        
+        summary = f"{delta['change'].capitalize()}: PDF 1 {label1} ↔ PDF 2 {label2}"
+        if delta['change'] in ('changed', 'moved'):
+            summary += f" · {delta['similarity']:.1f}% similar"
+        yield (f'<details class="diff-chunk" data-src="{fragment_dir.name}/{fragment_file.name}">'
+               f'<summary>{summary}</summary>'
+               f'<iframe class="diff-fragment" title="{summary}"></iframe></details>\n')
+    
+    yield """            </div>
+            <script>
+                document.querySelectorAll('details[data-src]').forEach(function (section) {
+                    section.addEventListener('toggle', function () {
+                        var frame = section.querySelector('iframe');
+                        if (section.open && !frame.src) {
+                            frame.src = section.dataset.src;
+                        }
+                    });
+                });
+            </script>
+"""
+
+def layout_report_section(layout_similarity: float, layout_deltas: List[dict]) -> str:
+    """Render the per-page layout changes found by structural comparison"""
+    import html
+    from compare_layout import describe_layout_delta
+    
+    rows = []
+    for delta in layout_deltas:
+        examples = '<br>'.join(html.escape(example) for example in delta.get('examples', []))
+        rows.append(f"<tr><td>{html.escape(describe_layout_delta(delta))}</td>"
+                    f"<td>{delta['similarity']:.1f}%</td><td>{examples}</td></tr>")
+    if rows:
+        table = ('<table class="diff"><tr><th>Page</th><th>Layout match</th><th>Examples</th></tr>'
+                 + ''.join(rows) + '</table>')
+    else:
+        table = '<p class="diff-truncated">No layout changes on paired pages.</p>'
+    return f"""
+            <div class="diff-section">
+                <h2>🧱 Layout Changes · {layout_similarity:.1f}% layout similarity</h2>
+                <div class="diff-container">{table}</div>
+            </div>
+"""
+
+def visual_report_section(visual_similarity: float, visual_deltas: List[dict],
+                          overlay_dir_name: str) -> str:
+    """Render the pages that differ visually, with their diff overlays"""
+    items = []
+    for delta in visual_deltas:
+        if delta['change'] != 'changed':
+            items.append(f'<p class="diff-truncated">Page {delta["page"]} {delta["change"]}</p>')
+            continue
+        title = (f"Page {delta['page']} · {delta['tiles_changed']:,} of {delta['tiles']:,} "
+                 f"tiles changed · {delta['pixels_changed']:,} pixels")
+        image = (f'<img class="visual-overlay" loading="lazy" alt="{title}" '
+                 f'src="{overlay_dir_name}/{delta["overlay"]}">' if delta.get('overlay') else '')
+        items.append(f'<details class="diff-chunk"><summary>{title}</summary>{image}</details>')
+    body = '\n'.join(items) or '<p class="diff-truncated">No visual differences.</p>'
+    return f"""
+            <div class="diff-section">
+                <h2>🖼️ Visual Differences · {visual_similarity:.1f}% of tiles unchanged</h2>
+                {body}
+            </div>
+"""
+
+# Report styles are plain text, so they stay out of the report f-string and are never
+# re-escaped or rebuilt per report
+REPORT_STYLE = """
+        * {
+            margin: 0;
+            padding: 0;
+            box-sizing: border-box;
+        }
+        
+        body {
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, Cantarell, sans-serif;
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            min-height: 100vh;
+            padding: 20px;
+            color: #333;
+        }
+        
+        .container {
+            max-width: 1400px;
+            margin: 0 auto;
+            background: white;
+            border-radius: 20px;
+            box-shadow: 0 20px 60px rgba(0,0,0,0.3);
+            overflow: hidden;
+        }
+        
+        .header {
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            color: white;
+            padding: 40px;
+            text-align: center;
+        }
+        
+        .header h1 {
+            font-size: 2.5em;
+            margin-bottom: 10px;
+            font-weight: 700;
+        }
+        
+        .header p {
+            font-size: 1.1em;
+            opacity: 0.95;
+        }
+        
+        .timestamp {
+            background: rgba(255,255,255,0.2);
+            display: inline-block;
+            padding: 8px 16px;
+            border-radius: 20px;
+            margin-top: 15px;
+            font-size: 0.9em;
+        }
+        
+        .content {
+            padding: 40px;
+        }
+        
+        .status-banner {
+            text-align: center;
+            padding: 30px;
+            border-radius: 15px;
+            margin-bottom: 40px;
+            box-shadow: 0 4px 15px rgba(0,0,0,0.1);
+        }
+        
+        .status-banner.identical {
+            background: linear-gradient(135deg, #11998e 0%, #38ef7d 100%);
+            color: white;
+        }
+        
+        .status-banner.almost-identical {
+            background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
+            color: white;
+        }
+        
+        .status-banner.similar {
+            background: linear-gradient(135deg, #fa709a 0%, #fee140 100%);
+            color: white;
+        }
+        
+        .status-banner.different {
+            background: linear-gradient(135deg, #ff6b6b 0%, #ee5a6f 100%);
+            color: white;
+        }
+        
+        .status-banner h2 {
+            font-size: 2.5em;
+            margin-bottom: 10px;
+        }
+        
+        .status-banner p {
+            font-size: 1.2em;
+            opacity: 0.95;
+        }
+        
+        .similarity-score {
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            gap: 20px;
+            margin: 30px 0;
+            padding: 30px;
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            border-radius: 15px;
+            color: white;
+        }
+        
+        .score-number {
+            font-size: 4em;
+            font-weight: 700;
+        }
+        
+        .progress-bar {
+            flex: 1;
+            max-width: 600px;
+        }
+        
+        .progress-bar-bg {
+            width: 100%;
+            height: 30px;
+            background: rgba(255,255,255,0.3);
+            border-radius: 15px;
+            overflow: hidden;
+        }
+        
+        .progress-bar-fill {
+            height: 100%;
+            background: linear-gradient(90deg, #11998e 0%, #38ef7d 100%);
+            border-radius: 15px;
+            transition: width 1s ease;
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            color: white;
+            font-weight: 600;
+        }
+        
+        .stats-grid {
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
+            gap: 20px;
+            margin: 40px 0;
+        }
+        
+        .stat-card {
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            padding: 25px;
+            border-radius: 15px;
+            color: white;
+            box-shadow: 0 4px 15px rgba(0,0,0,0.1);
+        }
+        
+        .stat-card h3 {
+            font-size: 1.1em;
+            margin-bottom: 15px;
+            opacity: 0.9;
+        }
+        
+        .stat-value {
+            font-size: 2em;
+            font-weight: 700;
+            margin-bottom: 5px;
+        }
+        
+        .stat-label {
+            font-size: 0.9em;
+            opacity: 0.8;
+        }
+        
+        .file-comparison {
+            display: grid;
+            grid-template-columns: 1fr 1fr;
+            gap: 20px;
+            margin: 40px 0;
+        }
+        
+        .file-info {
+            background: #f8f9fa;
+            padding: 25px;
+            border-radius: 15px;
+            border: 2px solid #e9ecef;
+        }
+        
+        .file-info.pdf1 {
+            border-color: #667eea;
+        }
+        
+        .file-info.pdf2 {
+            border-color: #764ba2;
+        }
+        
+        .file-info h3 {
+            color: #667eea;
+            margin-bottom: 15px;
+            font-size: 1.3em;
+        }
+        
+        .file-info.pdf2 h3 {
+            color: #764ba2;
+        }
+        
+        .file-name {
+            background: white;
+            padding: 15px;
+            border-radius: 10px;
+            margin-bottom: 15px;
+            font-weight: 600;
+            word-break: break-all;
+        }
+        
+        .file-stats {
+            display: flex;
+            flex-direction: column;
+            gap: 10px;
+        }
+        
+        .file-stat {
+            display: flex;
+            justify-content: space-between;
+            padding: 10px;
+            background: white;
+            border-radius: 8px;
+        }
+        
+        .file-stat-label {
+            color: #6c757d;
+        }
+        
+        .file-stat-value {
+            font-weight: 600;
+            color: #495057;
+        }
+        
+        .diff-section {
+            margin-top: 50px;
+        }
+        
+        .diff-section h2 {
+            font-size: 2em;
+            margin-bottom: 20px;
+            color: #333;
+        }
+        
+        .diff-container {
+            background: #f8f9fa;
+            border-radius: 15px;
+            padding: 20px;
+            overflow-x: auto;
+            box-shadow: inset 0 2px 10px rgba(0,0,0,0.05);
+        }
+        
+        .diff-chunk {
+            margin-bottom: 15px;
+        }
+        
+        .diff-chunk summary {
+            cursor: pointer;
+            padding: 12px 20px;
+            background: #f8f9fa;
+            border-radius: 10px;
+            font-weight: 600;
+            color: #667eea;
+        }
+        
+        .diff-chunk .diff-container {
+            margin-top: 10px;
+        }
+        
+        .diff-chunk table.diff {
+            margin-bottom: 15px;
+        }
+        
+        .diff-chunk iframe.diff-fragment {
+            width: 100%;
+            height: 60vh;
+            margin-top: 10px;
+            border: none;
+            border-radius: 10px;
+            resize: vertical;
+            background: #f8f9fa;
+        }
+        
+        .visual-overlay {
+            display: block;
+            max-width: 100%;
+            margin-top: 10px;
+            border: 1px solid #dee2e6;
+            border-radius: 10px;
+        }
+        
+        .diff-truncated {
+            text-align: center;
+            color: #6c757d;
+            margin-top: 20px;
+        }
+        
+        table.diff {
+            width: 100%;
+            border-collapse: collapse;
+            font-family: 'Courier New', monospace;
+            font-size: 0.9em;
+            background: white;
+        }
+        
+        table.diff td {
+            padding: 8px;
+            border: 1px solid #dee2e6;
+            vertical-align: top;
+            line-height: 1.6;
+        }
+        
+        table.diff th {
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            color: white;
+            padding: 12px;
+            font-weight: 600;
+            text-align: left;
+        }
+        
+        .diff_add {
+            background: #d4edda;
+            color: #155724;
+        }
+        
+        .diff_sub {
+            background: #f8d7da;
+            color: #721c24;
+        }
+        
+        .diff_chg {
+            background: #fff3cd;
+            color: #856404;
+        }
+        
+        .diff_next {
+            background: #e7f3ff;
+        }
+        
+        .footer {
+            text-align: center;
+            padding: 30px;
+            background: #f8f9fa;
+            color: #6c757d;
+            border-top: 2px solid #e9ecef;
+        }
+        
+        @media (max-width: 768px) {
+            .file-comparison {
+                grid-template-columns: 1fr;
+            }
+            
+            .similarity-score {
+                flex-direction: column;
+            }
+            
+            .score-number {
+                font-size: 3em;
+            }
+        }
+"""
+
+def generate_html_report(pdf1_path: str, pdf2_path: str, similarity: float, output_file: str,
+                        decided_by: str = DECIDED_BY_MATCHER,
+                        max_hunks: int = MAX_INLINE_HUNKS,
+                        stats1: Optional[DocumentStats] = None,
+                        stats2: Optional[DocumentStats] = None,
+                        pages1: Optional[Sequence[str]] = None,
+                        pages2: Optional[Sequence[str]] = None,
+                        page_deltas: Optional[List[dict]] = None,
+                        layout_similarity: Optional[float] = None,
+                        layout_deltas: Optional[List[dict]] = None,
+                        visual_similarity: Optional[float] = None,
+                        visual_deltas: Optional[List[dict]] = None,
+                        stylesheet: Optional[str] = None,
+                        report_key: Optional[str] = None):
+    """Generate beautiful HTML comparison report, streaming it to the output file
+    
+    Given pages and the page deltas of the similarity stage, only the changed page
+    ranges are diffed, each into a fragment file in a "<report>_pages" directory next
+    to the report, loaded when its section is expanded. A layout similarity adds a
+    table of per-page layout changes, and a visual similarity adds the diff overlays
+    written to the "<report>_pages" directory.
+    With a stylesheet, the report links to it instead of embedding the styles, so the
+    many reports of a dashboard share one copy. A report_key is recorded in the head,
+    so a rerun can tell the report is still current.
+    """
+    
+    if pages1 is None or pages2 is None:
+        raise ValueError("generate_html_report needs pages1 and pages2")
+    
+    # Get file names
+    pdf1_name = Path(pdf1_path).name
+    pdf2_name = Path(pdf2_path).name
+    
+    # Reuse the stats gathered after extraction when the caller has them
+    if stats1 is None:
+        stats1 = DocumentStats.from_pages(pages1)
+    if stats2 is None:
+        stats2 = DocumentStats.from_pages(pages2)
+    
+    char_diff = abs(stats1.chars - stats2.chars)
+    word_diff = abs(stats1.words - stats2.words)
+    
+    # Determine status
+    if similarity == 100.0 and not pages_reordered(page_deltas):
+        status_class = "identical"
+        status_text = "✅ IDENTICAL"
+        status_desc = "PDFs contain exactly the same content"
+    elif similarity == 100.0:
+        status_class = "almost-identical"
+        status_text = "✨ ALMOST IDENTICAL"
+        status_desc = "PDFs contain the same content, but pages were reordered"
+    elif similarity >= 95.0:
+        status_class = "almost-identical"
+        status_text = "✨ ALMOST IDENTICAL"
+        status_desc = "PDFs are very similar with minor differences"
+    elif similarity >= 80.0:
+        status_class = "similar"
+        status_text = "⚠️ SIMILAR"
+        status_desc = "PDFs have noticeable differences"
+    else:
+        status_class = "different"
+        status_text = "❌ DIFFERENT"
+        status_desc = "PDFs have significant differences"
+    
+    if stylesheet is not None:
+        style = f'<link rel="stylesheet" href="{stylesheet}">'
+    else:
+        style = f'<style>{REPORT_STYLE}    </style>'
+    if report_key is not None:
+        style = f'<meta name="{REPORT_KEY_META}" content="{report_key}">\n    {style}'
+    
+    report_head = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>PDF Comparison Report - {pdf1_name} vs {pdf2_name}</title>
+    {style}
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>📊 PDF Comparison Report</h1>
+            <p>Struts vs Angular - Detailed Content Analysis</p>
+            <div class="timestamp">
+                Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}
+            </div>
+        </div>
+        
+        <div class="content">
+            <div class="status-banner {status_class}">
+                <h2>{status_text}</h2>
+                <p>{status_desc}</p>
+            </div>
+            
+            <div class="similarity-score">
+                <div class="score-number">{similarity:.1f}%</div>
+                <div class="progress-bar">
+                    <div class="progress-bar-bg">
+                        <div class="progress-bar-fill" style="width: {similarity}%;">
+                            {similarity:.1f}% Match
+                        </div>
+                    </div>
+                </div>
+            </div>
+            
+            <div class="file-comparison">
+                <div class="file-info pdf1">
+                    <h3>📄 PDF 1 (Struts)</h3>
+                    <div class="file-name">{pdf1_name}</div>
+                    <div class="file-stats">
+                        <div class="file-stat">
+                            <span class="file-stat-label">Characters</span>
+                            <span class="file-stat-value">{stats1.chars:,}</span>
+                        </div>
+                        <div class="file-stat">
+                            <span class="file-stat-label">Words</span>
+                            <span class="file-stat-value">{stats1.words:,}</span>
+                        </div>
+                        <div class="file-stat">
+                            <span class="file-stat-label">Lines</span>
+                            <span class="file-stat-value">{stats1.lines:,}</span>
+                        </div>
+                    </div>
+                </div>
+                
+                <div class="file-info pdf2">
+                    <h3>📄 PDF 2 (Angular)</h3>
+                    <div class="file-name">{pdf2_name}</div>
+                    <div class="file-stats">
+                        <div class="file-stat">
+                            <span class="file-stat-label">Characters</span>
+                            <span class="file-stat-value">{stats2.chars:,}</span>
+                        </div>
+                        <div class="file-stat">
+                            <span class="file-stat-label">Words</span>
+                            <span class="file-stat-value">{stats2.words:,}</span>
+                        </div>
+                        <div class="file-stat">
+                            <span class="file-stat-label">Lines</span>
+                            <span class="file-stat-value">{stats2.lines:,}</span>
+                        </div>
+                    </div>
+                </div>
+            </div>
+            
+            <div class="stats-grid">
+                <div class="stat-card">
+                    <h3>📏 Character Difference</h3>
+                    <div class="stat-value">{char_diff:,}</div>
+                    <div class="stat-label">characters difference</div>
+                </div>
+                
+                <div class="stat-card">
+                    <h3>📝 Word Difference</h3>
+                    <div class="stat-value">{word_diff:,}</div>
+                    <div class="stat-label">words difference</div>
+                </div>
+                
+                <div class="stat-card">
+                    <h3>🎯 Match Quality</h3>
+                    <div class="stat-value">{similarity:.1f}%</div>
+                    <div class="stat-label">similarity score · decided by {decided_by}</div>
+                </div>
+            </div>
+            
+"""
+    
+    report_foot = """        </div>
+        
+        <div class="footer">
+            <p>PDF Comparison Tool | Generated with Python & PyPDF2</p>
+            <p style="margin-top: 10px; font-size: 0.9em;">
+                Color Legend: 
+                <span style="background:#f8d7da; padding:4px 8px; border-radius:4px; margin:0 5px;">Removed</span>
+                <span style="background:#d4edda; padding:4px 8px; border-radius:4px; margin:0 5px;">Added</span>
+                <span style="background:#fff3cd; padding:4px 8px; border-radius:4px; margin:0 5px;">Changed</span>
+            </p>
+        </div>
+    </div>
+</body>
+</html>"""
+    
+    if not page_deltas and not pages1:
+        # Image-only comparisons have no text to diff
+        diff_sections = []
+    elif page_deltas:
+        # Moved pages can leave the score at 100%, but still need their sections
+        fragment_dir = Path(output_file).with_name(Path(output_file).stem + "_pages")
+        diff_sections = iter_changed_page_sections(pages1, pages2, page_deltas,
+                                                   fragment_dir, max_hunks)
+    else:
+        diff_sections = ['<div class="diff-section"><h2>🎉 No Differences Found!</h2><p style="text-align:center; font-size:1.2em; color:#6c757d;">Both PDFs contain identical content.</p></div>\n']
+    
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(report_head)
+        if layout_similarity is not None:
+            f.write(layout_report_section(layout_similarity, layout_deltas or []))
+        if visual_similarity is not None:
+            overlay_dir = Path(output_file).with_name(Path(output_file).stem + "_pages")
+            f.write(visual_report_section(visual_similarity, visual_deltas or [],
+                                          overlay_dir.name))
+        for section in diff_sections:
+            f.write(section)
+        f.write(report_foot)
+    
+    print(f"💾 HTML report saved to: {output_file}")
+
+DASHBOARD_STYLESHEET = "report.css"
+
+# Dashboard additions to the shared report stylesheet
+DASHBOARD_STYLE = """
+        table.dashboard th[data-type] {
+            cursor: pointer;
+            user-select: none;
+        }
+        
+        table.dashboard th[data-order="asc"]::after {
+            content: " ▲";
+        }
+        
+        table.dashboard th[data-order="desc"]::after {
+            content: " ▼";
+        }
+        
+        table.dashboard td.score,
+        table.dashboard td.seconds {
+            text-align: right;
+            white-space: nowrap;
+        }
+        
+        table.dashboard td.score {
+            font-weight: 600;
+        }
+        
+        tr.tier-identical td.score {
+            background: #d4edda;
+        }
+        
+        tr.tier-almost-identical td.score {
+            background: #e7f3ff;
+        }
+        
+        tr.tier-similar td.score {
+            background: #fff3cd;
+        }
+        
+        tr.tier-different td.score,
+        tr.tier-error td.score {
+            background: #f8d7da;
+        }
+"""
+
+# Sorts the results table by the clicked column, using data-value where a cell has one
+DASHBOARD_SCRIPT = """
+        const table = document.getElementById('results');
+        table.querySelectorAll('th[data-type]').forEach(header => {
+            header.addEventListener('click', () => {
+                const ascending = header.dataset.order !== 'asc';
+                table.querySelectorAll('th[data-order]').forEach(th => delete th.dataset.order);
+                header.dataset.order = ascending ? 'asc' : 'desc';
+                const value = row => {
+                    const cell = row.cells[header.cellIndex];
+                    return cell.dataset.value ?? cell.textContent;
+                };
+                const rows = Array.from(table.tBodies[0].rows).sort((a, b) => {
+                    const order = header.dataset.type === 'number'
+                        ? value(a) - value(b) : value(a).localeCompare(value(b));
+                    return ascending ? order : -order;
+                });
+                table.tBodies[0].append(...rows);
+            });
+        });
+"""
+
+def pair_report_name(pdf1_path: str, pdf2_path: str) -> str:
+    """Stable detail page name for a PDF pair, unique among the pairs of a run
+    
+    The file stems keep it readable, and a hash of both resolved paths keeps apart
+    pairs whose files share names in different directories.
+    """
+    paths = f"{Path(pdf1_path).resolve()}\0{Path(pdf2_path).resolve()}"
+    digest = hashlib.sha1(paths.encode('utf-8')).hexdigest()[:10]
+    stems = re.sub(r'[^A-Za-z0-9._-]+', '_', f"{Path(pdf1_path).stem}-vs-{Path(pdf2_path).stem}")
+    return f"{stems[:80]}-{digest}.html"
+
+def prepare_dashboard(dashboard_dir: str) -> Path:
+    """Create the dashboard directory with the stylesheet all its pages share"""
+    import textwrap
+    
+    directory = Path(dashboard_dir)
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / DASHBOARD_STYLESHEET).write_text(
+            textwrap.dedent(REPORT_STYLE + DASHBOARD_STYLE).lstrip(), encoding='utf-8')
+    except OSError as e:
+        print(f"❌ Error creating dashboard {dashboard_dir}: {e}")
+        sys.exit(1)
+    return directory
+
+def write_dashboard(summary: dict, dashboard_dir: str) -> Path:
+    """Write index.html: every pair with sortable score, status tier and time
+    
+    Pairs link to the detail pages the workers wrote next to it, if they have one.
+    The page is written to a temporary file and renamed, so a browser never sees
+    it half written.
+    """
+    import html
+    
+    results = summary['results']
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+    scored = [r['similarity'] for r in results if r['error'] is None]
+    seconds = [r['seconds'] for r in results if r.get('seconds') is not None]
+    
+    cards = [(status, f"{counts[status]:,}", "pair(s)")
+             for status in ("IDENTICAL", "ALMOST IDENTICAL", "SIMILAR", "DIFFERENT", "ERROR")
+             if status in counts]
+    if scored:
+        cards.append(("Mean Similarity", f"{sum(scored) / len(scored):.1f}%",
+                      f"lowest {min(scored):.1f}%"))
+    if seconds:
+        cards.append(("Time per Pair", f"{sum(seconds) / len(seconds):.2f}s",
+                      f"slowest {max(seconds):.2f}s"))
+    card_html = "".join(f"""
+                <div class="stat-card">
+                    <h3>{title}</h3>
+                    <div class="stat-value">{value}</div>
+                    <div class="stat-label">{label}</div>
+                </div>""" for title, value, label in cards)
+    
+    rows = []
+    for r in sorted(results, key=lambda r: (r['similarity'] is not None, r['similarity'] or 0)):
+        tier = r['status'].lower().replace(' ', '-')
+        if r['error']:
+            score = '<td class="score" data-value="-1">-</td>'
+            decided_by = html.escape(r['error'])
+        else:
+            score = f'<td class="score" data-value="{r["similarity"]}">{r["similarity"]:.2f}%</td>'
+            decided_by = html.escape(r.get('decided_by') or '')
+        link = (f'<a href="{Path(r["report_file"]).name}">Details</a>'
+                if r.get('report_file') else '')
+        rows.append(f"""
+                    <tr class="tier-{tier}">
+                        <td>{html.escape(Path(r['pdf1']).name)}</td>
+                        <td>{html.escape(Path(r['pdf2']).name)}</td>
+                        {score}
+                        <td>{r['status']}</td>
+                        <td>{decided_by}</td>
+                        <td class="seconds" data-value="{r.get('seconds') or 0}">{r.get('seconds') or 0:.2f}s</td>
+                        <td>{link}</td>
+                    </tr>""")
+    
+    generated = summary.get('generated') or datetime.now().isoformat(timespec='seconds')
+    page = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>PDF Comparison Dashboard</title>
+    <link rel="stylesheet" href="{DASHBOARD_STYLESHEET}">
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>📊 PDF Comparison Dashboard</h1>
+            <p>{len(results)} pair(s) compared by {summary.get('workers', 1)} worker(s) in {summary.get('elapsed_seconds', 0):.2f}s</p>
+            <div class="timestamp">
+                Generated: {generated.replace('T', ' ')}
+            </div>
+        </div>
+        
+        <div class="content">
+            <div class="stats-grid">{card_html}
+            </div>
+            
+            <div class="diff-section">
+                <h2>📋 Results · click a column to sort</h2>
+                <table class="diff dashboard" id="results">
+                    <thead>
+                        <tr>
+                            <th data-type="text">PDF 1</th>
+                            <th data-type="text">PDF 2</th>
+                            <th data-type="number">Similarity</th>
+                            <th data-type="text">Status</th>
+                            <th data-type="text">Decided by</th>
+                            <th data-type="number">Time</th>
+                            <th>Report</th>
+                        </tr>
+                    </thead>
+                    <tbody>{''.join(rows)}
+                    </tbody>
+                </table>
+            </div>
+        </div>
+        
+        <div class="footer">
+            <p>PDF Comparison Tool | Per-pair reports share {DASHBOARD_STYLESHEET}</p>
+        </div>
+    </div>
+    <script>{DASHBOARD_SCRIPT}    </script>
+</body>
+</html>
+"""
+    
+    index_file = Path(dashboard_dir) / "index.html"
+    partial_file = index_file.with_name(f".index-{os.getpid()}.html")
+    partial_file.write_text(page, encoding='utf-8')
+    os.replace(partial_file, index_file)
+    print(f"🗂️  Dashboard saved to: {index_file}")
+    return index_file
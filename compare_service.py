@@ -0,0 +1,240 @@
+"""
+PDF Comparison Tool - service mode
+Local HTTP service that queues comparison jobs for a warm process pool
+"""
+import json
+import os
+import sys
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple, TYPE_CHECKING
+
+from compare import (DEFAULT_SERVICE_PORT, CompareOptions, _compare_pair_worker, _ignore_sigint,
+                     _print_pair_result)
+
+if TYPE_CHECKING:
+    import asyncio
+    from concurrent.futures import ProcessPoolExecutor
+
+MAX_REQUEST_BYTES = 64 * 1024
+REQUEST_TIMEOUT_SECONDS = 10.0
+FINISHED_JOBS_KEPT = 1000
+
+class ComparisonService:
+    """Local HTTP service that queues comparison jobs for a warm process pool
+    
+    Endpoints (JSON in and out, one request per connection):
+      GET  /health            queue depth and job counts
+      POST /jobs              {"pdf1": ..., "pdf2": ..., "save_diff": bool} -> 202 {"id": ...}
+      GET  /jobs/<id>         job status, with the result once finished
+      GET  /jobs/<id>/result  200 with the result, or 202 while still queued or running
+    
+    Submissions beyond queue_size get 503 so callers back off instead of piling up.
+    Only the most recent FINISHED_JOBS_KEPT finished jobs are kept for polling.
+    """
+    
+    def __init__(self, options: Optional[CompareOptions] = None,
+                 workers: Optional[int] = None, queue_size: int = 100,
+                 report_dir: str = "pdf-reports", save_diff: bool = False):
+        self.options = options or CompareOptions()
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.report_dir = Path(report_dir).resolve()
+        self.save_diff = save_diff
+        self.jobs: Dict[str, dict] = {}
+        self.finished = deque()
+        self.queue = None
+    
+    async def serve(self, host: str = "127.0.0.1", port: int = DEFAULT_SERVICE_PORT):
+        """Accept jobs until cancelled"""
+        import asyncio
+        from concurrent.futures import ProcessPoolExecutor
+        
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.report_dir.mkdir(parents=True, exist_ok=True)
+        
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_ignore_sigint) as executor:
+            dispatchers = [asyncio.create_task(self._dispatch(executor))
+                           for _ in range(self.workers)]
+            try:
+                server = await asyncio.start_server(self._handle, host, port,
+                                                    limit=MAX_REQUEST_BYTES)
+            except OSError as e:
+                print(f"❌ Error: Cannot listen on {host}:{port} - {e}")
+                sys.exit(1)
+            print(f"Listening on http://{host}:{port} with {self.workers} worker(s), "
+                  f"queue size {self.queue_size}")
+            print(f"HTML reports go to {self.report_dir}")
+            print("Press Ctrl+C to stop\n")
+            try:
+                async with server:
+                    await server.serve_forever()
+            finally:
+                for task in dispatchers:
+                    task.cancel()
+    
+    async def _dispatch(self, executor: 'ProcessPoolExecutor'):
+        """Run queued jobs one at a time, so each dispatcher keeps one worker busy"""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            job['status'] = 'running'
+            try:
+                result = await loop.run_in_executor(
+                    executor, _compare_pair_worker, (job['pdf1'], job['pdf2']),
+                    self.options, job['report_file'])
+            except Exception as e:
+                # A worker crash breaks the whole pool, so report it on the job
+                result = {'pdf1': job['pdf1'], 'pdf2': job['pdf2'], 'similarity': None,
+                          'status': 'ERROR', 'error': str(e) or type(e).__name__}
+            job['result'] = result
+            job['status'] = 'failed' if result['error'] else 'done'
+            _print_pair_result(result, f"[{datetime.now():%H:%M:%S}] job {job['id']}")
+            
+            self.finished.append(job['id'])
+            while len(self.finished) > FINISHED_JOBS_KEPT:
+                self.jobs.pop(self.finished.popleft(), None)
+            self.queue.task_done()
+    
+    def _submit(self, request: dict) -> Tuple[int, dict]:
+        """Validate a submission and queue it"""
+        paths = []
+        for key in ('pdf1', 'pdf2'):
+            value = request.get(key)
+            if not isinstance(value, str) or not value:
+                return 400, {'error': f"'{key}' must be a PDF path"}
+            if not Path(value).is_file():
+                return 400, {'error': f"File not found - {value}"}
+            paths.append(str(Path(value).resolve()))
+        save_diff = request.get('save_diff', self.save_diff)
+        if not isinstance(save_diff, bool):
+            return 400, {'error': "'save_diff' must be true or false"}
+        
+        import asyncio
+        import uuid
+        
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            'id': job_id,
+            'status': 'queued',
+            'pdf1': paths[0],
+            'pdf2': paths[1],
+            'submitted': datetime.now().isoformat(timespec='seconds'),
+            'report_file': str(self.report_dir / f"{job_id}.html") if save_diff else None,
+            'result': None,
+        }
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            return 503, {'error': f"Queue is full ({self.queue_size} jobs), retry later"}
+        self.jobs[job_id] = job
+        return 202, {'id': job_id, 'status': job['status']}
+    
+    def _route(self, method: str, path: str, body: bytes) -> Tuple[int, dict]:
+        """Map one request to a status code and JSON payload"""
+        parts = [part for part in path.split('?', 1)[0].split('/') if part]
+        
+        if parts == ['health']:
+            if method != 'GET':
+                return 405, {'error': "Use GET"}
+            return 200, {
+                'status': 'ok',
+                'workers': self.workers,
+                'queued': self.queue.qsize(),
+                'running': sum(1 for job in self.jobs.values() if job['status'] == 'running'),
+                'jobs': len(self.jobs),
+            }
+        
+        if parts == ['jobs']:
+            if method != 'POST':
+                return 405, {'error': "Use POST to submit a job"}
+            try:
+                request = json.loads(body or b'{}')
+            except ValueError as e:
+                return 400, {'error': f"Invalid JSON body: {e}"}
+            if not isinstance(request, dict):
+                return 400, {'error': "Body must be a JSON object"}
+            return self._submit(request)
+        
+        if len(parts) in (2, 3) and parts[0] == 'jobs' and parts[2:] in ([], ['result']):
+            if method != 'GET':
+                return 405, {'error': "Use GET"}
+            job = self.jobs.get(parts[1])
+            if job is None:
+                return 404, {'error': f"Unknown job {parts[1]}"}
+            view = {key: job[key] for key in ('id', 'status', 'pdf1', 'pdf2', 'submitted')}
+            if job['result'] is None:
+                return (202 if parts[2:] else 200), view
+            if parts[2:]:
+                return 200, job['result']
+            view['result'] = job['result']
+            return 200, view
+        
+        return 404, {'error': f"No route for {path}"}
+    
+    async def _handle(self, reader: 'asyncio.StreamReader', writer: 'asyncio.StreamWriter'):
+        """Serve one HTTP/1.1 request and close the connection"""
+        import asyncio
+        from http import HTTPStatus
+        
+        try:
+            status, payload = await asyncio.wait_for(self._read_and_route(reader),
+                                                     REQUEST_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            status, payload = 408, {'error': "Request timed out"}
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            status, payload = 400, {'error': "Malformed request"}
+        except ConnectionError:
+            writer.close()
+            return
+        
+        body = json.dumps(payload, indent=2).encode('utf-8')
+        head = (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n")
+        try:
+            writer.write(head.encode('ascii') + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    
+    async def _read_and_route(self, reader: 'asyncio.StreamReader') -> Tuple[int, dict]:
+        """Parse the request line, headers and body"""
+        head = await reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        method, path, _version = lines[0].split(' ', 2)
+        
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        length = int(headers.get('content-length', 0))
+        if length < 0:
+            raise ValueError("negative Content-Length")
+        if length > MAX_REQUEST_BYTES:
+            return 413, {'error': f"Body larger than {MAX_REQUEST_BYTES} bytes"}
+        body = await reader.readexactly(length) if length else b''
+        
+        return self._route(method.upper(), path, body)
+
+def run_service(host: str, port: int, options: Optional[CompareOptions] = None,
+                workers: Optional[int] = None, queue_size: int = 100,
+                report_dir: str = "pdf-reports", save_diff: bool = False):
+    """Run the comparison service until interrupted"""
+    print("\n" + "="*70)
+    print("🛰️  PDF COMPARISON TOOL - Service Mode")
+    print("="*70 + "\n")
+    
+    import asyncio
+    
+    service = ComparisonService(options, workers, queue_size, report_dir, save_diff)
+    try:
+        asyncio.run(service.serve(host, port))
+    except KeyboardInterrupt:
+        print("\n🛑 Service stopped")
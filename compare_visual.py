@@ -0,0 +1,236 @@
+"""
+PDF Comparison Tool - visual comparison
+Rasterized pages compared tile by tile, for --visual and PNG inputs
+"""
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from compare import (VISUAL_DPI, VISUAL_TOLERANCE, ComparisonResult, DocumentStats, StageTimer,
+                     VisualOptions, classify_similarity)
+
+# Visual comparison settings
+VISUAL_TILE_SIZE = 32
+DECIDED_BY_VISUAL = "visual tile diff"
+
+def _load_visual_deps():
+    """Import numpy and Pillow on demand, since only visual mode needs them"""
+    try:
+        import numpy
+        from PIL import Image
+    except ImportError:
+        print("❌ Error: Visual mode needs numpy and Pillow - pip install numpy pillow")
+        sys.exit(1)
+    return numpy, Image
+
+def rasterize_pdf(pdf_path: str, out_dir: Path, dpi: int = VISUAL_DPI) -> List[Path]:
+    """Render every page of a PDF to PNG with pdftoppm, returning the files in page order"""
+    import shutil
+    import subprocess
+    
+    pdftoppm = shutil.which('pdftoppm')
+    if pdftoppm is None:
+        print("❌ Error: Visual mode needs pdftoppm (poppler-utils) to rasterize PDFs; "
+              "pass PNG files or directories instead")
+        sys.exit(1)
+    prefix = out_dir / Path(pdf_path).stem
+    try:
+        subprocess.run([pdftoppm, '-r', str(dpi), '-png', pdf_path, str(prefix)],
+                       check=True, capture_output=True)
+    except subprocess.CalledProcessError as e:
+        print(f"❌ Error rasterizing {pdf_path}: {e.stderr.decode(errors='replace').strip()}")
+        sys.exit(1)
+    # pdftoppm zero-pads page numbers to the width of the page count
+    return sorted(out_dir.glob(f"{prefix.name}-*.png"),
+                  key=lambda path: int(path.stem.rsplit('-', 1)[1]))
+
+def collect_images(path: str) -> List[Path]:
+    """PNG pages from a single file, or every PNG in a directory sorted by name"""
+    path = Path(path)
+    if path.is_dir():
+        return sorted(path.glob('*.png'))
+    return [path]
+
+def _tile_hashes(numpy, pixels, tile: int, weights):
+    """Hash every tile of an (H, W, C) image, one vectorized pass per row of tiles
+    
+    Each hash is a weighted sum of the tile's bytes, wrapping modulo 2**64, so equal
+    tiles always hash alike and different tiles collide with negligible probability.
+    """
+    rows, cols = pixels.shape[0] // tile, pixels.shape[1] // tile
+    hashes = numpy.empty((rows, cols), dtype=numpy.uint64)
+    for row in range(rows):
+        band = pixels[row * tile:(row + 1) * tile].reshape(tile, cols, tile, -1)
+        band = band.transpose(1, 0, 2, 3).reshape(cols, -1)
+        hashes[row] = band.astype(numpy.uint64) @ weights
+    return hashes
+
+def compare_page_images(image1: Path, image2: Path, tile: int = VISUAL_TILE_SIZE,
+                        tolerance: int = VISUAL_TOLERANCE,
+                        overlay_file: Optional[Path] = None) -> dict:
+    """Compare two page images tile by tile
+    
+    Both images are padded with white to a common size that is a multiple of the tile
+    size. Tiles are hashed first, and only tiles whose hashes differ are compared
+    pixel by pixel, where a pixel differs when any channel is off by more than the
+    tolerance. With an overlay_file, a faded copy of the first image with differing
+    pixels in red is written for the report.
+    """
+    numpy, Image = _load_visual_deps()
+    with Image.open(image1) as first, Image.open(image2) as second:
+        pixels1 = numpy.asarray(first.convert('RGB'))
+        pixels2 = numpy.asarray(second.convert('RGB'))
+    
+    height = -(-max(pixels1.shape[0], pixels2.shape[0]) // tile) * tile
+    width = -(-max(pixels1.shape[1], pixels2.shape[1]) // tile) * tile
+    padded = []
+    for pixels in (pixels1, pixels2):
+        canvas = numpy.full((height, width, 3), 255, dtype=numpy.uint8)
+        canvas[:pixels.shape[0], :pixels.shape[1]] = pixels
+        padded.append(canvas)
+    pixels1, pixels2 = padded
+    
+    # Fixed odd weights keep hashes comparable between runs
+    weights = (numpy.random.default_rng(0x5EED)
+               .integers(1, 2**63, size=tile * tile * 3, dtype=numpy.uint64) | 1)
+    changed_tiles = numpy.argwhere(_tile_hashes(numpy, pixels1, tile, weights)
+                                   != _tile_hashes(numpy, pixels2, tile, weights))
+    
+    mask = numpy.zeros((height, width), dtype=bool) if overlay_file is not None else None
+    tiles_changed = 0
+    pixels_changed = 0
+    for row, col in changed_tiles:
+        window = (slice(row * tile, (row + 1) * tile), slice(col * tile, (col + 1) * tile))
+        delta = numpy.abs(pixels1[window].astype(numpy.int16) - pixels2[window].astype(numpy.int16))
+        differs = (delta > tolerance).any(axis=-1)
+        count = int(differs.sum())
+        if count:
+            tiles_changed += 1
+            pixels_changed += count
+            if mask is not None:
+                mask[window] = differs
+    
+    tiles = (height // tile) * (width // tile)
+    result = {
+        'similarity': round((1 - tiles_changed / tiles) * 100, 4) if tiles else 100.0,
+        'tiles': tiles,
+        'tiles_changed': tiles_changed,
+        'pixels_changed': pixels_changed,
+        'overlay': None,
+    }
+    if mask is not None and tiles_changed:
+        overlay = (255 - (255 - pixels1.astype(numpy.uint16)) * 35 // 100).astype(numpy.uint8)
+        overlay[mask] = (220, 20, 60)
+        Image.fromarray(overlay).save(overlay_file, optimize=False)
+        result['overlay'] = overlay_file.name
+    return result
+
+def calculate_visual_similarity(images1: List[Path], images2: List[Path],
+                                overlay_dir: Optional[Path] = None,
+                                tolerance: int = VISUAL_TOLERANCE,
+                                deltas: Optional[List[dict]] = None) -> float:
+    """Score visual agreement as the share of unchanged tiles over pages paired by index
+    
+    Pages present on one side only count as fully changed. When a deltas list is given,
+    one entry per page with visual changes is appended to it, naming its overlay image
+    in overlay_dir when one is given.
+    """
+    _numpy, Image = _load_visual_deps()
+    if deltas is None:
+        deltas = []
+    if overlay_dir is not None:
+        overlay_dir.mkdir(parents=True, exist_ok=True)
+        for stale in overlay_dir.glob('visual-*.png'):
+            stale.unlink()
+    
+    tiles = changed = 0
+    for index in range(max(len(images1), len(images2))):
+        if index >= len(images1) or index >= len(images2):
+            # A page on one side only is changed in every tile
+            existing = images1[index] if index < len(images1) else images2[index]
+            with Image.open(existing) as image:
+                width, height = image.size
+            page_tiles = -(-width // VISUAL_TILE_SIZE) * -(-height // VISUAL_TILE_SIZE)
+            tiles += page_tiles
+            changed += page_tiles
+            deltas.append({'page': index + 1,
+                           'change': 'removed' if index < len(images1) else 'added',
+                           'similarity': 0.0, 'tiles': page_tiles,
+                           'tiles_changed': page_tiles, 'overlay': None})
+            continue
+        overlay_file = overlay_dir / f"visual-{index + 1:04d}.png" if overlay_dir else None
+        page = compare_page_images(images1[index], images2[index], tolerance=tolerance,
+                                   overlay_file=overlay_file)
+        tiles += page['tiles']
+        changed += page['tiles_changed']
+        if page['tiles_changed']:
+            deltas.append({'page': index + 1, 'change': 'changed', **page})
+        print(f"   Compared page {index + 1}", end='\r')
+    print()  # New line after progress
+    
+    if tiles == 0:
+        return 100.0
+    return (1 - changed / tiles) * 100
+
+def compare_images(images_path1: str, images_path2: str, save_diff: bool = False,
+                   output_file: str = "pdf_comparison_report.html",
+                   visual: Optional[VisualOptions] = None) -> ComparisonResult:
+    """Compare PNG pages directly, such as screenshots captured by Cypress
+    
+    Each side is one PNG file or a directory whose PNGs, sorted by name, are the pages.
+    """
+    visual = visual or VisualOptions()
+    print("\n" + "="*70)
+    print("🖼️  PDF COMPARISON TOOL - Visual Mode")
+    print("="*70 + "\n")
+    
+    timer = StageTimer()
+    images1 = collect_images(images_path1)
+    images2 = collect_images(images_path2)
+    for path, images in ((images_path1, images1), (images_path2, images2)):
+        if not images:
+            print(f"❌ Error: No PNG images found in {path}")
+            sys.exit(1)
+    print(f"Comparing {len(images1)} vs {len(images2)} image(s) in "
+          f"{VISUAL_TILE_SIZE}px tiles...")
+    
+    visual_deltas = []
+    overlay_dir = Path(output_file).with_name(Path(output_file).stem + "_pages")
+    try:
+        similarity = calculate_visual_similarity(images1, images2,
+                                                 overlay_dir if save_diff else None,
+                                                 visual.tolerance, visual_deltas)
+    except OSError as e:
+        print(f"❌ Error reading images: {e}")
+        sys.exit(1)
+    timer.end_stage('visual')
+    
+    print(f"\n🖼️  Visual Similarity: {similarity:.2f}% of tiles unchanged "
+          f"({len(visual_deltas)} page(s) look different)")
+    
+    report_file = None
+    if save_diff:
+        from compare_report import generate_html_report
+        report_file = output_file
+        no_text = DocumentStats.from_pages([])
+        generate_html_report(images_path1, images_path2, similarity, output_file,
+                             DECIDED_BY_VISUAL, stats1=no_text, stats2=no_text,
+                             pages1=[], pages2=[], page_deltas=[],
+                             visual_similarity=similarity, visual_deltas=visual_deltas)
+        timer.end_stage('report')
+    print("="*70 + "\n")
+    
+    return ComparisonResult(
+        pdf1=images_path1,
+        pdf2=images_path2,
+        similarity=similarity,
+        status=classify_similarity(similarity),
+        decided_by=DECIDED_BY_VISUAL,
+        pages1=len(images1),
+        pages2=len(images2),
+        timings=timer.stop(),
+        stages=timer.stages,
+        report_file=report_file,
+        visual_similarity=similarity,
+        visual_deltas=visual_deltas,
+    )
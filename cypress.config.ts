@@ -1,5 +1,6 @@
 import { defineConfig } from 'cypress';
 import { getLatestVerificationCode } from './cypress/support/puppeteer-stealth';
+import { comparePdfsViaService, ComparePdfsOptions, PdfComparisonResult } from './cypress/support/pdf-compare-client';
 import { allureCypress } from 'allure-cypress/reporter';
 
 export default defineConfig({
@@ -23,6 +24,9 @@ export default defineConfig({
             console.error('Error fetching SMS code:', error);
             return null;
           }
+        },
+        async comparePdfs(options: ComparePdfsOptions): Promise<PdfComparisonResult> {
+          return await comparePdfsViaService(options);
         }
       });
       allureCypress(on, config, {
@@ -0,0 +1,68 @@
+import * as path from 'path';
+
+export interface PdfComparisonResult {
+  pdf1: string;
+  pdf2: string;
+  similarity: number | null;
+  status: string;
+  error: string | null;
+  decided_by?: string;
+  report_file?: string | null;
+  [key: string]: unknown;
+}
+
+export interface ComparePdfsOptions {
+  pdf1: string;
+  pdf2: string;
+  saveDiff?: boolean;
+  serviceUrl?: string;
+  timeoutMs?: number;
+  pollIntervalMs?: number;
+}
+
+const DEFAULT_SERVICE_URL = process.env.PDF_COMPARE_URL || 'http://127.0.0.1:8765';
+
+const sleep = (ms: number) => new Promise(resolve => setTimeout(resolve, ms));
+
+// Talks to `python compare.py --serve`, which keeps its worker processes warm between calls
+export async function comparePdfsViaService(options: ComparePdfsOptions): Promise<PdfComparisonResult> {
+  const serviceUrl = options.serviceUrl || DEFAULT_SERVICE_URL;
+  const timeoutMs = options.timeoutMs ?? 120000;
+  const pollIntervalMs = options.pollIntervalMs ?? 250;
+  const deadline = Date.now() + timeoutMs;
+
+  let jobId: string | undefined;
+  while (!jobId) {
+    const response = await fetch(`${serviceUrl}/jobs`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({
+        pdf1: path.resolve(options.pdf1),
+        pdf2: path.resolve(options.pdf2),
+        save_diff: options.saveDiff ?? false
+      })
+    });
+    const body = await response.json();
+    if (response.status === 202) {
+      jobId = body.id;
+    } else if (response.status === 503 && Date.now() < deadline) {
+      // Queue is full, wait for workers to catch up
+      await sleep(pollIntervalMs * 4);
+    } else {
+      throw new Error(`PDF comparison rejected (${response.status}): ${body.error}`);
+    }
+  }
+
+  while (Date.now() < deadline) {
+    const response = await fetch(`${serviceUrl}/jobs/${jobId}/result`);
+    if (response.status === 200) {
+      return await response.json();
+    }
+    if (response.status !== 202) {
+      const body = await response.json();
+      throw new Error(`PDF comparison job ${jobId} failed (${response.status}): ${body.error}`);
+    }
+    await sleep(pollIntervalMs);
+  }
+  throw new Error(`PDF comparison job ${jobId} did not finish within ${timeoutMs}ms`);
+}
@@ -0,0 +1,151 @@
+"""Page alignment invariants on shuffled, edited and padded random documents"""
+import random
+
+import pytest
+
+import compare
+
+
+def longest_increasing_length(pairs):
+    """O(N^2) longest run of pairs increasing on both sides"""
+    ordered = sorted(pairs.items())
+    best = [1] * len(ordered)
+    for index, (_, j) in enumerate(ordered):
+        for earlier in range(index):
+            if ordered[earlier][1] < j:
+                best[index] = max(best[index], best[earlier] + 1)
+    return max(best, default=0)
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_in_order_pairs_is_a_longest_increasing_subset(seed):
+    rng = random.Random(seed)
+    targets = rng.sample(range(60), rng.randint(0, 30))
+    pairs = dict(zip(rng.sample(range(60), len(targets)), targets))
+    anchors = compare._in_order_pairs(pairs)
+    assert all(pairs[i] == j for i, j in anchors)
+    assert all(a[0] < b[0] and a[1] < b[1] for a, b in zip(anchors, anchors[1:]))
+    assert len(anchors) == longest_increasing_length(pairs)
+
+
+WORDS = [f"word{n}" for n in range(400)]
+
+
+def random_page(rng):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(0, 60)))
+
+
+def edited_copy(rng, pages):
+    """The pages with some moved, rewritten, lightly edited, deleted and inserted"""
+    pages = list(pages)
+    for _ in range(rng.randint(0, 3)):
+        if len(pages) > 1:
+            pages.insert(rng.randrange(len(pages)), pages.pop(rng.randrange(len(pages))))
+    for index in range(len(pages)):
+        roll = rng.random()
+        if roll < 0.1:
+            pages[index] = random_page(rng)
+        elif roll < 0.3:
+            words = pages[index].split()
+            if words:
+                words[rng.randrange(len(words))] = rng.choice(WORDS)
+            pages[index] = ' '.join(words)
+    for _ in range(rng.randint(0, 3)):
+        if pages and rng.random() < 0.5:
+            del pages[rng.randrange(len(pages))]
+        else:
+            pages.insert(rng.randint(0, len(pages)), random_page(rng))
+    return pages
+
+
+def random_documents(seed):
+    rng = random.Random(seed)
+    pages1 = [random_page(rng) for _ in range(rng.randint(0, 25))]
+    # Repeated and blank pages make hash matching ambiguous
+    if pages1 and rng.random() < 0.3:
+        pages1.insert(rng.randint(0, len(pages1)), rng.choice(pages1))
+    if rng.random() < 0.2:
+        pages1.insert(rng.randint(0, len(pages1)), '')
+    return pages1, edited_copy(rng, pages1)
+
+
+def assert_valid_opcodes(opcodes, pages1, pages2, i_range, j_range):
+    """Every page in the ranges is covered exactly once, by an opcode its tag fits"""
+    covered1 = []
+    covered2 = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        assert tag in ('equal', 'replace', 'insert', 'delete', 'move')
+        assert i1 <= i2 and j1 <= j2
+        if tag == 'insert':
+            assert i1 == i2 and j1 < j2
+        elif tag == 'delete':
+            assert j1 == j2 and i1 < i2
+        else:
+            # Scoring and layouts pair these page by page
+            assert i2 - i1 == j2 - j1 > 0
+        if tag == 'equal':
+            assert pages1[i1:i2] == pages2[j1:j2]
+        if tag == 'move':
+            assert i2 - i1 == 1
+        covered1.extend(range(i1, i2))
+        covered2.extend(range(j1, j2))
+    assert sorted(covered1) == list(i_range)
+    assert sorted(covered2) == list(j_range)
+    in_order = [opcode for opcode in opcodes if opcode[0] != 'move']
+    for (_, _, i2, _, j2), (_, i1, _, j1, _) in zip(in_order, in_order[1:]):
+        assert i2 <= i1 and j2 <= j1
+
+
+@pytest.mark.parametrize('seed', range(150))
+def test_align_pages_minhash_covers_every_page_once(seed):
+    pages1, pages2 = random_documents(seed)
+    opcodes = compare.align_pages_minhash(pages1, pages2, compare.page_text_hashes(pages1),
+                                          compare.page_text_hashes(pages2))
+    assert_valid_opcodes(opcodes, pages1, pages2, range(len(pages1)), range(len(pages2)))
+
+
+def test_align_pages_minhash_reports_a_moved_page():
+    rng = random.Random(7)
+    pages1 = [random_page(rng) + ' filler' for _ in range(10)]
+    pages2 = pages1[:2] + pages1[3:8] + [pages1[2]] + pages1[8:]
+    opcodes = compare.align_pages_minhash(pages1, pages2, compare.page_text_hashes(pages1),
+                                          compare.page_text_hashes(pages2))
+    assert ('move', 2, 3, 7, 8) in opcodes
+    assert all(tag in ('equal', 'move') for tag, *_ in opcodes)
+
+
+@pytest.mark.parametrize('seed', range(150))
+def test_split_replace_blocks_covers_every_page_once(seed):
+    pages1, pages2 = random_documents(seed)
+    opcodes = compare.split_replace_blocks(
+        pages1, pages2,
+        compare.align_pages(compare.page_text_hashes(pages1), compare.page_text_hashes(pages2)))
+    assert_valid_opcodes(opcodes, pages1, pages2, range(len(pages1)), range(len(pages2)))
+    assert 'move' not in {tag for tag, *_ in opcodes}
+
+
+def prepared(path, pages):
+    hashes = compare.page_text_hashes(pages)
+    stats = compare.DocumentStats.from_pages(pages).totals()
+    return compare.PreparedDocument(path, path, pages, hashes, stats)
+
+
+def test_reordered_pages_are_not_identical_and_stay_in_the_report(tmp_path):
+    rng = random.Random(11)
+    pages1 = [random_page(rng) + ' filler' for _ in range(6)]
+    pages2 = list(pages1)
+    pages2[1], pages2[4] = pages2[4], pages2[1]
+    result = compare.compare_prepared(prepared('a.pdf', pages1), prepared('d.pdf', pages2),
+                                      align='minhash')
+    assert result.similarity == 100.0
+    assert result.status == 'ALMOST IDENTICAL'
+    # Swapping two pages moves both out of the longest in-order run
+    assert [delta['change'] for delta in result.page_deltas] == ['moved', 'moved']
+    
+    report = tmp_path / 'report.html'
+    compare.generate_html_report('a.pdf', 'd.pdf', result.similarity, str(report),
+                                 pages1=pages1, pages2=pages2, page_deltas=result.page_deltas)
+    html = report.read_text(encoding='utf-8')
+    assert 'No Differences Found' not in html
+    assert 'Moved: PDF 1' in html
+    assert 'ALMOST IDENTICAL' in html
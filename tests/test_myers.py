@@ -0,0 +1,44 @@
+"""myers_matched checked against a brute-force LCS on random and edge-case inputs"""
+import random
+
+import pytest
+
+import compare
+
+
+def lcs_length(seq1, seq2):
+    """Textbook O(NM) longest common subsequence length"""
+    row = [0] * (len(seq2) + 1)
+    for token in seq1:
+        diagonal = 0
+        for j, other in enumerate(seq2, 1):
+            above = row[j]
+            row[j] = diagonal + 1 if token == other else max(row[j], row[j - 1])
+            diagonal = above
+    return row[-1]
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_myers_matched_equals_lcs_length(seed):
+    rng = random.Random(seed)
+    alphabet = rng.randint(1, 6)
+    seq1 = [rng.randrange(alphabet) for _ in range(rng.randint(0, 40))]
+    if rng.random() < 0.5:
+        # Mostly shared sequences exercise the prefix/suffix stripping
+        seq2 = [token if rng.random() < 0.8 else rng.randrange(alphabet + 2)
+                for token in seq1]
+        seq2.insert(rng.randint(0, len(seq2)), alphabet + 3)
+    else:
+        seq2 = [rng.randrange(alphabet + 1) for _ in range(rng.randint(0, 40))]
+    assert compare.myers_matched(seq1, seq2) == lcs_length(seq1, seq2)
+
+
+@pytest.mark.parametrize('seq1, seq2, expected', [
+    ([], [], 0),
+    ([1, 2, 3], [], 0),
+    ([1, 2, 3], [1, 2, 3], 3),
+    ([1, 2, 3], [4, 5, 6], 0),
+    ([1, 2, 3, 4], [2, 4, 3], 2),
+])
+def test_myers_matched_edge_cases(seq1, seq2, expected):
+    assert compare.myers_matched(seq1, seq2) == expected
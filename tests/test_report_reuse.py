@@ -0,0 +1,27 @@
+"""A stored result is only reused with a report whose linked assets are all in place"""
+import compare
+
+
+def test_report_is_stale_without_its_fragments_and_overlays(tmp_path):
+    report = tmp_path / "report.html"
+    report.write_text(f'<html><head><meta name="{compare.REPORT_KEY_META}" content="k1">'
+                      '</head></html>', encoding='utf-8')
+    result = compare.ComparisonResult(
+        pdf1='a.pdf', pdf2='b.pdf', similarity=90.0, status='VERY SIMILAR', decided_by='x',
+        page_deltas=[{'change': 'changed'}, {'change': 'added'}],
+        visual_deltas=[{'page': 3, 'change': 'changed'}, {'page': 4, 'change': 'added'}])
+    assert not compare.html_report_is_current(str(report), 'k1', result)
+
+    assets = tmp_path / "report_pages"
+    assets.mkdir()
+    for name in ("change-0001.html", "change-0002.html", "visual-0003.png"):
+        (assets / name).write_bytes(b'')
+    assert compare.html_report_is_current(str(report), 'k1', result)
+    assert not compare.html_report_is_current(str(report), 'k2', result)
+
+    (assets / "visual-0003.png").unlink()
+    assert not compare.html_report_is_current(str(report), 'k1', result)
+
+    no_deltas = compare.ComparisonResult(pdf1='a.pdf', pdf2='b.pdf', similarity=100.0,
+                                         status='IDENTICAL', decided_by='x')
+    assert compare.html_report_is_current(str(report), 'k1', no_deltas)
@@ -0,0 +1,26 @@
+"""DocumentStats checked against str.split() and str.splitlines() on random pages"""
+import random
+
+import pytest
+
+import compare
+
+
+# Characters str.split() and str.splitlines() treat specially, plus plain text
+STATS_ALPHABET = ['a', 'b', ' ', '\t', '\n', '\r', '\r\n', '\v', '\f', '\x1c', '\x1d',
+                  '\x1e', '\x1f', '\x85', '\u2028', '\u2029', '\xa0', 'é']
+
+
+@pytest.mark.parametrize('seed', range(300))
+def test_document_stats_match_split_of_joined_text(seed):
+    rng = random.Random(seed)
+    pages = [''.join(rng.choice(STATS_ALPHABET) for _ in range(rng.randint(0, 12)))
+             for _ in range(rng.randint(0, 6))]
+    text = ''.join(pages)
+    stats = compare.DocumentStats.from_pages(pages)
+    assert stats.totals() == {
+        'chars': len(text),
+        'words': len(text.split()),
+        'lines': len(text.splitlines()),
+    }
+    assert [chars for chars, _words, _lines in stats.per_page] == [len(page) for page in pages]